@@ -0,0 +1,93 @@
+"""
+Headless batch pipeline for MicroGenome Analyzer
+Runs annotation, AMR/virulence screening and reports without the GUI
+
+    python cli.py genomes/ --stages annotation,amr --workers 16
+"""
+
+import os
+import sys
+import glob
+import argparse
+import multiprocessing
+
+GENOME_EXTENSIONS = (".fasta", ".fna", ".fa")
+
+
+def collect_genomes(inputs):
+    """Files as given; directories are expanded to their FASTA files."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for ext in GENOME_EXTENSIONS:
+                files.extend(sorted(glob.glob(os.path.join(item, f"*{ext}"))))
+        elif os.path.isfile(item):
+            files.append(item)
+        else:
+            print(f"⚠️  Skipping missing input: {item}")
+    return [os.path.abspath(f) for f in dict.fromkeys(files)]
+
+
+def parse_args(argv=None):
+    from core.pipeline import STAGE_ORDER
+
+    parser = argparse.ArgumentParser(description="MicroGenome Analyzer - headless batch pipeline")
+    parser.add_argument("inputs", nargs="+", help="genome FASTA files or directories")
+    parser.add_argument("--stages", default=",".join(STAGE_ORDER),
+                        help=f"comma-separated subset of: {', '.join(STAGE_ORDER)}")
+    parser.add_argument("--workers", type=int, default=None, help="parallel samples (default: CPU count)")
+    parser.add_argument("--db", default=None, help="database path (default: <workdir>/microgenome.db)")
+    parser.add_argument("--workdir", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="folder with tools/, databases/ and results/ (default: app folder)")
+    parser.add_argument("--no-resume", action="store_true", help="rerun stages that already completed")
+    parser.add_argument("--profile", choices=("spans", "cprofile", "pyinstrument"), default=None,
+                        help="record stage timings in the metrics table (cprofile/pyinstrument also "
+                             "save a profile per engine run to results/profiles)")
+    args = parser.parse_args(argv)
+
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in args.stages if s not in STAGE_ORDER]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    genomes = collect_genomes(args.inputs)
+    if not genomes:
+        print("❌ No genome files found.")
+        return 1
+
+    # Engines resolve tools/, databases/ and results/ from the working directory
+    os.chdir(args.workdir)
+    if args.profile:
+        # Before the pool starts, so spawned workers pick it up too
+        os.environ["MICROGENOME_PROFILE"] = args.profile
+    from utils import profiling
+    from database_manager import DatabaseManager
+    from core.pipeline import PipelineRunner
+
+    db = DatabaseManager(args.db or os.path.join(args.workdir, "microgenome.db"))
+    if args.profile:
+        profiling.configure(args.profile)
+        profiling.set_sink(db.record_metric)
+    try:
+        runner = PipelineRunner(db, stages=args.stages, workers=args.workers,
+                                resume=not args.no_resume, log=lambda msg: print(msg, flush=True))
+        print(f"🚀 {len(genomes)} genomes | stages: {', '.join(runner.stages)} | workers: {runner.workers} "
+              f"x {runner.threads} tool threads")
+        summary = runner.run(genomes)
+        db.log_event('INFO', 'pipeline', f"Batch run: {summary['completed']} stages completed, "
+                                         f"{summary['failed']} failed, {summary['skipped']} skipped")
+    finally:
+        db.close()
+
+    print(f"🎉 Done: {summary['completed']} completed, {summary['failed']} failed, "
+          f"{summary['skipped']} skipped (already done)")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
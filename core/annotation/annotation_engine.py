@@ -1,11 +1,8 @@
 import os
 import subprocess
-import numpy as np
-import matplotlib
-# CRITICAL: Use non-interactive backend to prevent GUI thread crashes
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
 from PySide6.QtCore import QThread, Signal
+from utils.plotting import pyplot
+from utils import profiling
 
 # ==============================================================================
 # 1. VISUALIZATION ENGINE (FIXED)
@@ -61,6 +58,9 @@ class GenomePlotter:
             return None
 
         try:
+            # Heavy imports only when a plot is actually drawn
+            import numpy as np
+            plt = pyplot()
             fig = plt.figure(figsize=(10, 10), dpi=300)
             ax = fig.add_subplot(111, polar=True)
             
@@ -123,9 +123,11 @@ class AnnotationWorker(QThread):
     stats_signal = Signal(dict)
     finished_signal = Signal(bool, str)
 
-    def __init__(self, input_file):
+    def __init__(self, input_file, threads=None):
+        """threads: CPU threads the tools may use (default: all cores)"""
         super().__init__()
         self.input_file = input_file
+        self.threads = max(int(threads or os.cpu_count() or 1), 1)
         self.base_path = os.getcwd() 
         self.output_dir = os.path.join(self.base_path, "results", "annotation")
         os.makedirs(self.output_dir, exist_ok=True)
@@ -143,6 +145,7 @@ class AnnotationWorker(QThread):
         self.domain_db_path = os.path.join(self.base_path, "databases", "domains", "Pfam") 
         self.rna_db_path = os.path.join(self.base_path, "databases", "blast", "special_genes_db")
 
+    @profiling.timed("annotation.run", capture=True)
     def run(self):
         self.log_signal.emit("🚀 Initializing Annotation Engine...")
         self.progress_signal.emit(5)
@@ -153,7 +156,8 @@ class AnnotationWorker(QThread):
             
         # 1. GC CALCULATION
         try:
-            gc_percent, total_len = self.calculate_gc(self.input_file)
+            with profiling.span("annotation.gc_content", bytes=os.path.getsize(self.input_file)):
+                gc_percent, total_len = self.calculate_gc(self.input_file)
             self.log_signal.emit(f"📊 Genome Size: {total_len:,} bp | GC: {gc_percent:.2f}%")
         except Exception as e:
             self.finished_signal.emit(False, f"File Error: {str(e)}"); return
@@ -169,8 +173,10 @@ class AnnotationWorker(QThread):
         
         cmd_prodigal = [self.prodigal_path, "-i", self.input_file, "-o", out_gff, "-a", out_proteins, "-f", "gff", "-p", mode, "-q"]
         try:
-            self.run_subprocess(cmd_prodigal, "PRODIGAL")
-            gene_count = self.count_genes(out_proteins)
+            with profiling.span("annotation.prodigal", bytes=total_len) as span:
+                self.run_subprocess(cmd_prodigal, "PRODIGAL")
+                gene_count = self.count_genes(out_proteins)
+                span.add(count=gene_count)
             self.log_signal.emit(f"✅ Found {gene_count} genes.")
             self.progress_signal.emit(30)
         except Exception as e:
@@ -212,8 +218,10 @@ class AnnotationWorker(QThread):
         self.log_signal.emit("🎨 [Step 5/5] Generating Visualization...")
         try:
             plotter = GenomePlotter(out_gff, self.output_dir)
-            plotter.parse_gff()
-            plot_path = plotter.create_circular_plot()
+            with profiling.span("annotation.parse_gff"):
+                plotter.parse_gff()
+            with profiling.span("annotation.plot"):
+                plot_path = plotter.create_circular_plot()
             if plot_path:
                 self.log_signal.emit("✅ Visualization created.")
             else:
@@ -236,21 +244,24 @@ class AnnotationWorker(QThread):
 
     # --- WORKER FUNCTIONS ---
 
+    @profiling.timed("annotation.diamond")
     def annotate_local(self, protein_file, base_name):
         out_diamond = os.path.join(self.output_dir, f"{base_name}_annotation.tsv")
         cmd = [
             self.diamond_path, "blastp", "-q", protein_file, "-d", self.protein_db_path,
             "-o", out_diamond, "-f", "6", "qseqid", "sseqid", "pident", "evalue", "stitle",
-            "-k", "1", "--quiet"
+            "-k", "1", "--threads", str(self.threads), "--quiet"
         ]
         self.run_subprocess(cmd, "DIAMOND")
         return self.count_lines(out_diamond)
 
+    @profiling.timed("annotation.rpsblast")
     def find_domains(self, protein_file, base_name):
         out_domains = os.path.join(self.output_dir, f"{base_name}_domains.tsv")
         cmd = [
             self.rpsblast_path, "-query", protein_file, "-db", self.domain_db_path,
-            "-out", out_domains, "-outfmt", "6 qseqid stitle pident evalue", "-evalue", "0.01"
+            "-out", out_domains, "-outfmt", "6 qseqid stitle pident evalue", "-evalue", "0.01",
+            "-num_threads", str(self.threads)
         ]
         try:
             self.run_subprocess(cmd, "RPS-BLAST")
@@ -261,12 +272,13 @@ class AnnotationWorker(QThread):
             self.log_signal.emit(f"⚠️ RPS-BLAST Failed: {e}")
             return 0
 
+    @profiling.timed("annotation.blastn")
     def detect_special_genes(self, base_name):
         out_rna = os.path.join(self.output_dir, f"{base_name}_rna.tsv")
         cmd = [
             self.blastn_path, "-query", self.input_file, "-db", self.rna_db_path,
             "-out", out_rna, "-outfmt", "6 qseqid sseqid pident length evalue", 
-            "-evalue", "1e-5", "-perc_identity", "90"
+            "-evalue", "1e-5", "-perc_identity", "90", "-num_threads", str(self.threads)
         ]
         try:
             self.run_subprocess(cmd, "BLASTN")
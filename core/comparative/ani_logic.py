@@ -0,0 +1,170 @@
+import os
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.parsers import iter_fasta
+from utils.tool_wrappers import get_startupinfo
+
+# ANIb settings (Goris et al. 2007): the query is cut into 1020 bp fragments,
+# each fragment is searched against the other genome, and only hits that keep
+# >30% identity over >70% of the fragment count towards ANI.
+FRAGMENT_SIZE = 1020
+MIN_IDENTITY = 30.0
+MIN_ALIGNED_FRACTION = 0.7
+
+# qseqid is the numeric fragment index, so every column parses as a number
+BLAST_COLUMNS = "6 qseqid pident length mismatch gaps qlen bitscore"
+
+
+def iter_fragments(fasta_path, size=FRAGMENT_SIZE):
+    """Cuts every contig into consecutive fragments of `size` bp."""
+    for _, seq in iter_fasta(fasta_path):
+        for start in range(0, len(seq), size):
+            yield seq[start:start + size]
+
+
+class ANICalculator:
+    """
+    Native ANIb implementation on top of the bundled BLAST+ binaries.
+    Both directions (query -> reference and reference -> query) are aligned
+    concurrently, since ANIb is not symmetric.
+    """
+
+    def __init__(self, blastn_path, makeblastdb_path, output_dir, threads=None,
+                 min_identity=MIN_IDENTITY, min_aligned_fraction=MIN_ALIGNED_FRACTION):
+        self.blastn_path = blastn_path
+        self.makeblastdb_path = makeblastdb_path
+        self.output_dir = output_dir
+        self.threads = threads or os.cpu_count() or 1
+        self.min_identity = min_identity
+        self.min_aligned_fraction = min_aligned_fraction
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def compute(self, query_file, ref_file):
+        """
+        Runs ANIb in both directions.
+        Returns a dict with ANI (%) and aligned fraction (0-1) per direction.
+        """
+        query_db = self.build_db(query_file)
+        ref_db = self.build_db(ref_file)
+
+        # Split the thread budget between the two concurrent searches
+        per_job = max(1, self.threads // 2)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fwd = pool.submit(self.align_direction, query_file, ref_db, "query_vs_ref", per_job)
+            rev = pool.submit(self.align_direction, ref_file, query_db, "ref_vs_query", per_job)
+            ani_qr, cov_qr = fwd.result()
+            ani_rq, cov_rq = rev.result()
+
+        return {
+            "ani_query_ref": ani_qr,
+            "ani_ref_query": ani_rq,
+            "coverage_query": cov_qr,
+            "coverage_ref": cov_rq,
+            "ani": (ani_qr + ani_rq) / 2 if (cov_qr and cov_rq) else max(ani_qr, ani_rq)
+        }
+
+    def file_key(self, fasta_path):
+        """DB key: changes whenever the file is replaced or edited."""
+        stat = os.stat(fasta_path)
+        ident = f"{os.path.abspath(fasta_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(ident.encode()).hexdigest()
+
+    def build_db(self, fasta_path):
+        """
+        Creates a nucleotide BLAST DB next to the results. The name carries a
+        key of the file's path, size and mtime, so genomes with the same stem in
+        different folders get their own DB and an edited genome gets a new one.
+        """
+        base = os.path.basename(fasta_path).split('.')[0]
+        db_name = os.path.join(self.output_dir, f"{base}_{self.file_key(fasta_path)[:16]}_db")
+
+        if any(os.path.exists(db_name + ext) for ext in (".nin", ".nal")):
+            return db_name
+
+        cmd = [self.makeblastdb_path, "-in", fasta_path, "-dbtype", "nucl", "-out", db_name]
+        result = subprocess.run(cmd, capture_output=True, text=True, startupinfo=get_startupinfo())
+        if result.returncode != 0:
+            raise Exception(result.stderr.strip() or "makeblastdb failed")
+        return db_name
+
+    def align_direction(self, fasta_path, db_name, label, threads):
+        """Fragments one genome, aligns it against the other and summarizes the hits."""
+        out_tsv = os.path.join(self.output_dir, f"ani_{label}.tsv")
+        genome_length = self.align_fragments(fasta_path, db_name, out_tsv, threads)
+        hits = self.parse_alignment(out_tsv)
+        return self.summarize(hits, genome_length)
+
+    def align_fragments(self, fasta_path, db_name, out_tsv, threads):
+        """
+        Streams fragments into blastn's stdin so the fragment FASTA never
+        has to be written to disk. Returns the total genome length.
+        """
+        cmd = [
+            self.blastn_path,
+            "-query", "-",
+            "-db", db_name,
+            "-out", out_tsv,
+            "-outfmt", BLAST_COLUMNS,
+            "-task", "blastn",
+            "-xdrop_gap_final", "150",
+            "-penalty", "-1",
+            "-reward", "1",
+            "-dust", "no",
+            "-evalue", "1e-15",
+            "-max_target_seqs", "1",
+            "-num_threads", str(threads)
+        ]
+        # stderr goes to a file: a full pipe would stall blastn while we are still writing
+        err_path = out_tsv + ".log"
+        genome_length = 0
+        with open(err_path, "w") as f_err:
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                       stderr=f_err, text=True, startupinfo=get_startupinfo())
+            try:
+                for idx, fragment in enumerate(iter_fragments(fasta_path)):
+                    genome_length += len(fragment)
+                    process.stdin.write(f">{idx}\n{fragment}\n")
+            finally:
+                process.stdin.close()
+            process.wait()
+
+        if process.returncode != 0:
+            with open(err_path, 'r') as f:
+                raise Exception(f.read().strip() or "blastn failed")
+        return genome_length
+
+    @staticmethod
+    def parse_alignment(tsv_path):
+        """Loads the numeric BLAST table in one vectorized call (N x 7 float array)."""
+        if not os.path.exists(tsv_path) or os.path.getsize(tsv_path) == 0:
+            return np.empty((0, 7))
+        return np.loadtxt(tsv_path, delimiter='\t', ndmin=2)
+
+    def summarize(self, hits, genome_length):
+        """
+        Applies the ANIb filters and keeps the best hit per fragment.
+        Returns (ANI %, aligned fraction of the genome).
+        """
+        if hits.size == 0 or genome_length == 0:
+            return 0.0, 0.0
+
+        frag, pident, length, mismatch, gaps, qlen, bitscore = hits.T
+        aligned = length - gaps
+        keep = (pident > self.min_identity) & (aligned / qlen > self.min_aligned_fraction)
+        hits = hits[keep]
+        if hits.size == 0:
+            return 0.0, 0.0
+
+        # Best hit per fragment: sort by fragment, then by descending bitscore
+        order = np.lexsort((-hits[:, 6], hits[:, 0]))
+        hits = hits[order]
+        _, first = np.unique(hits[:, 0], return_index=True)
+        best = hits[first]
+
+        aligned = best[:, 2] - best[:, 4]
+        identical = aligned - best[:, 3]
+        ani = float(identical.sum() / aligned.sum() * 100)
+        coverage = float(min(1.0, aligned.sum() / genome_length))
+        return ani, coverage
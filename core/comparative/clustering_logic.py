@@ -0,0 +1,193 @@
+import os
+import hashlib
+from collections import defaultdict
+from utils.parsers import iter_fasta
+from utils.tool_wrappers import get_bin_path, run_diamond_makedb, run_diamond_blastp
+
+
+class UnionFind:
+    """Disjoint-set forest with path halving (single-linkage clustering)."""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Keep the lower index (= longer sequence) as the representative
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+class ProteinClusterer:
+    """
+    Groups the proteins predicted by the Annotation module (.faa files)
+    into gene families that can be compared across genomes.
+
+    1. Identical sequences are collapsed by hash (one entry per unique protein).
+    2. The unique set is clustered with a DIAMOND all-vs-all search when the
+       tool is available, otherwise with CD-HIT style greedy k-mer clustering.
+    """
+
+    def __init__(self, output_dir, min_identity=50.0, min_coverage=80.0,
+                 kmer_size=5, diamond_path=None, threads=None):
+        self.output_dir = output_dir
+        self.min_identity = min_identity
+        self.min_coverage = min_coverage
+        self.kmer_size = kmer_size
+        self.diamond_path = diamond_path or get_bin_path("diamond")
+        self.threads = threads or os.cpu_count() or 1
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def cluster(self, faa_files, log=None):
+        """
+        Returns {genome_name: [family_id, ...]} with one entry per protein.
+        Also writes gene_families.tsv (family, genome, protein_id).
+        """
+        log = log or (lambda msg: None)
+
+        # 1. EXACT DEDUPLICATION
+        unique_index = {}     # sequence digest -> unique id
+        unique_seqs = []
+        memberships = []      # (genome, protein_id, unique id)
+
+        for faa in faa_files:
+            genome = os.path.basename(faa).split('.')[0]
+            for header, seq in iter_fasta(faa):
+                seq = seq.rstrip('*')
+                if not seq:
+                    continue
+                digest = hashlib.blake2b(seq.encode(), digest_size=16).digest()
+                uid = unique_index.get(digest)
+                if uid is None:
+                    uid = unique_index[digest] = len(unique_seqs)
+                    unique_seqs.append(seq)
+                memberships.append((genome, header.split()[0], uid))
+
+        log(f"🧬 {len(memberships):,} proteins -> {len(unique_seqs):,} unique sequences")
+
+        # 2. CLUSTER UNIQUE SEQUENCES
+        # Longest first, so every representative is the longest member
+        order = sorted(range(len(unique_seqs)), key=lambda i: -len(unique_seqs[i]))
+        sorted_seqs = [unique_seqs[i] for i in order]
+
+        if os.path.exists(self.diamond_path):
+            log("⚡ Clustering with DIAMOND all-vs-all...")
+            labels = self.cluster_diamond(sorted_seqs)
+        else:
+            log("🔁 DIAMOND not found, using greedy k-mer clustering...")
+            labels = self.cluster_kmer(sorted_seqs)
+
+        # Map back to original unique ids and name families by size
+        rank_of_unique = [0] * len(unique_seqs)
+        for rank, uid in enumerate(order):
+            rank_of_unique[uid] = rank
+
+        family_sizes = defaultdict(int)
+        for _, _, uid in memberships:
+            family_sizes[labels[rank_of_unique[uid]]] += 1
+        ranked = sorted(family_sizes, key=lambda c: (-family_sizes[c], c))
+        family_names = {c: f"family_{i + 1:06d}" for i, c in enumerate(ranked)}
+
+        families = defaultdict(list)
+        tsv_path = os.path.join(self.output_dir, "gene_families.tsv")
+        with open(tsv_path, 'w') as f:
+            f.write("family\tgenome\tprotein_id\n")
+            for genome, protein_id, uid in memberships:
+                family = family_names[labels[rank_of_unique[uid]]]
+                families[genome].append(family)
+                f.write(f"{family}\t{genome}\t{protein_id}\n")
+
+        log(f"✅ {len(family_names):,} gene families")
+        return dict(families)
+
+    # =========================================================================
+    # CLUSTERING BACKENDS
+    # =========================================================================
+
+    def cluster_diamond(self, seqs):
+        """
+        All-vs-all DIAMOND search on the unique set, linked by union-find.
+        Sequences are written with their rank as ID, so hits parse as ints.
+        """
+        fasta = os.path.join(self.output_dir, "unique_proteins.faa")
+        with open(fasta, 'w') as f:
+            for i, seq in enumerate(seqs):
+                f.write(f">{i}\n{seq}\n")
+
+        db_path = os.path.join(self.output_dir, "unique_proteins")
+        ok, msg = run_diamond_makedb(fasta, db_path, exe=self.diamond_path)
+        if not ok:
+            raise Exception(msg)
+
+        hits_path = os.path.join(self.output_dir, "all_vs_all.tsv")
+        ok, msg = run_diamond_blastp(
+            fasta, db_path, hits_path,
+            columns=["qseqid", "sseqid"],
+            extra_args=[
+                "--id", str(self.min_identity),
+                "--query-cover", str(self.min_coverage),
+                "--subject-cover", str(self.min_coverage),
+                "--max-target-seqs", "0",
+                "--evalue", "1e-5"
+            ],
+            threads=self.threads, exe=self.diamond_path
+        )
+        if not ok:
+            raise Exception(msg)
+
+        uf = UnionFind(len(seqs))
+        with open(hits_path, 'r') as f:
+            for line in f:
+                q, _, s = line.partition('\t')
+                uf.union(int(q), int(s))
+        return [uf.find(i) for i in range(len(seqs))]
+
+    def cluster_kmer(self, seqs, max_postings=2000):
+        """
+        Greedy incremental clustering (CD-HIT style). Each sequence joins the
+        representative sharing the most k-mers (above the threshold),
+        or becomes a new representative.
+        Only representatives are indexed, so the index stays small.
+        """
+        k = self.kmer_size
+        # Fraction of shared k-mers expected for the identity threshold
+        min_shared = (self.min_identity / 100.0) ** k
+        min_len_ratio = self.min_coverage / 100.0
+
+        index = defaultdict(list)   # k-mer -> representative ranks
+        rep_lengths = {}
+        labels = [0] * len(seqs)
+
+        for i, seq in enumerate(seqs):
+            kmers = {seq[j:j + k] for j in range(len(seq) - k + 1)}
+            best, best_shared = None, 0
+            if kmers:
+                shared = defaultdict(int)
+                for kmer in kmers:
+                    postings = index.get(kmer)
+                    if postings and len(postings) < max_postings:
+                        for rep in postings:
+                            shared[rep] += 1
+                needed = max(2, min_shared * len(kmers))
+                for rep, count in shared.items():
+                    if count >= needed and count > best_shared and len(seq) >= min_len_ratio * rep_lengths[rep]:
+                        best, best_shared = rep, count
+
+            if best is None:
+                labels[i] = i
+                rep_lengths[i] = len(seq)
+                for kmer in kmers:
+                    index[kmer].append(i)
+            else:
+                labels[i] = best
+
+        return labels
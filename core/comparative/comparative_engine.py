@@ -1,10 +1,9 @@
 import os
 import subprocess
-import matplotlib
-# CRITICAL: Use non-interactive backend to prevent GUI thread crashes
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
 from PySide6.QtCore import QThread, Signal
+from core.comparative.ani_logic import ANICalculator
+from core.comparative.dotplot_logic import DotplotRenderer
+from utils import profiling
 
 class ComparativeWorker(QThread):
     # Signals for UI updates
@@ -31,6 +30,7 @@ class ComparativeWorker(QThread):
         self.blastn_path = os.path.join(self.base_path, "tools", "blast", f"blastn{ext}")
         self.makeblastdb_path = os.path.join(self.base_path, "tools", "blast", f"makeblastdb{ext}")
 
+    @profiling.timed("comparative.run", capture=True)
     def run(self):
         self.log_signal.emit("🚀 Initializing Comparative Genomics Engine...")
         self.progress_signal.emit(5)
@@ -62,7 +62,8 @@ class ComparativeWorker(QThread):
         ]
         
         try:
-            self.run_subprocess(cmd_db)
+            with profiling.span("comparative.makeblastdb", bytes=os.path.getsize(self.ref_file)):
+                self.run_subprocess(cmd_db)
             self.progress_signal.emit(30)
             self.log_signal.emit("✅ Reference Database Built.")
         except Exception as e:
@@ -87,14 +88,32 @@ class ComparativeWorker(QThread):
         ]
 
         try:
-            self.run_subprocess(cmd_blast)
+            with profiling.span("comparative.blastn", bytes=os.path.getsize(self.query_file)):
+                self.run_subprocess(cmd_blast)
             self.progress_signal.emit(70)
             self.log_signal.emit("✅ Alignment Complete.")
         except Exception as e:
             self.finished_signal.emit(False, f"Alignment Error: {str(e)}")
             return
 
-        # 4. GENERATE DOTPLOT (Step 3)
+        # 4. AVERAGE NUCLEOTIDE IDENTITY (Step 3)
+        # ANIb: 1020 bp fragments aligned in both directions
+        self.log_signal.emit("🧮 Calculating ANIb (Fragmented BLASTN)...")
+        ani_stats = {}
+        try:
+            calculator = ANICalculator(self.blastn_path, self.makeblastdb_path, self.output_dir)
+            with profiling.span("comparative.ani"):
+                ani_stats = calculator.compute(self.query_file, self.ref_file)
+            self.log_signal.emit(
+                f"✅ ANI: {ani_stats['ani']:.2f}% | "
+                f"Coverage: {ani_stats['coverage_query']*100:.1f}% (query), "
+                f"{ani_stats['coverage_ref']*100:.1f}% (reference)"
+            )
+        except Exception as e:
+            self.log_signal.emit(f"⚠️ ANI Calculation Failed: {e}")
+        self.progress_signal.emit(85)
+
+        # 5. GENERATE DOTPLOT (Step 4)
         self.log_signal.emit("🎨 Generating Synteny Dotplot...")
         try:
             plot_path, match_count = self.create_dotplot(alignment_file)
@@ -105,6 +124,7 @@ class ComparativeWorker(QThread):
                 "matches": match_count,
                 "ref_name": os.path.basename(self.ref_file)
             }
+            results.update(ani_stats)
             
             self.result_signal.emit(results)
             self.progress_signal.emit(100)
@@ -117,55 +137,20 @@ class ComparativeWorker(QThread):
         """
         Reads BLAST results and plots a Diagonal Synteny Map using Matplotlib.
         This visualizes large-scale genomic rearrangements (Synteny).
+        Blue = Forward, Red = Inverted (Reverse Complement).
         """
-        x_coords = [] # Query positions
-        y_coords = [] # Reference positions
-        colors = []   # Blue = Forward, Red = Inverted
-        count = 0
-
-        if not os.path.exists(tsv_file): return None, 0
-
-        with open(tsv_file, 'r') as f:
-            for line in f:
-                parts = line.strip().split('\t')
-                if len(parts) >= 4:
-                    count += 1
-                    # Parse BLAST coords
-                    try:
-                        q_start, q_end = int(parts[0]), int(parts[1])
-                        s_start, s_end = int(parts[2]), int(parts[3])
-                        
-                        # Store segments (Start -> End)
-                        x_coords.append([q_start, q_end])
-                        y_coords.append([s_start, s_end])
-                        
-                        # Color logic: Forward match vs Reverse Complement (Inversion)
-                        if s_start < s_end:
-                            colors.append('#4318FF') # Blue (Forward)
-                        else:
-                            colors.append('#E04F5F') # Red (Inversion)
-                    except: pass
-
-        if count == 0:
+        renderer = DotplotRenderer()
+        with profiling.span("comparative.load_hits") as span:
+            hits = renderer.load_hits(tsv_file)
+            span.add(count=len(hits))
+        if len(hits) == 0:
             return None, 0
 
-        # Plotting
-        fig = plt.figure(figsize=(10, 8), dpi=150)
-        ax = fig.add_subplot(111)
-        
-        for i in range(len(x_coords)):
-            ax.plot(x_coords[i], y_coords[i], color=colors[i], linewidth=1.5, alpha=0.8)
-            
-        ax.set_title(f"Genome Synteny: Input vs {os.path.basename(self.ref_file)}", fontsize=14, fontweight='bold')
-        ax.set_xlabel("Query Genome Position (bp)", fontsize=12)
-        ax.set_ylabel("Reference Genome Position (bp)", fontsize=12)
-        ax.grid(True, linestyle='--', alpha=0.3)
-        
         out_png = os.path.join(self.output_dir, "synteny_plot.png")
-        plt.savefig(out_png, bbox_inches='tight')
-        plt.close(fig) # Explicitly close to free memory
-        
-        return out_png, count
+        title = f"Genome Synteny: Input vs {os.path.basename(self.ref_file)}"
+        with profiling.span("comparative.render", count=len(hits)):
+            renderer.render(hits, out_png, title)
+        return out_png, len(hits)
 
     def run_subprocess(self, cmd):
         """Runs command line tools silently on Windows."""
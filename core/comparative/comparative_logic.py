@@ -1,6 +1,7 @@
-import pandas as pd
 import os
 from utils.parsers import parse_gff3
+from core.comparative.pangenome_logic import PangenomeMatrix
+from core.comparative.clustering_logic import ProteinClusterer
 
 class ComparativeManager:
     def __init__(self, project_dir):
@@ -11,30 +12,55 @@ class ComparativeManager:
     def generate_matrix(self, gff_files):
         """
         Takes a list of GFF file paths and creates a 
-        Gene Presence/Absence Matrix using Pandas.
+        Gene Presence/Absence Matrix (bit-packed, streamed per genome).
         """
-        all_data = {}
+        matrix = PangenomeMatrix()
 
         for gff in gff_files:
             strain_name = os.path.basename(gff).split('_')[0]
             genes = parse_gff3(gff)
-            # Create a set of gene IDs for this strain
-            all_data[strain_name] = {gene['id']: 1 for gene in genes}
+            matrix.add_genome(strain_name, (gene['id'] for gene in genes))
 
-        # Create DataFrame: Rows = Genes, Columns = Strains
-        df = pd.DataFrame(all_data).fillna(0).astype(int)
-        
-        # Save the matrix as CSV
+        return self.export_matrix(matrix)
+
+    def generate_family_matrix(self, faa_files, log=None):
+        """
+        Builds the presence/absence matrix from real gene families:
+        proteins (.faa from the Annotation module) are clustered across
+        genomes first, so "core" means shared by every strain.
+        """
+        clusterer = ProteinClusterer(self.output_dir)
+        families = clusterer.cluster(faa_files, log=log)
+
+        matrix = PangenomeMatrix()
+        for genome, family_ids in families.items():
+            matrix.add_genome(genome, family_ids)
+
+        results = self.export_matrix(matrix)
+        results["families_path"] = os.path.join(self.output_dir, "gene_families.tsv")
+        return results
+
+    def export_matrix(self, matrix):
+        """
+        Saves the matrix as CSV + compressed binary (.npz)
+        and returns the pangenome statistics.
+        """
+        # Rows = Genes, Columns = Strains
         matrix_path = os.path.join(self.output_dir, "pangenome_matrix.csv")
-        df.to_csv(matrix_path)
+        matrix.write_csv(matrix_path)
+        npz_path = matrix.save(os.path.join(self.output_dir, "pangenome_matrix.npz"))
 
         # Calculate Statistics
-        core_genes = df[df.all(axis=1)].shape[0]
-        total_genes = df.shape[0]
+        stats = matrix.summary()
 
         return {
             "matrix_path": matrix_path,
-            "core_count": core_genes,
-            "accessory_count": total_genes - core_genes,
-            "total_count": total_genes
-        }
\ No newline at end of file
+            "matrix_npz_path": npz_path,
+            "core_count": stats["core"],
+            "soft_core_count": stats["soft_core"],
+            "shell_count": stats["shell"],
+            "cloud_count": stats["cloud"],
+            "unique_count": stats["unique"],
+            "accessory_count": stats["total"] - stats["core"],
+            "total_count": stats["total"]
+        }
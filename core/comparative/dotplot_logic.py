@@ -0,0 +1,102 @@
+import os
+import numpy as np
+from utils.plotting import pyplot
+
+FORWARD_COLOR = '#4318FF'   # Blue (Forward)
+INVERTED_COLOR = '#E04F5F'  # Red (Inversion)
+
+
+class DotplotRenderer:
+    """
+    Draws BLAST synteny dotplots with a fixed number of artists.
+    Up to `raster_threshold` hits are drawn as one LineCollection per
+    orientation; above that the hits are binned into a 2D density raster,
+    so plotting time no longer depends on the number of HSPs.
+    """
+
+    def __init__(self, raster_threshold=50000, bins=800, point_budget=2000000):
+        self.raster_threshold = raster_threshold
+        self.bins = bins
+        # Total points binned for the raster, spread along the hits
+        self.point_budget = point_budget
+
+    @staticmethod
+    def load_hits(tsv_file):
+        """
+        Reads qstart, qend, sstart, send from a BLAST outfmt 6 table.
+        Returns an (N x 4) int64 array.
+        """
+        if not os.path.exists(tsv_file) or os.path.getsize(tsv_file) == 0:
+            return np.empty((0, 4), dtype=np.int64)
+        hits = np.loadtxt(tsv_file, delimiter='\t', usecols=(0, 1, 2, 3), ndmin=2)
+        return hits.astype(np.int64)
+
+    def render(self, hits, out_png, title):
+        """Plots the hits and saves the figure. Returns the image path."""
+        from matplotlib.lines import Line2D
+        plt = pyplot()
+        forward = hits[:, 2] < hits[:, 3]
+
+        fig = plt.figure(figsize=(10, 8), dpi=150)
+        ax = fig.add_subplot(111)
+
+        if len(hits) <= self.raster_threshold:
+            self._draw_segments(ax, hits, forward)
+        else:
+            self._draw_density(ax, hits, forward)
+
+        # Proxy artists keep the legend independent of the drawing mode
+        ax.legend(handles=[
+            Line2D([0], [0], color=FORWARD_COLOR, lw=2, label=f"Forward ({int(forward.sum()):,})"),
+            Line2D([0], [0], color=INVERTED_COLOR, lw=2, label=f"Inverted ({int((~forward).sum()):,})")
+        ], loc='upper left', fontsize=9, frameon=False)
+
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel("Query Genome Position (bp)", fontsize=12)
+        ax.set_ylabel("Reference Genome Position (bp)", fontsize=12)
+        ax.grid(True, linestyle='--', alpha=0.3)
+
+        plt.savefig(out_png, bbox_inches='tight')
+        plt.close(fig)  # Explicitly close to free memory
+        return out_png
+
+    def _draw_segments(self, ax, hits, forward):
+        from matplotlib.collections import LineCollection
+        # (N, 2, 2): [[qstart, sstart], [qend, send]] per hit
+        segments = np.stack([hits[:, [0, 2]], hits[:, [1, 3]]], axis=1)
+        for mask, color in ((forward, FORWARD_COLOR), (~forward, INVERTED_COLOR)):
+            if mask.any():
+                ax.add_collection(LineCollection(segments[mask], colors=color, linewidths=1.5, alpha=0.8))
+        ax.autoscale_view()
+
+    def _draw_density(self, ax, hits, forward):
+        from matplotlib.colors import LinearSegmentedColormap, LogNorm
+        # Sample points along the hits so long HSPs keep their diagonal shape.
+        # Huge inputs are subsampled to keep the cost bounded.
+        samples = max(2, min(8, self.point_budget // len(hits)))
+        if len(hits) * samples > self.point_budget:
+            keep = np.random.default_rng(0).choice(len(hits), self.point_budget // samples, replace=False)
+            hits, forward = hits[keep], forward[keep]
+
+        coords = hits.astype(np.float32)
+        t = np.linspace(0.0, 1.0, samples, dtype=np.float32)
+        xs = coords[:, [0]] + (coords[:, [1]] - coords[:, [0]]) * t
+        ys = coords[:, [2]] + (coords[:, [3]] - coords[:, [2]]) * t
+
+        x_max, y_max = max(1, xs.max()), max(1, ys.max())
+        extent = (0, x_max, 0, y_max)
+
+        # Direct bin indices + bincount is much cheaper than np.histogram2d
+        ix = np.minimum((xs * (self.bins / x_max)).astype(np.int32), self.bins - 1)
+        iy = np.minimum((ys * (self.bins / y_max)).astype(np.int32), self.bins - 1)
+        flat = iy * self.bins + ix
+
+        for mask, color in ((forward, FORWARD_COLOR), (~forward, INVERTED_COLOR)):
+            if not mask.any():
+                continue
+            density = np.bincount(flat[mask].ravel(), minlength=self.bins * self.bins)
+            density = np.ma.masked_equal(density.reshape(self.bins, self.bins), 0)
+            cmap = LinearSegmentedColormap.from_list("dotplot", [(1, 1, 1, 0), color])
+            ax.imshow(density, origin='lower', extent=extent, aspect='auto',
+                      cmap=cmap, norm=LogNorm(vmin=1, vmax=max(2, density.max())),
+                      interpolation='nearest')
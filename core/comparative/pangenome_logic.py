@@ -0,0 +1,129 @@
+import numpy as np
+
+# Roary-style frequency classes (fraction of genomes carrying the family)
+CORE_THRESHOLD = 0.99
+SOFT_CORE_THRESHOLD = 0.95
+SHELL_THRESHOLD = 0.15
+
+# Number of set bits for every possible byte value
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int32)
+
+
+class PangenomeMatrix:
+    """
+    Gene family x genome presence/absence matrix stored as packed bits.
+    Families are encoded to integer row IDs as genomes stream in, so
+    1,000 genomes x 50k families needs ~6 MB instead of a dense DataFrame.
+    """
+
+    def __init__(self):
+        self.family_index = {}   # family key -> row id
+        self.genomes = []
+        self.packed = np.zeros((1024, 1), dtype=np.uint8)
+
+    @property
+    def families(self):
+        return list(self.family_index)
+
+    def add_genome(self, name, family_keys):
+        """Adds one genome (column) given an iterable of family keys it carries."""
+        index = self.family_index
+        ids = np.fromiter((index.setdefault(k, len(index)) for k in family_keys), dtype=np.int64)
+
+        col = len(self.genomes)
+        self.genomes.append(name)
+        self._ensure_capacity(len(index), col + 1)
+        if ids.size:
+            self.packed[np.unique(ids), col >> 3] |= np.uint8(0x80 >> (col & 7))
+
+    def _ensure_capacity(self, n_rows, n_cols):
+        rows, byte_cols = self.packed.shape
+        need_cols = (n_cols + 7) // 8
+        if n_rows <= rows and need_cols <= byte_cols:
+            return
+        # Grow geometrically so streaming many genomes stays amortized O(1)
+        new_rows = max(rows, 1)
+        while new_rows < n_rows:
+            new_rows *= 2
+        new_cols = max(byte_cols, need_cols)
+        if need_cols > byte_cols:
+            new_cols = max(need_cols, byte_cols * 2)
+        grown = np.zeros((new_rows, new_cols), dtype=np.uint8)
+        grown[:rows, :byte_cols] = self.packed
+        self.packed = grown
+
+    def matrix_bits(self):
+        """The packed matrix trimmed to (families, ceil(genomes / 8))."""
+        return self.packed[:len(self.family_index), :(len(self.genomes) + 7) // 8]
+
+    def family_counts(self):
+        """Number of genomes carrying each family (vectorized popcount)."""
+        return POPCOUNT[self.matrix_bits()].sum(axis=1)
+
+    def genome_counts(self):
+        """Number of families in each genome."""
+        bits = np.unpackbits(self.matrix_bits(), axis=1, count=len(self.genomes))
+        return bits.sum(axis=0)
+
+    def summary(self):
+        """Core / soft-core / shell / cloud counts."""
+        n_genomes = len(self.genomes)
+        counts = self.family_counts()
+        if n_genomes == 0 or counts.size == 0:
+            return {"core": 0, "soft_core": 0, "shell": 0, "cloud": 0, "unique": 0, "total": 0}
+
+        freq = counts / n_genomes
+        return {
+            "core": int((freq >= CORE_THRESHOLD).sum()),
+            "soft_core": int(((freq >= SOFT_CORE_THRESHOLD) & (freq < CORE_THRESHOLD)).sum()),
+            "shell": int(((freq >= SHELL_THRESHOLD) & (freq < SOFT_CORE_THRESHOLD)).sum()),
+            "cloud": int((freq < SHELL_THRESHOLD).sum()),
+            "unique": int((counts == 1).sum()),
+            "total": int(counts.size)
+        }
+
+    # =========================================================================
+    # EXPORT
+    # =========================================================================
+
+    def save(self, npz_path):
+        """Writes the packed matrix and its labels as a compressed .npz file."""
+        np.savez_compressed(
+            npz_path,
+            packed=self.matrix_bits(),
+            families=np.array(self.families, dtype=str),
+            genomes=np.array(self.genomes, dtype=str)
+        )
+        return npz_path
+
+    @classmethod
+    def load(cls, npz_path):
+        """Restores a matrix written by save() (more genomes can be added)."""
+        data = np.load(npz_path)
+        matrix = cls()
+        matrix.family_index = {name: i for i, name in enumerate(data["families"].tolist())}
+        matrix.genomes = data["genomes"].tolist()
+        matrix.packed = data["packed"].copy()
+        matrix._ensure_capacity(len(matrix.family_index), len(matrix.genomes))
+        return matrix
+
+    def write_csv(self, csv_path, chunk_rows=4096):
+        """
+        Streams the 0/1 matrix to CSV (rows = families, columns = genomes)
+        a block of rows at a time, so the dense table is never materialized.
+        """
+        n_genomes = len(self.genomes)
+        families = self.families
+        bits_all = self.matrix_bits()
+
+        with open(csv_path, 'wb') as f:
+            f.write(("," + ",".join(self.genomes) + "\n").encode())
+            for start in range(0, len(families), chunk_rows):
+                bits = np.unpackbits(bits_all[start:start + chunk_rows], axis=1, count=n_genomes)
+                # Build "0,1,1,...\n" byte rows directly from the bit matrix
+                text = np.full((bits.shape[0], 2 * n_genomes), ord(','), dtype=np.uint8)
+                text[:, 0::2] = bits + ord('0')
+                text[:, -1] = ord('\n')
+                for name, row in zip(families[start:start + chunk_rows], text):
+                    f.write(name.encode() + b"," + row.tobytes())
+        return csv_path
@@ -0,0 +1 @@
+from .job_engine import JobScheduler
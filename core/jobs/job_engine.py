@@ -0,0 +1,163 @@
+import json
+from PySide6.QtCore import QObject, QTimer, Signal, Qt
+from core.pipeline.pipeline_logic import stage_worker, stage_result, record_result
+from core.jobs.job_logic import ResourceBudget, JOB_REQUIREMENTS, DEFAULT_REQUIREMENTS, pick_jobs
+
+# Log lines kept per running job (the last one explains a failure)
+MAX_LOG_LINES = 50
+
+
+class JobScheduler(QObject):
+    """
+    Runs jobs from the persistent jobs table. At most `max_running` jobs run
+    at once and only while their threads / memory fit into the global budget;
+    everything else waits in the table, so queued work survives a restart.
+
+    A job runs the same engine (QThread) the views start directly. A view
+    that submitted a job connects to the engine's signals in job_started,
+    which is emitted right before the engine starts. With a ResourceMonitor,
+    the CPU / memory / I/O of each job's tool processes is stored with the job.
+    """
+    job_queued = Signal(int)
+    job_started = Signal(int, object)       # job_id, engine
+    job_finished = Signal(int, bool, str)   # job_id, success, message
+
+    def __init__(self, db, budget=None, max_running=None, poll_ms=2000, monitor=None):
+        super().__init__()
+        self.db = db
+        self.monitor = monitor
+        self.budget = budget or ResourceBudget()
+        self.max_running = max_running or self.budget.cpus
+        self.running = {}      # job_id -> [job, engine, collected signals, analysis_id]
+        self.engines = set()   # Kept alive until their thread has stopped
+        # Polling picks up retries whose delay has passed
+        self.timer = QTimer(self)
+        self.timer.setInterval(poll_ms)
+        self.timer.timeout.connect(self.dispatch)
+
+    def start(self):
+        """Requeue jobs interrupted by the last shutdown and start dispatching"""
+        requeued = self.db.requeue_interrupted_jobs()
+        if requeued:
+            self.db.log_event('INFO', 'jobs', f'{requeued} interrupted jobs queued again')
+        self.timer.start()
+        self.dispatch()
+
+    def stop(self):
+        self.timer.stop()
+
+    def submit(self, kind, input_path=None, project_id=None, params=None, priority=0,
+               threads=None, memory_mb=None, depends_on=None, max_attempts=1):
+        """Queue a job; requirements default to JOB_REQUIREMENTS[kind]. Returns job_id."""
+        default_threads, default_memory = JOB_REQUIREMENTS.get(kind, DEFAULT_REQUIREMENTS)
+        job_id = self.db.submit_job(kind, input_path, project_id, params, priority,
+                                    threads or default_threads, memory_mb or default_memory,
+                                    depends_on, max_attempts)
+        self.job_queued.emit(job_id)
+        self.dispatch()
+        return job_id
+
+    def cancel(self, job_id):
+        return self.db.cancel_job(job_id)
+
+    # =========================================================================
+    # DISPATCH
+    # =========================================================================
+
+    def dispatch(self):
+        """Start as many runnable jobs as the slots and the budget allow"""
+        free = self.max_running - len(self.running)
+        if free <= 0:
+            return
+        runnable = self.db.get_runnable_jobs(limit=free)
+        for i, job in enumerate(pick_jobs(runnable, self.budget, self.max_running, len(self.running))):
+            # Idle CPUs are shared by this job and the runnable ones after it;
+            # job['threads'] is what _launch hands the tools and _complete releases
+            job['threads'] = self.budget.expand(job['threads'], len(runnable) - i - 1)
+            self._launch(job)
+
+    def _launch(self, job):
+        job_id = job['job_id']
+        params = json.loads(job['params']) if job['params'] else None
+        try:
+            # The tools get exactly the threads reserved in the budget
+            threads, _ = self.budget.clamp(job['threads'], job['memory_mb'])
+            engine = stage_worker(job['kind'], job['input_path'], params, threads)
+        except Exception as e:
+            self.budget.release(job['threads'], job['memory_mb'])
+            self.db.start_job(job_id)
+            self.db.finish_job(job_id, False, str(e))
+            self.job_finished.emit(job_id, False, str(e))
+            return
+
+        analysis_id = self.db.start_analysis(job['project_id'], job['kind']) if job['project_id'] else None
+        self.db.start_job(job_id, analysis_id)
+
+        engine.job_id = job_id
+        if hasattr(engine, "log_signal"):
+            engine.log_signal.connect(self._on_log)
+        for name in ("stats_signal", "result_signal"):
+            if hasattr(engine, name):
+                getattr(engine, name).connect(self._on_result)
+        engine.finished_signal.connect(self._on_finished)
+        engine.finished.connect(self._on_thread_done)
+        # Runs on the engine's own thread, the only one that can close its read connection
+        engine.finished.connect(self.db.release_connection, Qt.DirectConnection)
+
+        self.running[job_id] = [job, engine, {"logs": [], "result": None, "finished": None}, analysis_id]
+        if self.monitor:
+            self.monitor.track_job(job_id, job['input_path'])
+        self.engines.add(engine)
+        self.job_started.emit(job_id, engine)
+        engine.start()
+
+    # =========================================================================
+    # ENGINE SIGNALS (queued to this thread)
+    # =========================================================================
+
+    def _collected(self):
+        entry = self.running.get(getattr(self.sender(), "job_id", None))
+        return entry[2] if entry else None
+
+    def _on_log(self, message):
+        out = self._collected()
+        if out is not None:
+            out["logs"].append(message)
+            del out["logs"][:-MAX_LOG_LINES]
+
+    def _on_result(self, result):
+        out = self._collected()
+        if out is not None:
+            out["result"] = result
+
+    def _on_finished(self, *args):
+        self._complete(self.sender(), args)
+
+    def _on_thread_done(self):
+        engine = self.sender()
+        # Engine raised before emitting finished_signal: still release its job
+        if getattr(engine, "job_id", None) in self.running:
+            self._complete(engine, None)
+        self.engines.discard(engine)
+
+    def _complete(self, engine, finished_args):
+        entry = self.running.pop(engine.job_id, None)
+        if entry is None:
+            return
+        job, _, out, analysis_id = entry
+        out["finished"] = finished_args
+        result = stage_result(job['kind'], engine, job['input_path'], out)
+
+        if job['project_id']:
+            record_result(self.db, job['kind'], job['project_id'], analysis_id, result)
+        status = self.db.finish_job(job['job_id'], result["success"],
+                                    None if result["success"] else result["message"])
+        self.budget.release(job['threads'], job['memory_mb'])
+        usage = self.monitor.finish_job(job['job_id']) if self.monitor else None
+        if usage:
+            self.db.record_job_usage(job['job_id'], usage)
+        if status == 'queued':
+            self.db.log_event('WARNING', 'jobs', f"Job {job['job_id']} ({job['kind']}) failed, retry scheduled")
+
+        self.job_finished.emit(job['job_id'], result["success"], result["message"])
+        self.dispatch()
@@ -0,0 +1,77 @@
+import os
+from core.monitor import system_memory_mb
+
+# Default requirements per job kind: (threads, memory_mb). Threads are a
+# minimum: a job that starts also takes its share of the idle CPUs (ResourceBudget.expand)
+JOB_REQUIREMENTS = {
+    "annotation": (2, 2048),   # Prodigal + DIAMOND
+    "amr": (1, 1024),          # BLASTP vs CARD
+    "virulence": (1, 1024),    # BLASTP vs VFDB
+    "report": (1, 256),
+}
+DEFAULT_REQUIREMENTS = (1, 512)
+
+
+def total_memory_mb():
+    """Physical RAM in MB (8 GB if it cannot be determined)."""
+    memory = system_memory_mb()
+    return int(memory[0]) if memory else 8192
+
+
+class ResourceBudget:
+    """
+    Global CPU / RAM budget shared by all running jobs. A job is started
+    only if its threads and memory fit into what is left.
+    """
+
+    def __init__(self, cpus=None, memory_mb=None):
+        self.cpus = cpus or os.cpu_count() or 1
+        # Leave a quarter of the RAM to the OS and the GUI
+        self.memory_mb = memory_mb or int(total_memory_mb() * 0.75)
+        self.used_cpus = 0
+        self.used_memory_mb = 0
+
+    def clamp(self, threads, memory_mb):
+        """A job bigger than the whole budget still runs (alone)."""
+        return min(max(threads, 1), self.cpus), min(max(memory_mb, 0), self.memory_mb)
+
+    def fits(self, threads, memory_mb):
+        threads, memory_mb = self.clamp(threads, memory_mb)
+        return (self.used_cpus + threads <= self.cpus
+                and self.used_memory_mb + memory_mb <= self.memory_mb)
+
+    def acquire(self, threads, memory_mb):
+        threads, memory_mb = self.clamp(threads, memory_mb)
+        self.used_cpus += threads
+        self.used_memory_mb += memory_mb
+
+    def expand(self, threads, jobs_waiting=0):
+        """
+        Threads for a job whose minimum (`threads`) is already acquired: adds an
+        even share of the idle CPUs, split with `jobs_waiting` other jobs, and
+        acquires it too. Release the returned count when the job ends.
+        """
+        threads = self.clamp(threads, 0)[0]
+        extra = max(self.cpus - self.used_cpus, 0) // (1 + max(jobs_waiting, 0))
+        self.used_cpus += extra
+        return threads + extra
+
+    def release(self, threads, memory_mb):
+        threads, memory_mb = self.clamp(threads, memory_mb)
+        self.used_cpus = max(self.used_cpus - threads, 0)
+        self.used_memory_mb = max(self.used_memory_mb - memory_mb, 0)
+
+
+def pick_jobs(runnable, budget, max_running, running):
+    """
+    Jobs to start now, in dispatch order (priority, then FIFO).
+    Stops at the first job that does not fit, so a big high-priority job
+    is not starved by a stream of small ones.
+    """
+    picked = []
+    for job in runnable:
+        if running + len(picked) >= max_running or not budget.fits(job['threads'], job['memory_mb']):
+            break
+        budget.acquire(job['threads'], job['memory_mb'])
+        picked.append(job)
+    return picked
@@ -0,0 +1 @@
+from .monitor_logic import ResourceMonitor, MONITOR_AVAILABLE, system_memory_mb
@@ -0,0 +1,352 @@
+import os
+import time
+import threading
+from collections import deque
+
+# Optional: psutil (works on every platform); without it Linux uses /proc
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+PROC_AVAILABLE = os.path.exists("/proc/self/stat")
+MONITOR_AVAILABLE = PSUTIL_AVAILABLE or PROC_AVAILABLE
+
+MB = 1024 * 1024
+
+
+# =========================================================================
+# SAMPLERS
+# Both return cumulative counters; ResourceMonitor turns them into rates.
+#   system()         -> {"cpu_busy", "cpu_total" (s), "mem_total_mb", "mem_available_mb"}
+#   processes(root)  -> {pid: {"ppid", "cmdline", "cpu" (s), "rss_mb", "read", "write" (bytes)}}
+#                       for `root` and all of its descendants
+# =========================================================================
+
+class PsutilSampler:
+    def system(self):
+        cpu = psutil.cpu_times()
+        total = sum(cpu)
+        idle = cpu.idle + getattr(cpu, "iowait", 0)
+        mem = psutil.virtual_memory()
+        return {"cpu_busy": total - idle, "cpu_total": total,
+                "mem_total_mb": mem.total / MB, "mem_available_mb": mem.available / MB}
+
+    def processes(self, root):
+        result = {}
+        try:
+            root_process = psutil.Process(root)
+            tree = [root_process] + root_process.children(recursive=True)
+        except psutil.Error:
+            return result
+        for process in tree:
+            try:
+                with process.oneshot():
+                    cpu = process.cpu_times()
+                    try:
+                        io = process.io_counters()
+                        read, write = io.read_bytes, io.write_bytes
+                    except (AttributeError, psutil.Error):
+                        read = write = 0   # Not available on macOS
+                    result[process.pid] = {
+                        "ppid": process.ppid(), "cmdline": process.cmdline(),
+                        "cpu": cpu.user + cpu.system, "rss_mb": process.memory_info().rss / MB,
+                        "read": read, "write": write,
+                    }
+            except psutil.Error:
+                continue   # Exited while sampling
+        return result
+
+
+class ProcSampler:
+    """Linux /proc reader (no dependencies)"""
+
+    def __init__(self):
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.page_mb = os.sysconf("SC_PAGE_SIZE") / MB
+        # Per-thread 'children' files need CONFIG_PROC_CHILDREN; else scan /proc
+        self.has_children = os.path.exists(f"/proc/self/task/{os.getpid()}/children")
+
+    def system(self):
+        with open("/proc/stat") as f:
+            fields = [int(v) for v in f.readline().split()[1:]]
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        memory = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                if key in ("MemTotal", "MemAvailable"):
+                    memory[key] = int(value.split()[0]) / 1024
+        return {"cpu_busy": (sum(fields) - idle) / self.ticks, "cpu_total": sum(fields) / self.ticks,
+                "mem_total_mb": memory.get("MemTotal", 0), "mem_available_mb": memory.get("MemAvailable", 0)}
+
+    def children(self, pid):
+        found = []
+        try:
+            tasks = os.listdir(f"/proc/{pid}/task")
+        except OSError:
+            return found
+        for tid in tasks:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/children") as f:
+                    found.extend(int(child) for child in f.read().split())
+            except OSError:
+                continue   # Thread ended
+        return found
+
+    def scan_children(self):
+        """{pid: [child pids]} for the whole system"""
+        tree = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                try:
+                    with open(f"/proc/{name}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+                tree.setdefault(ppid, []).append(int(name))
+        return tree
+
+    def process(self, pid):
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces: fields start after the last ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = [arg.decode(errors="replace") for arg in f.read().split(b"\0") if arg]
+        read = write = 0
+        try:
+            with open(f"/proc/{pid}/io") as f:
+                for line in f:
+                    key, value = line.split(":", 1)
+                    if key == "read_bytes":
+                        read = int(value)
+                    elif key == "write_bytes":
+                        write = int(value)
+        except OSError:
+            pass
+        return {"ppid": int(fields[1]), "cmdline": cmdline,
+                "cpu": (int(fields[11]) + int(fields[12])) / self.ticks,
+                "rss_mb": rss_pages * self.page_mb, "read": read, "write": write}
+
+    def processes(self, root):
+        result = {}
+        tree = None if self.has_children else self.scan_children()
+        pending = [root]
+        while pending:
+            pid = pending.pop()
+            try:
+                result[pid] = self.process(pid)
+            except (OSError, IndexError, ValueError):
+                continue   # Exited while sampling
+            pending.extend(self.children(pid) if tree is None else tree.get(pid, []))
+        return result
+
+
+def default_sampler():
+    if PSUTIL_AVAILABLE:
+        return PsutilSampler()
+    if PROC_AVAILABLE:
+        return ProcSampler()
+    return None
+
+
+def system_memory_mb():
+    """(total, available) physical memory in MB, or None if it cannot be read"""
+    sampler = default_sampler()
+    if sampler is None:
+        return None
+    try:
+        system = sampler.system()
+    except OSError:
+        return None
+    return system["mem_total_mb"], system["mem_available_mb"]
+
+
+# =========================================================================
+# ATTRIBUTION
+# =========================================================================
+
+def job_key(input_path):
+    """Name stem the tools of a job use for their inputs / outputs ('sample' for sample.fasta)"""
+    return os.path.basename(input_path or "").split('.')[0]
+
+
+def mentions(cmdline, key):
+    """True if an argument of the command line is a file named after `key`"""
+    if not key:
+        return False
+    for arg in cmdline:
+        name = os.path.basename(arg)
+        if name.startswith(key) and (len(name) == len(key) or name[len(key)] in "._"):
+            return True
+    return False
+
+
+# =========================================================================
+# MONITOR
+# =========================================================================
+
+class ResourceMonitor:
+    """
+    Samples CPU, RSS and disk I/O of the system, this process and its child
+    processes on a daemon thread, and keeps the last `history` samples in a
+    ring buffer. The GUI only reads the buffer.
+
+    Tool subprocesses are attributed to the running job whose input name
+    appears in their command line (all of them when only one job runs);
+    their descendants belong to the same job. Per-job totals are sampled,
+    so a process that lives less than one interval is not counted.
+
+    Sample: {"time", "cpu_percent", "mem_percent",
+             "app": usage, "tools": usage, "jobs": {job_id: usage}}
+    usage:  {"cpu_percent" (100 = one core), "rss_mb", "read_mb_s", "write_mb_s", "processes"}
+    """
+
+    def __init__(self, interval=1.0, history=600, sampler=None):
+        self.interval = interval
+        self.sampler = sampler or default_sampler()
+        self.available = self.sampler is not None
+        self.pid = os.getpid()
+        self.samples = deque(maxlen=history)
+        self.jobs = {}       # job_id -> name key
+        self.totals = {}     # job_id -> {"cpu_seconds", "peak_rss_mb", "read_mb", "write_mb"}
+        self._owner = {}     # pid of a direct child -> job_id (or None)
+        self._previous = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Lifecycle ---
+    def start(self):
+        if not self.available or self._thread:
+            return
+        self._thread = threading.Thread(target=self._loop, name="resource-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                continue   # A failed pass must not end monitoring
+
+    # --- Jobs ---
+    def track_job(self, job_id, input_path):
+        with self._lock:
+            self.jobs[job_id] = job_key(input_path)
+            self.totals[job_id] = {"cpu_seconds": 0.0, "peak_rss_mb": 0.0, "read_mb": 0.0, "write_mb": 0.0}
+
+    def finish_job(self, job_id):
+        """Stop tracking a job; returns its totals"""
+        with self._lock:
+            self.jobs.pop(job_id, None)
+            for pid, owner in list(self._owner.items()):
+                if owner == job_id:
+                    del self._owner[pid]
+            return self.totals.pop(job_id, None)
+
+    # --- Readers (GUI thread) ---
+    def latest(self):
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    def history(self, seconds=None):
+        with self._lock:
+            samples = list(self.samples)
+        if seconds is not None and samples:
+            samples = [s for s in samples if s["time"] >= samples[-1]["time"] - seconds]
+        return samples
+
+    # --- Sampling (monitor thread) ---
+    def sample(self):
+        """Take one sample and append it to the ring buffer; returns it"""
+        now = time.monotonic()
+        system = self.sampler.system()
+        processes = self.sampler.processes(self.pid)
+        previous = self._previous
+        self._previous = (now, system, processes)
+        if previous is None:
+            return None   # Rates need two samples
+
+        then, last_system, last_processes = previous
+        elapsed = max(now - then, 1e-6)
+        total = system["cpu_total"] - last_system["cpu_total"]
+        busy = system["cpu_busy"] - last_system["cpu_busy"]
+        mem_total = system["mem_total_mb"] or 1
+
+        with self._lock:
+            owners = self._attribute(processes)
+            app = self._usage()
+            tools = self._usage()
+            jobs = {job_id: self._usage() for job_id in self.jobs}
+            for pid, info in processes.items():
+                last = last_processes.get(pid)
+                cpu = max(info["cpu"] - last["cpu"], 0) if last else 0.0
+                read = max(info["read"] - last["read"], 0) if last else 0
+                write = max(info["write"] - last["write"], 0) if last else 0
+                targets = [app] if pid == self.pid else [tools]
+                owner = owners.get(pid)
+                if owner in jobs:
+                    targets.append(jobs[owner])
+                    job_total = self.totals[owner]
+                    job_total["cpu_seconds"] += cpu
+                    job_total["read_mb"] += read / MB
+                    job_total["write_mb"] += write / MB
+                for usage in targets:
+                    usage["cpu_percent"] += 100 * cpu / elapsed
+                    usage["rss_mb"] += info["rss_mb"]
+                    usage["read_mb_s"] += read / MB / elapsed
+                    usage["write_mb_s"] += write / MB / elapsed
+                    usage["processes"] += 1
+            for job_id, usage in jobs.items():
+                job_total = self.totals[job_id]
+                job_total["peak_rss_mb"] = max(job_total["peak_rss_mb"], usage["rss_mb"])
+
+            sample = {
+                "time": now,
+                "cpu_percent": 100 * busy / total if total > 0 else 0.0,
+                "mem_percent": 100 * (1 - system["mem_available_mb"] / mem_total),
+                "app": app, "tools": tools, "jobs": jobs,
+            }
+            self.samples.append(sample)
+        return sample
+
+    @staticmethod
+    def _usage():
+        return {"cpu_percent": 0.0, "rss_mb": 0.0, "read_mb_s": 0.0, "write_mb_s": 0.0, "processes": 0}
+
+    def _attribute(self, processes):
+        """pid -> job_id for every descendant (the owner of a direct child is decided once)"""
+        owners = {}
+        for pid in list(self._owner):
+            if pid not in processes:
+                del self._owner[pid]   # Exited
+        for pid, info in processes.items():
+            if info["ppid"] == self.pid and (pid not in self._owner or self._owner[pid] is None):
+                matches = [job_id for job_id, key in self.jobs.items() if mentions(info["cmdline"], key)]
+                if len(matches) != 1 and len(self.jobs) == 1:
+                    matches = list(self.jobs)
+                self._owner[pid] = matches[0] if len(matches) == 1 else None
+
+        def owner(pid):
+            seen = set()
+            while pid in processes and pid not in seen:
+                seen.add(pid)
+                if pid in self._owner:
+                    return self._owner[pid]
+                pid = processes[pid]["ppid"]
+            return None
+
+        for pid in processes:
+            if pid != self.pid:
+                owners[pid] = owner(pid)
+        return owners
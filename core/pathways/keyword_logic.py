@@ -0,0 +1,154 @@
+from collections import deque
+
+# Optional: C implementation of the same automaton (pip install pyahocorasick)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+def load_vocabulary(tsv_path, vocabulary=None):
+    """
+    Merges a category<TAB>keyword file (e.g. a KEGG ortholog name dictionary)
+    into a {category: [keywords]} vocabulary.
+    """
+    vocabulary = {k: list(v) for k, v in (vocabulary or {}).items()}
+    with open(tsv_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            category, _, keyword = line.rstrip('\n').partition('\t')
+            if keyword:
+                vocabulary.setdefault(category, []).append(keyword)
+    return vocabulary
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a {category: [keywords]} vocabulary.
+    One pass over a line finds every keyword it contains (substring match,
+    case-insensitive), independent of how many keywords there are.
+    """
+
+    def __init__(self, vocabulary):
+        self.categories = list(vocabulary)
+        # keyword -> category indices (a keyword may belong to several categories)
+        owners = {}
+        for cat_idx, category in enumerate(self.categories):
+            for keyword in vocabulary[category]:
+                keyword = keyword.lower()
+                if keyword:
+                    owners.setdefault(keyword, set()).add(cat_idx)
+        self.keywords = list(owners)
+        self.keyword_categories = [tuple(sorted(owners[k])) for k in self.keywords]
+
+        if AHOCORASICK_AVAILABLE:
+            self.automaton = ahocorasick.Automaton()
+            for kw_id, keyword in enumerate(self.keywords):
+                self.automaton.add_word(keyword, kw_id)
+            self.automaton.make_automaton()
+        else:
+            self._build()
+
+    def _build(self):
+        """Trie + BFS failure links; outputs are merged along the failure chain."""
+        goto, fail, out = [{}], [0], [()]
+        for kw_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (kw_id,)
+
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self.goto, self.fail, self.out = goto, fail, out
+
+    def iter_keywords(self, text):
+        """Yields the id of every keyword occurrence in `text` (already lower-cased)."""
+        if AHOCORASICK_AVAILABLE:
+            for _, kw_id in self.automaton.iter(text):
+                yield kw_id
+            return
+
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                yield from out[state]
+
+    def match(self, line):
+        """
+        Returns {category: [keywords]} for every category with a keyword in `line`.
+        Keywords are listed once, in order of first occurrence.
+        """
+        found = {}
+        for kw_id in self.iter_keywords(line.lower()):
+            keyword = self.keywords[kw_id]
+            for cat_idx in self.keyword_categories[kw_id]:
+                hits = found.setdefault(self.categories[cat_idx], [])
+                if keyword not in hits:
+                    hits.append(keyword)
+        return found
+
+
+def scan_annotation(annot_file, matcher, hits_path, max_rows=5000, progress=None):
+    """
+    Streams an annotation table line by line (constant memory).
+    Every (line, category) match is written to `hits_path`; only the first
+    `max_rows` are kept in memory for display.
+    Returns (category counts, display rows, total matches).
+    """
+    counts = {category: 0 for category in matcher.categories}
+    rows = []
+    total = 0
+
+    with open(annot_file, 'r', encoding='utf-8', errors='ignore') as f, \
+            open(hits_path, 'w', encoding='utf-8') as out:
+        out.write("pathway\tkeywords\tgene_id\tannotation\n")
+        for lines_read, line in enumerate(f, 1):
+            line_clean = line.strip()
+            if not line_clean or line_clean.startswith("#"):
+                continue
+
+            found = matcher.match(line_clean)
+            if not found:
+                continue
+
+            parts = line_clean.split('\t')
+            gene_id = parts[0] if len(parts) > 1 else f"Line {lines_read}"
+            for category, keywords in found.items():
+                counts[category] += 1
+                total += 1
+                out.write(f"{category}\t{','.join(keywords)}\t{gene_id}\t{line_clean}\n")
+                if len(rows) < max_rows:
+                    rows.append({
+                        "Pathway": category,
+                        "Enzyme/Keyword": ", ".join(keywords).upper(),
+                        "Gene ID / Location": gene_id,
+                        "Full Annotation": line_clean[:100] + "..."
+                    })
+
+            if progress and lines_read % 100000 == 0:
+                progress(lines_read)
+
+    return counts, rows, total
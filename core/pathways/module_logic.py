@@ -0,0 +1,279 @@
+import os
+import re
+import numpy as np
+
+KO_PATTERN = re.compile(r"\bK\d{5}\b")
+TOKEN_PATTERN = re.compile(r"--|[KM]\d{5}|[()+\-, ]")
+
+# A step whose alternatives expand to more clauses than this is kept truncated
+MAX_STEP_CLAUSES = 4096
+
+
+def parse_definition(definition):
+    """
+    Parses a KEGG module DEFINITION into its steps.
+    Returns a list of steps; each step is a list of clauses (frozensets of KOs)
+    in disjunctive normal form: the step is satisfied when every KO of any one
+    clause is present.
+
+    Grammar: at the top level a space separates steps. Inside parentheses,
+    loosest to tightest: ',' = OR, space = AND, '+' = complex subunit (AND);
+    '-' = optional subunit (ignored). So "((K00134,K00150) K00927,K11389)"
+    is (K00134 or K00150) and K00927, or K11389.
+    '--' marks a step without a known KO; such steps are dropped.
+    Module references (Mxxxxx) cannot be satisfied by a KO set.
+
+    >>> steps = parse_definition("K01803 ((K00134,K00150) K00927,K11389)")
+    >>> sorted(sorted(c) for c in steps[1])
+    [['K00134', 'K00927'], ['K00150', 'K00927'], ['K11389']]
+    """
+    tokens = TOKEN_PATTERN.findall(" ".join(definition.split()))
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def skip_spaces():
+        nonlocal pos
+        while peek() == " ":
+            pos += 1
+
+    def and_all(clause_lists):
+        result = [frozenset()]
+        for clauses in clause_lists:
+            result = list({a | b for a in result for b in clauses})[:MAX_STEP_CLAUSES]
+        return result
+
+    def parse_or(parse_term):
+        """Comma-separated alternatives of parse_term; returns the merged DNF."""
+        nonlocal pos
+        clauses = list(parse_term())
+        while peek() == ",":
+            pos += 1
+            clauses.extend(parse_term())
+        return [c for c in dict.fromkeys(clauses) if c is not None]
+
+    def parse_group_and():
+        """Space-separated complexes inside parentheses, all required."""
+        skip_spaces()
+        parts = [parse_complex()]
+        skip_spaces()
+        while peek() not in (None, ",", ")"):
+            parts.append(parse_complex())
+            skip_spaces()
+        parts = [p for p in parts if p != [None]]
+        if not parts:
+            return [None]
+        return and_all(parts)
+
+    def parse_complex():
+        nonlocal pos
+        if peek() == "-":
+            # Optional component on its own: nothing to require
+            pos += 1
+            parse_atom()
+            return [None]
+        parts = [parse_atom()]
+        while peek() in ("+", "-"):
+            optional = tokens[pos] == "-"
+            pos += 1
+            atom = parse_atom()
+            if not optional:
+                parts.append(atom)
+        if any(not p for p in parts):
+            return [None]
+        return and_all(parts)
+
+    def parse_atom():
+        nonlocal pos
+        token = peek()
+        pos += 1
+        if token == "(":
+            clauses = parse_or(parse_group_and)
+            skip_spaces()
+            pos += 1   # closing ')'
+            return clauses or None
+        if token in ("--", None):
+            return None
+        return [frozenset([token])]
+
+    steps = []
+    while peek() is not None:
+        if peek() in (" ", ")"):
+            pos += 1   # step separator / stray ')'
+            continue
+        clauses = parse_or(parse_complex)
+        if clauses:
+            steps.append(clauses)
+    return steps
+
+
+def read_definitions(tsv_path):
+    """module_id<TAB>name<TAB>definition file -> {module_id: (name, definition)}."""
+    modules = {}
+    with open(tsv_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) >= 3:
+                modules[cols[0]] = (cols[1], cols[2])
+    return modules
+
+
+def read_ko_set(tsv_path):
+    """Every KO identifier (Kxxxxx) found in a DIAMOND/KEGG hit table."""
+    kos = set()
+    with open(tsv_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            kos.update(KO_PATTERN.findall(line))
+    return kos
+
+
+class ModuleIndex:
+    """
+    KEGG module definitions compiled into flat arrays:
+
+      clause_size[c]   number of KOs a clause needs
+      ko_ptr/ko_clause inverted index, KO i -> clauses ko_clause[ko_ptr[i]:ko_ptr[i+1]]
+      step_start[s]    first clause of step s (clauses are grouped by step)
+      module_start[m]  first step of module m (steps are grouped by module)
+
+    Evaluating a genome only touches the clauses of the KOs it has: one
+    bincount counts the present KOs per clause, a clause is satisfied when the
+    count reaches its size, and reduceat folds clauses into steps and steps
+    into modules for a whole batch of genomes at once.
+    """
+
+    ARRAYS = ("clause_size", "ko_ptr", "ko_clause", "step_start", "module_start")
+    VERSION = 2   # Bump when parsing changes, to invalidate cached indexes
+
+    def __init__(self, modules=None):
+        self.module_ids, self.module_names, self.kos = [], [], []
+        if modules:
+            self.compile(modules)
+
+    def compile(self, modules):
+        ko_of = {}
+        clause_kos, step_start, module_start = [], [], []
+        for module_id, (name, definition) in modules.items():
+            steps = parse_definition(definition)
+            if not steps:
+                continue
+            self.module_ids.append(module_id)
+            self.module_names.append(name)
+            module_start.append(len(step_start))
+            for clauses in steps:
+                step_start.append(len(clause_kos))
+                for clause in clauses:
+                    clause_kos.append([ko_of.setdefault(ko, len(ko_of)) for ko in sorted(clause)])
+
+        self.kos = list(ko_of)
+        self.clause_size = np.array([len(c) for c in clause_kos], dtype=np.int32)
+        self.step_start = np.array(step_start, dtype=np.int64)
+        self.module_start = np.array(module_start, dtype=np.int64)
+
+        # Inverted index (CSR): KO -> clauses containing it
+        pairs = np.array([(ko, c) for c, kos in enumerate(clause_kos) for ko in kos],
+                         dtype=np.int64).reshape(-1, 2)
+        pairs = pairs[np.argsort(pairs[:, 0], kind='stable')]
+        self.ko_clause = pairs[:, 1].copy()
+        self.ko_ptr = np.zeros(len(self.kos) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=len(self.kos)), out=self.ko_ptr[1:])
+        self.ko_id = {ko: i for i, ko in enumerate(self.kos)}
+        return self
+
+    # =========================================================================
+    # PRECOMPUTED INDEX
+    # =========================================================================
+
+    @classmethod
+    def load(cls, definitions_path, cache_path=None):
+        """
+        Compiled index for a definitions file. The arrays are cached next to
+        it (or at `cache_path`) and rebuilt only when the file changes.
+        """
+        cache_path = cache_path or os.path.splitext(definitions_path)[0] + "_index.npz"
+        stat = os.stat(definitions_path)
+        stamp = f"{cls.VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                if str(data["stamp"]) == stamp:
+                    index = cls()
+                    for name in cls.ARRAYS:
+                        setattr(index, name, data[name])
+                    index.module_ids = data["module_ids"].tolist()
+                    index.module_names = data["module_names"].tolist()
+                    index.kos = data["kos"].tolist()
+                    index.ko_id = {ko: i for i, ko in enumerate(index.kos)}
+                    return index
+
+        index = cls(read_definitions(definitions_path))
+        np.savez(cache_path, stamp=np.array(stamp),
+                 module_ids=np.array(index.module_ids, dtype=str),
+                 module_names=np.array(index.module_names, dtype=str),
+                 kos=np.array(index.kos, dtype=str),
+                 **{name: getattr(index, name) for name in cls.ARRAYS})
+        return index
+
+    # =========================================================================
+    # EVALUATION
+    # =========================================================================
+
+    def evaluate(self, ko_sets):
+        """
+        ko_sets: list with one iterable of KO ids per genome.
+        Returns (completeness, steps_found): (genomes x modules) arrays with the
+        fraction and the number of module steps satisfied.
+
+        Glycolysis (M00001) with only the K11389 bypass for steps 6-7 is complete:
+
+        >>> m00001 = ("(K00844,K12407,K00845,K25026,K00886,K08074,K00918) "
+        ...           "(K01810,K06859,K13810,K15916) (K00850,K16370,K21071,K00918) "
+        ...           "(K01623,K01624,K11645,K16305,K16306) K01803 "
+        ...           "((K00134,K00150) K00927,K11389) "
+        ...           "(K01834,K15633,K15634,K15635) K01689 (K00873,K12406)")
+        >>> index = ModuleIndex({"M00001": ("Glycolysis", m00001)})
+        >>> kos = ["K00844", "K01810", "K00850", "K01623", "K01803",
+        ...        "K11389", "K01834", "K01689", "K00873"]
+        >>> completeness, steps_found = index.evaluate([kos])
+        >>> float(completeness[0, 0]), int(steps_found[0, 0])
+        (1.0, 9)
+        """
+        n_clauses = len(self.clause_size)
+        hits = []
+        for g, kos in enumerate(ko_sets):
+            ids = np.array([self.ko_id[k] for k in set(kos) if k in self.ko_id], dtype=np.int64)
+            if ids.size:
+                # Gather the CSR rows of all present KOs in one go
+                starts, counts = self.ko_ptr[ids], self.ko_ptr[ids + 1] - self.ko_ptr[ids]
+                offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+                positions = offsets + np.arange(counts.sum())
+                hits.append(self.ko_clause[positions] + g * n_clauses)
+
+        n_genomes = len(ko_sets)
+        if not self.module_ids:
+            empty = np.zeros((n_genomes, 0))
+            return empty, empty.astype(np.int32)
+        flat = np.concatenate(hits) if hits else np.zeros(0, dtype=np.int64)
+        present = np.bincount(flat, minlength=n_genomes * n_clauses).reshape(n_genomes, n_clauses)
+        satisfied = (present == self.clause_size).astype(np.int8)
+
+        step_ok = np.maximum.reduceat(satisfied, self.step_start, axis=1)
+        steps_found = np.add.reduceat(step_ok.astype(np.int32), self.module_start, axis=1)
+        return steps_found / self.n_steps(), steps_found
+
+    def n_steps(self):
+        """Number of evaluable steps per module."""
+        return np.diff(np.append(self.module_start, len(self.step_start)))
+
+    def write_table(self, out_tsv, genome_names, completeness):
+        """Genome x module completeness table (percent)."""
+        with open(out_tsv, 'w', encoding='utf-8') as f:
+            f.write("module\tname\tsteps\t" + "\t".join(genome_names) + "\n")
+            n_steps = self.n_steps()
+            for m, (module_id, name) in enumerate(zip(self.module_ids, self.module_names)):
+                values = "\t".join(f"{100 * v:.1f}" for v in completeness[:, m])
+                f.write(f"{module_id}\t{name}\t{n_steps[m]}\t{values}\n")
+        return out_tsv
@@ -1,16 +1,42 @@
 import os
-import csv
-from collections import Counter
-import matplotlib
-# CRITICAL: Agg backend to prevent GUI freezing
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 from PySide6.QtCore import QThread, Signal
+from utils.plotting import pyplot
+from utils import profiling
+from core.pathways.keyword_logic import KeywordMatcher, load_vocabulary, scan_annotation
+from core.pathways.profile_logic import PathwayMatrix
+from core.pathways.pathway_logic import PathwayManager
+
+# Rows sent to the UI table; the full hit list is written to pathway_hits.tsv
+MAX_TABLE_ROWS = 5000
+
+# KEYWORD DICTIONARY
+PATHWAY_KEYWORDS = {
+    "Glycolysis": ["pfk", "pyk", "gap", "eno", "pgk", "fba", "tpi", "glucose", "pyruvate", "kinase"],
+    "TCA Cycle": ["citrate", "isocitrate", "succinyl", "fumarate", "malate", "oxaloacetate", "dehydrogenase"],
+    "Respiration": ["atp synthase", "nadh", "cytochrome", "quinone", "oxidative", "reductase"],
+    "Fatty Acid": ["acyl-coa", "acetyl-coa", "fatty acid", "lipid", "beta-oxidation", "lipase"],
+    "Amino Acid": ["tryptophan", "histidine", "arginine", "leucine", "glutamine", "synthase", "aminotransferase"],
+    "DNA Repair": ["polymerase", "helicase", "ligase", "gyrase", "recombinase", "topoisomerase", "nuclease"],
+    "Translation": ["ribosom", "trna", "elongation factor", "initiation factor", "synthetase"],
+    "Cell Wall": ["peptidoglycan", "penicillin", "murein", "membrane", "multidrug", "lactamase"],
+    "Transporters": ["transporter", "permease", "efflux", "pump", "channel", "porter"]
+}
+
+
+def load_pathway_vocabulary(base_path):
+    """Built-in keywords plus the optional databases/pathways/pathway_keywords.tsv (category<TAB>keyword)."""
+    vocab_file = os.path.join(base_path, "databases", "pathways", "pathway_keywords.tsv")
+    if os.path.exists(vocab_file):
+        return load_vocabulary(vocab_file, PATHWAY_KEYWORDS)
+    return {k: list(v) for k, v in PATHWAY_KEYWORDS.items()}
+
 
 class PathwayWorker(QThread):
     log_signal = Signal(str)
     # Returns: Success (bool), Image Path (str), Table Data (list of dicts)
     finished_signal = Signal(bool, str, list)
+    # KEGG module completeness (see PathwayManager.module_completeness), for save_pathway_results
+    completeness_signal = Signal(dict)
 
     def __init__(self, annotation_file):
         super().__init__()
@@ -19,19 +45,9 @@ class PathwayWorker(QThread):
         self.output_dir = os.path.join(self.base_path, "results", "pathways")
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # KEYWORD DICTIONARY
-        self.pathway_db = {
-            "Glycolysis": ["pfk", "pyk", "gap", "eno", "pgk", "fba", "tpi", "glucose", "pyruvate", "kinase"],
-            "TCA Cycle": ["citrate", "isocitrate", "succinyl", "fumarate", "malate", "oxaloacetate", "dehydrogenase"],
-            "Respiration": ["atp synthase", "nadh", "cytochrome", "quinone", "oxidative", "reductase"],
-            "Fatty Acid": ["acyl-coa", "acetyl-coa", "fatty acid", "lipid", "beta-oxidation", "lipase"],
-            "Amino Acid": ["tryptophan", "histidine", "arginine", "leucine", "glutamine", "synthase", "aminotransferase"],
-            "DNA Repair": ["polymerase", "helicase", "ligase", "gyrase", "recombinase", "topoisomerase", "nuclease"],
-            "Translation": ["ribosom", "trna", "elongation factor", "initiation factor", "synthetase"],
-            "Cell Wall": ["peptidoglycan", "penicillin", "murein", "membrane", "multidrug", "lactamase"],
-            "Transporters": ["transporter", "permease", "efflux", "pump", "channel", "porter"]
-        }
+        self.pathway_db = load_pathway_vocabulary(self.base_path)
 
+    @profiling.timed("pathway.run", capture=True)
     def run(self):
         self.log_signal.emit("🚀 Initializing Data Mining...")
         
@@ -41,46 +57,28 @@ class PathwayWorker(QThread):
                 return
 
             self.log_signal.emit(f"📖 Mining file: {os.path.basename(self.annot_file)}")
-            
-            pathway_counts = {k: 0 for k in self.pathway_db.keys()}
-            detailed_hits = [] 
-            
-            lines_read = 0
-            
-            with open(self.annot_file, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    lines_read += 1
-                    line_clean = line.strip()
-                    if not line_clean or line_clean.startswith("#"): continue
-                    
-                    line_lower = line_clean.lower()
-                    matched_cat = None
-                    matched_key = None
-
-                    # Search keywords
-                    for category, keywords in self.pathway_db.items():
-                        for k in keywords:
-                            if k in line_lower:
-                                matched_cat = category
-                                matched_key = k
-                                break
-                        if matched_cat: break
-                    
-                    if matched_cat:
-                        pathway_counts[matched_cat] += 1
-                        
-                        parts = line_clean.split('\t')
-                        gene_id = parts[0] if len(parts) > 1 else f"Line {lines_read}"
-                        
-                        detailed_hits.append({
-                            "Pathway": matched_cat,
-                            "Enzyme/Keyword": matched_key.upper(),
-                            "Gene ID / Location": gene_id,
-                            "Full Annotation": line_clean[:100] + "..."
-                        })
 
-            total_matches = len(detailed_hits)
+            # One Aho-Corasick pass per line finds every category (not just the first)
+            matcher = KeywordMatcher(self.pathway_db)
+            self.log_signal.emit(f"🔤 {len(matcher.keywords):,} keywords in {len(matcher.categories)} categories")
+            hits_path = os.path.join(self.output_dir, "pathway_hits.tsv")
+            pathway_counts, detailed_hits, total_matches = scan_annotation(
+                self.annot_file, matcher, hits_path, max_rows=MAX_TABLE_ROWS,
+                progress=lambda n: self.log_signal.emit(f"  ... {n:,} lines scanned")
+            )
+
             self.log_signal.emit(f"✅ Extracted {total_matches} records.")
+            if total_matches > len(detailed_hits):
+                self.log_signal.emit(f"📄 Showing first {len(detailed_hits):,}; all hits saved to {os.path.basename(hits_path)}")
+
+            # KEGG modules, when databases/pathways/module_definitions.tsv is installed
+            manager = PathwayManager(self.base_path)
+            if os.path.exists(manager.modules_path):
+                completeness = manager.module_completeness([self.annot_file])[0]
+                completeness["map_path"] = os.path.join(manager.output_dir, "module_completeness.tsv")
+                self.log_signal.emit(f"🧩 KEGG modules: {completeness['complete']} complete, "
+                                     f"{completeness['mapped']} with hits")
+                self.completeness_signal.emit(completeness)
 
             if total_matches == 0:
                 self.finished_signal.emit(False, "0 Matches Found.", [])
@@ -90,6 +88,7 @@ class PathwayWorker(QThread):
             self.log_signal.emit("🎨 Rendering Chart...")
             output_img = os.path.join(self.output_dir, "metabolic_profile.png")
             
+            plt = pyplot()
             plt.style.use('bmh') # Use built-in style, no seaborn needed
             fig, ax = plt.subplots(figsize=(10, 6))
             
@@ -115,4 +114,68 @@ class PathwayWorker(QThread):
 
         except Exception as e:
             self.log_signal.emit(f"❌ Error: {str(e)}")
-            self.finished_signal.emit(False, str(e), [])
\ No newline at end of file
+            self.finished_signal.emit(False, str(e), [])
+
+
+class PathwayBatchWorker(QThread):
+    """
+    Profiles many annotation files into one genome x pathway matrix
+    (results/pathways/pathway_matrix.npz). Files already counted and unchanged
+    are skipped, so adding a genome only costs scanning that genome.
+    """
+    log_signal = Signal(str)
+    # Same contract as PathwayWorker: Success, Heatmap Path, Table Data
+    finished_signal = Signal(bool, str, list)
+
+    def __init__(self, annotation_files, workers=None):
+        super().__init__()
+        self.annot_files = list(annotation_files)
+        self.workers = workers
+        self.base_path = os.getcwd()
+        self.output_dir = os.path.join(self.base_path, "results", "pathways")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.pathway_db = load_pathway_vocabulary(self.base_path)
+
+    @profiling.timed("pathway.batch", capture=True)
+    def run(self):
+        self.log_signal.emit(f"🚀 Batch profiling {len(self.annot_files)} annotation files...")
+
+        try:
+            # 1. VALIDATION
+            files = [f for f in self.annot_files if os.path.exists(f)]
+            if not files:
+                self.finished_signal.emit(False, "No annotation files found.", [])
+                return
+
+            # 2. INCREMENTAL COUNTING
+            matrix = PathwayMatrix(os.path.join(self.output_dir, "pathway_matrix.npz"),
+                                   self.pathway_db, self.workers)
+            pending = len(matrix.pending(files))
+            self.log_signal.emit(f"♻️ {len(files) - pending} genomes cached, {pending} to scan")
+            matrix.update(files, os.path.join(self.output_dir, "hits"), log=self.log_signal.emit)
+
+            # 3. MATRIX + HEATMAP
+            rows = matrix.subset(files)
+            table_path = matrix.write_table(os.path.join(self.output_dir, "pathway_matrix.tsv"), rows)
+            self.log_signal.emit(f"📄 Matrix saved: {os.path.basename(table_path)} "
+                                 f"({len(rows)} genomes x {len(matrix.categories)} pathways)")
+
+            self.log_signal.emit("🎨 Rendering clustered heatmap...")
+            output_img = matrix.render_heatmap(os.path.join(self.output_dir, "pathway_heatmap.png"), rows)
+
+            table = []
+            for r in rows:
+                for c, category in enumerate(matrix.categories):
+                    if matrix.counts[r, c] and len(table) < MAX_TABLE_ROWS:
+                        table.append({
+                            "Pathway": category,
+                            "Enzyme/Keyword": f"{matrix.counts[r, c]} GENES",
+                            "Gene ID / Location": matrix.genomes[r],
+                            "Full Annotation": os.path.basename(matrix.files[r])
+                        })
+
+            self.finished_signal.emit(True, output_img, table)
+
+        except Exception as e:
+            self.log_signal.emit(f"❌ Error: {str(e)}")
+            self.finished_signal.emit(False, str(e), [])
@@ -1,12 +1,16 @@
 import os
 import subprocess
 from utils.tool_wrappers import get_bin_path
+from core.pathways.module_logic import ModuleIndex, read_ko_set
 
 class PathwayManager:
     def __init__(self, project_dir):
         self.project_dir = project_dir
         # Path to local KEGG database (Page 6 of blueprint)
         self.db_path = os.path.join(project_dir, "databases", "pathways", "kegg_db.dmnd")
+        # KEGG modules: module_id<TAB>name<TAB>DEFINITION
+        self.modules_path = os.path.join(project_dir, "databases", "pathways", "module_definitions.tsv")
+        self.module_index = None
         self.output_dir = os.path.join(project_dir, "pathway_results")
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -34,11 +38,14 @@ class PathwayManager:
         try:
             subprocess.run(command, check=True, capture_output=True)
             pathway_data = self.process_pathway_completeness(output_file)
-            return {
+            result = {
                 "success": True,
                 "data": pathway_data,
                 "message": "Metabolic pathway mapping complete."
             }
+            if os.path.exists(self.modules_path):
+                result["completeness"] = self.module_completeness([output_file])[0]
+            return result
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -59,4 +66,33 @@ class PathwayManager:
                     description = cols[4]
                     pathways[ko_id] = description
         
-        return pathways
\ No newline at end of file
+        return pathways
+
+    def load_modules(self):
+        """Compiled module index (cached on disk, rebuilt when the definitions change)."""
+        if self.module_index is None:
+            self.module_index = ModuleIndex.load(self.modules_path)
+        return self.module_index
+
+    def module_completeness(self, hit_tables, names=None, threshold=1.0):
+        """
+        KEGG module completeness for a batch of KO hit tables (one per genome),
+        evaluated together. Writes module_completeness.tsv and returns one dict
+        per genome: {"modules": {module_id: completeness}, "complete": n, "mapped": n}.
+        A module counts as complete when its completeness reaches `threshold`.
+        """
+        index = self.load_modules()
+        names = names or [os.path.splitext(os.path.basename(p))[0] for p in hit_tables]
+        completeness, steps_found = index.evaluate([read_ko_set(p) for p in hit_tables])
+        index.write_table(os.path.join(self.output_dir, "module_completeness.tsv"), names, completeness)
+
+        results = []
+        for g in range(len(hit_tables)):
+            found = steps_found[g] > 0
+            results.append({
+                "modules": {index.module_ids[m]: round(float(completeness[g, m]), 4)
+                            for m in found.nonzero()[0]},
+                "complete": int((completeness[g] >= threshold).sum()),
+                "mapped": int(found.sum())
+            })
+        return results
@@ -0,0 +1,185 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from utils.plotting import pyplot
+from core.pathways.keyword_logic import KeywordMatcher, scan_annotation
+from core.phylogenetics.nj_logic import neighbor_joining
+
+# Per-process matcher, built once by the pool initializer
+_STATE = {}
+
+
+def _init_worker(vocabulary):
+    _STATE["matcher"] = KeywordMatcher(vocabulary)
+
+
+def _profile_genome(annot_file, hits_path):
+    """Category counts of one annotation file (runs in a worker process)."""
+    matcher = _STATE["matcher"]
+    counts, _, total = scan_annotation(annot_file, matcher, hits_path, max_rows=0)
+    return [counts[c] for c in matcher.categories], total
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def genome_stem(annot_file):
+    """Genome an annotation file belongs to (<genome>_annotation.tsv -> <genome>)."""
+    stem = os.path.splitext(os.path.basename(annot_file))[0]
+    return stem[:-len("_annotation")] if stem.endswith("_annotation") else stem
+
+
+def vocabulary_key(vocabulary):
+    """Changes whenever a category or keyword changes (invalidates stored counts)."""
+    text = "\n".join(f"{c}\t{','.join(sorted(k.lower() for k in kws))}" for c, kws in vocabulary.items())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def cluster_order(profiles):
+    """
+    Row order that places similar profiles next to each other: NJ tree on
+    cosine distances, tips read in depth-first order.
+    """
+    n = profiles.shape[0]
+    if n < 3:
+        return np.arange(n)
+    norm = np.linalg.norm(profiles, axis=1, keepdims=True)
+    unit = np.divide(profiles, norm, out=np.zeros_like(profiles, dtype=np.float64), where=norm > 0)
+    dist = np.clip(1.0 - unit @ unit.T, 0.0, 2.0)
+    np.fill_diagonal(dist, 0.0)
+    tree = neighbor_joining(dist, [str(i) for i in range(n)]).canonical()
+    return np.array([int(name) for name in tree.names])
+
+
+class PathwayMatrix:
+    """
+    Genome x pathway hit counts, stored in one .npz next to the results.
+    Each genome row remembers the size/mtime of its annotation file, so an
+    update only scans new or modified files.
+    """
+
+    def __init__(self, matrix_path, vocabulary, workers=None):
+        self.matrix_path = matrix_path
+        self.vocabulary = vocabulary
+        self.categories = list(vocabulary)
+        self.vocab_key = vocabulary_key(vocabulary)
+        self.workers = workers or os.cpu_count() or 1
+        self.genomes, self.files, self.stamps = [], [], []
+        self.counts = np.zeros((0, len(self.categories)), dtype=np.int64)
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.matrix_path):
+            return
+        with np.load(self.matrix_path) as data:
+            # Counts from another vocabulary are not comparable: start over
+            if str(data["vocab_key"]) != self.vocab_key:
+                return
+            self.files = data["files"].tolist()
+            self.genomes = [genome_stem(f) for f in self.files]
+            self.stamps = data["stamps"].tolist()
+            self.counts = data["counts"].astype(np.int64)
+
+    def save(self):
+        np.savez(self.matrix_path, vocab_key=np.array(self.vocab_key),
+                 genomes=np.array(self.genomes, dtype=str), files=np.array(self.files, dtype=str),
+                 stamps=np.array(self.stamps, dtype=str), categories=np.array(self.categories, dtype=str),
+                 counts=self.counts)
+        return self.matrix_path
+
+    def pending(self, annot_files):
+        """Files that are not in the matrix yet or changed since they were counted."""
+        known = dict(zip(self.files, self.stamps))
+        return [f for f in annot_files if known.get(os.path.abspath(f)) != file_stamp(f)]
+
+    def update(self, annot_files, hits_dir, log=None):
+        """
+        Counts the pending files on a process pool and writes each row into
+        the matrix as it arrives. Returns the number of files scanned.
+        """
+        log = log or (lambda msg: None)
+        todo = self.pending(annot_files)
+        if not todo:
+            return 0
+        os.makedirs(hits_dir, exist_ok=True)
+
+        row_of = {f: i for i, f in enumerate(self.files)}
+        new_rows = []
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(todo)), initializer=_init_worker,
+                                 initargs=(self.vocabulary,)) as pool:
+            futures = {}
+            for path in todo:
+                name = genome_stem(path)
+                hits_path = os.path.join(hits_dir, f"{name}_pathway_hits.tsv")
+                futures[pool.submit(_profile_genome, path, hits_path)] = (path, name)
+
+            for done, future in enumerate(as_completed(futures), 1):
+                path, name = futures[future]
+                row, total = future.result()
+                key = os.path.abspath(path)
+                if key in row_of:
+                    self.counts[row_of[key]] = row
+                    self.stamps[row_of[key]] = file_stamp(path)
+                else:
+                    row_of[key] = len(self.files)
+                    self.genomes.append(name)
+                    self.files.append(key)
+                    self.stamps.append(file_stamp(path))
+                    new_rows.append(row)
+                log(f"  🧬 [{done}/{len(todo)}] {name}: {total:,} hits")
+
+        if new_rows:
+            self.counts = np.vstack([self.counts, np.array(new_rows, dtype=np.int64)])
+        self.save()
+        return len(todo)
+
+    def subset(self, annot_files):
+        """Row indices of the given files (matrix order)."""
+        row_of = {f: i for i, f in enumerate(self.files)}
+        return np.array([row_of[os.path.abspath(f)] for f in annot_files if os.path.abspath(f) in row_of],
+                        dtype=np.int64)
+
+    def write_table(self, out_tsv, rows=None):
+        rows = np.arange(len(self.genomes)) if rows is None else rows
+        with open(out_tsv, 'w', encoding='utf-8') as f:
+            f.write("genome\t" + "\t".join(self.categories) + "\n")
+            for r in rows:
+                f.write(self.genomes[r] + "\t" + "\t".join(str(v) for v in self.counts[r]) + "\n")
+        return out_tsv
+
+    def render_heatmap(self, out_png, rows=None, title="Metabolic Profiles"):
+        """
+        Clustered heatmap: genomes and pathways are both reordered by
+        cluster_order, values are log-scaled counts. One imshow call, so the
+        cost hardly depends on the number of genomes.
+        """
+        rows = np.arange(len(self.genomes)) if rows is None else rows
+        data = self.counts[rows].astype(np.float64)
+        row_order = rows[cluster_order(data)]
+        col_order = cluster_order(data.T)
+        values = np.log1p(self.counts[np.ix_(row_order, col_order)])
+
+        n_rows, n_cols = values.shape
+        height = float(np.clip(n_rows * 0.22 + 2, 4, 40))
+        plt = pyplot()
+        fig, ax = plt.subplots(figsize=(max(6, n_cols * 0.6 + 3), height))
+        image = ax.imshow(values, aspect='auto', cmap='YlGnBu', interpolation='nearest')
+        fig.colorbar(image, ax=ax, label='log(1 + gene count)', shrink=0.6)
+
+        ax.set_xticks(np.arange(n_cols))
+        ax.set_xticklabels([self.categories[c] for c in col_order], rotation=45, ha='right')
+        if n_rows <= 150:
+            ax.set_yticks(np.arange(n_rows))
+            ax.set_yticklabels([self.genomes[r] for r in row_order], fontsize=max(4, min(10, 600 / n_rows)))
+        else:
+            ax.set_yticks([])
+            ax.set_ylabel(f"{n_rows} genomes (clustered)")
+        ax.set_title(title, fontweight='bold')
+
+        fig.tight_layout()
+        fig.savefig(out_png, dpi=120)
+        plt.close(fig)
+        return out_png
@@ -0,0 +1,122 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from core.phylogenetics.nj_logic import pairwise_distances, neighbor_joining
+
+# Per-process alignment state, set once by the pool initializer so every
+# replicate does not have to pickle the whole alignment
+_STATE = {}
+
+
+def compress_patterns(matrix):
+    """
+    Collapses identical alignment columns.
+    Returns (patterns, column_to_pattern, counts): a resampled column index
+    array maps to pattern weights with a single bincount.
+    """
+    patterns, inverse, counts = np.unique(matrix.T, axis=0, return_inverse=True, return_counts=True)
+    return np.ascontiguousarray(patterns.T), inverse.ravel(), counts
+
+
+def split_keys(tree, taxon_bits):
+    """
+    Bipartitions of an unrooted tree as packed bitsets (bytes keys).
+    taxon_bits[tip] = bit position of that tip's taxon. Each split is stored
+    on the side that excludes taxon 0, so both orientations give the same key.
+    Returns {node: key} for every non-trivial split.
+    """
+    n_taxa = len(taxon_bits)
+    n_words = (n_taxa + 63) // 64
+    bits = np.zeros((tree.n_nodes, n_words), dtype=np.uint64)
+    tips = np.arange(tree.n_tips)
+    bits[tips, taxon_bits // 64] = np.uint64(1) << (taxon_bits % 64).astype(np.uint64)
+    sizes = np.zeros(tree.n_nodes, dtype=np.int64)
+    sizes[:tree.n_tips] = 1
+    for node in range(tree.n_nodes - 1):
+        par = tree.parent[node]
+        bits[par] |= bits[node]
+        sizes[par] += sizes[node]
+
+    full = np.zeros(n_words, dtype=np.uint64)
+    full[:] = np.uint64(0xFFFFFFFFFFFFFFFF)
+    if n_taxa % 64:
+        full[-1] = np.uint64((1 << (n_taxa % 64)) - 1)
+
+    keys = {}
+    for node in range(tree.n_tips, tree.n_nodes - 1):
+        if 2 <= sizes[node] <= n_taxa - 2:
+            side = bits[node]
+            if side[0] & np.uint64(1):
+                side = full & ~side
+            keys[node] = side.tobytes()
+    return keys
+
+
+def _init_worker(patterns, inverse, n_states, model):
+    _STATE.update(patterns=patterns, inverse=inverse, n_states=n_states, model=model)
+
+
+def _run_replicates(seed_seq, count):
+    """Builds `count` bootstrap NJ trees; returns a Counter of their split keys."""
+    rng = np.random.default_rng(seed_seq)
+    patterns, inverse = _STATE["patterns"], _STATE["inverse"]
+    n_taxa, n_columns = patterns.shape[0], inverse.size
+    names = [str(i) for i in range(n_taxa)]
+    taxon_bits = np.arange(n_taxa)
+
+    splits = Counter()
+    for _ in range(count):
+        # Resample columns with an index array, then fold them into pattern weights
+        columns = rng.integers(0, n_columns, n_columns)
+        weights = np.bincount(inverse[columns], minlength=patterns.shape[1])
+        used = np.flatnonzero(weights)
+        dist = pairwise_distances(patterns[:, used], n_states=_STATE["n_states"],
+                                  model=_STATE["model"], weights=weights[used])
+        splits.update(split_keys(neighbor_joining(dist, names), taxon_bits).values())
+    return splits
+
+
+class BootstrapAnalysis:
+    """
+    Felsenstein bootstrap for distance trees: alignment columns are resampled
+    with replacement, an NJ tree is built per replicate on a process pool, and
+    each branch of the reference tree gets the percentage of replicates that
+    contain the same bipartition.
+    """
+
+    def __init__(self, replicates=100, workers=None, seed=0):
+        self.replicates = replicates
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+
+    def run(self, matrix, names, tree, n_states=4, model="jc", log=None):
+        """
+        matrix: encoded alignment (taxa x columns) in `names` order.
+        Writes the support values (0-100) into tree.labels and returns the tree.
+        """
+        log = log or (lambda msg: None)
+        patterns, inverse, _ = compress_patterns(matrix)
+        log(f"🧮 {matrix.shape[1]:,} columns -> {patterns.shape[1]:,} unique site patterns")
+
+        # Spread the replicates over a few chunks per worker to balance the load
+        n_chunks = min(self.replicates, self.workers * 4)
+        sizes = [len(c) for c in np.array_split(np.arange(self.replicates), n_chunks)]
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+
+        splits = Counter()
+        done = 0
+        with ProcessPoolExecutor(max_workers=min(self.workers, n_chunks), initializer=_init_worker,
+                                 initargs=(patterns, inverse, n_states, model)) as pool:
+            futures = {pool.submit(_run_replicates, s, c): c for s, c in zip(seeds, sizes)}
+            for future in as_completed(futures):
+                splits.update(future.result())
+                done += futures[future]
+                log(f"  🔁 {done}/{self.replicates} replicates")
+
+        # Reference splits use the same taxon -> bit mapping as the replicates
+        index = {name: i for i, name in enumerate(names)}
+        taxon_bits = np.array([index[name] for name in tree.names])
+        for node, key in split_keys(tree, taxon_bits).items():
+            tree.labels[node] = int(round(100 * splits[key] / self.replicates))
+        return tree
@@ -0,0 +1,351 @@
+import numpy as np
+from utils.parsers import iter_fasta
+
+DNA_ALPHABET = "ACGT"
+PROTEIN_ALPHABET = "ACDEFGHIKLMNPQRSTVWY"
+
+# Distances of saturated pairs (p >= 1 - 1/k) are capped at this value
+MAX_DISTANCE = 5.0
+
+
+def build_lookup(alphabet):
+    """256-entry table mapping ASCII bytes to state codes (len(alphabet) = gap/unknown)."""
+    table = np.full(256, len(alphabet), dtype=np.uint8)
+    for code, char in enumerate(alphabet):
+        table[ord(char)] = code
+        table[ord(char.lower())] = code
+    if alphabet == DNA_ALPHABET:
+        table[ord('U')] = table[ord('u')] = alphabet.index('T')
+    return table
+
+
+def encode_alignment(alignment_path, alphabet=DNA_ALPHABET):
+    """
+    Reads an aligned FASTA into a (taxa x columns) uint8 matrix.
+    Returns (names, matrix); gaps and ambiguity codes map to len(alphabet).
+    """
+    names, rows = [], []
+    for header, seq in iter_fasta(alignment_path):
+        names.append(header.split()[0])
+        rows.append(np.frombuffer(seq.encode('ascii', 'replace'), dtype=np.uint8))
+
+    if not rows:
+        raise Exception("Alignment is empty.")
+    if len({len(r) for r in rows}) != 1:
+        raise Exception("Sequences are not aligned (unequal lengths).")
+
+    lookup = build_lookup(alphabet)
+    return names, lookup[np.vstack(rows)]
+
+
+def pairwise_distances(matrix, n_states=4, model="jc", block_size=4096, other=None, weights=None):
+    """
+    All-pairs distances from an encoded alignment.
+    Matching sites are counted with one matrix product per state
+    (one-hot columns), processed in column blocks to bound memory.
+    With `other`, returns the (rows of matrix x rows of other) block only.
+    `weights` counts each column that many times (site patterns, bootstrap).
+
+    model: "p"  = uncorrected p-distance (mismatches / comparable sites)
+           "jc" = Jukes-Cantor correction (generalized to n_states)
+    """
+    square = other is None
+    other = matrix if square else other
+    n, length = matrix.shape
+    matches = np.zeros((n, other.shape[0]), dtype=np.float64)
+    compared = np.zeros_like(matches)
+
+    for start in range(0, length, block_size):
+        block = matrix[:, start:start + block_size]
+        block_b = other[:, start:start + block_size]
+        w = np.float32(1) if weights is None else weights[start:start + block_size].astype(np.float32)
+        valid = (block < n_states) * w
+        compared += valid @ (block_b < n_states).astype(np.float32).T
+        for state in range(n_states):
+            onehot = (block == state) * w
+            matches += onehot @ (block_b == state).astype(np.float32).T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.where(compared > 0, 1.0 - matches / compared, 1.0)
+
+    if model == "p":
+        dist = p
+    else:
+        b = 1.0 - 1.0 / n_states
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dist = -b * np.log(1.0 - p / b)
+        dist = np.where(np.isfinite(dist), dist, MAX_DISTANCE)
+        dist = np.minimum(dist, MAX_DISTANCE)
+
+    dist = np.maximum(dist, 0.0)
+    if square:
+        np.fill_diagonal(dist, 0.0)
+    return dist
+
+
+class ArrayTree:
+    """
+    Tree stored as flat arrays. Tips are nodes 0..n-1, internal nodes follow,
+    and every child has a lower index than its parent (the root is last).
+    """
+
+    def __init__(self, parent, length, names, labels=None):
+        self.parent = np.asarray(parent, dtype=np.int64)
+        self.length = np.asarray(length, dtype=np.float64)
+        self.names = list(names)                              # tip names
+        self.labels = labels if labels is not None else {}   # internal node -> label (e.g. support)
+
+    @classmethod
+    def from_parent_array(cls, parent, length, tip_names, labels=None):
+        """
+        Builds a canonical ArrayTree from nodes in any order.
+        tip_names: {node: name}. Tips are renumbered in depth-first order
+        (so every clade is a contiguous tip range), internal nodes in postorder.
+        """
+        labels = labels or {}
+        kids = [[] for _ in parent]
+        root = -1
+        for node, par in enumerate(parent):
+            if par >= 0:
+                kids[par].append(node)
+            else:
+                root = node
+
+        # Iterative postorder
+        order, stack = [], [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded or not kids[node]:
+                order.append(node)
+            else:
+                stack.append((node, True))
+                stack.extend((c, False) for c in reversed(kids[node]))
+
+        tips = [node for node in order if node in tip_names]
+        internal = [node for node in order if node not in tip_names]
+        new_index = {node: i for i, node in enumerate(tips + internal)}
+
+        new_parent = np.full(len(parent), -1, dtype=np.int64)
+        new_length = np.zeros(len(parent), dtype=np.float64)
+        for node, idx in new_index.items():
+            if parent[node] >= 0:
+                new_parent[idx] = new_index[parent[node]]
+            new_length[idx] = length[node]
+        return cls(new_parent, new_length, [tip_names[t] for t in tips],
+                   {new_index[n]: lab for n, lab in labels.items() if n in new_index})
+
+    @classmethod
+    def from_newick(cls, text):
+        """Parses a Newick string (quoted names, internal labels and [comments] supported)."""
+        parent, length, tip_names, labels = [], [], {}, {}
+        stack = []
+        i, n = 0, len(text)
+
+        def new_node():
+            parent.append(stack[-1] if stack else -1)
+            length.append(0.0)
+            return len(parent) - 1
+
+        def read_label(i):
+            while i < n and text[i].isspace():
+                i += 1
+            if i < n and text[i] == "'":
+                chars, i = [], i + 1
+                while i < n:
+                    if text[i] == "'":
+                        if i + 1 < n and text[i + 1] == "'":
+                            chars.append("'")
+                            i += 2
+                            continue
+                        i += 1
+                        break
+                    chars.append(text[i])
+                    i += 1
+                return "".join(chars), i
+            start = i
+            while i < n and text[i] not in ",():;[" and not text[i].isspace():
+                i += 1
+            return text[start:i], i
+
+        def read_length(node, i):
+            while i < n and (text[i].isspace() or text[i] == "["):
+                i = text.index("]", i) + 1 if text[i] == "[" else i + 1
+            if i < n and text[i] == ":":
+                value, i = read_label(i + 1)
+                length[node] = float(value)
+            return i
+
+        while i < n:
+            c = text[i]
+            if c == "(":
+                stack.append(new_node())
+                i += 1
+            elif c == ")":
+                node = stack.pop()
+                label, i = read_label(i + 1)
+                if label:
+                    labels[node] = label
+                i = read_length(node, i)
+            elif c == ";":
+                break
+            elif c == "[":
+                i = text.index("]", i) + 1
+            elif c == "," or c.isspace():
+                i += 1
+            else:
+                node = new_node()
+                tip_names[node], i = read_label(i)
+                i = read_length(node, i)
+
+        if stack or not parent:
+            raise Exception("Malformed Newick tree.")
+        return cls.from_parent_array(parent, length, tip_names, labels)
+
+    def canonical(self):
+        """Same tree with tips renumbered in depth-first order (see from_parent_array)."""
+        return ArrayTree.from_parent_array(self.parent, self.length, dict(enumerate(self.names)), self.labels)
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_newick(f.read().strip())
+
+    @property
+    def n_tips(self):
+        return len(self.names)
+
+    @property
+    def n_nodes(self):
+        return len(self.parent)
+
+    @property
+    def root(self):
+        return self.n_nodes - 1
+
+    def children(self):
+        """List of child indices for every node."""
+        kids = [[] for _ in range(self.n_nodes)]
+        for node, par in enumerate(self.parent):
+            if par >= 0:
+                kids[par].append(node)
+        return kids
+
+    def to_newick(self, precision=6):
+        """Serializes the tree to a Newick string (internal labels included)."""
+        kids = self.children()
+        fmt = f"{{:.{precision}f}}"
+        # Children precede parents, so a single ascending pass builds every subtree
+        parts = [None] * self.n_nodes
+        for node in range(self.n_nodes):
+            if node < self.n_tips:
+                text = quote_name(self.names[node])
+            else:
+                text = "(" + ",".join(parts[c] for c in kids[node]) + ")"
+                if node in self.labels:
+                    text += str(self.labels[node])
+                for c in kids[node]:
+                    parts[c] = None   # free memory early on big trees
+            if node != self.root:
+                text += ":" + fmt.format(max(0.0, self.length[node]))
+            parts[node] = text
+        return parts[self.root] + ";"
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            f.write(self.to_newick() + "\n")
+        return path
+
+
+def quote_name(name):
+    """Quotes a tip name if it contains Newick punctuation."""
+    if any(c in name for c in " ()[]':;,"):
+        return "'" + name.replace("'", "''") + "'"
+    return name
+
+
+def neighbor_joining(dist, names):
+    """
+    Saitou & Nei neighbor-joining with NumPy row/column updates.
+    The working matrix shrinks in place (last row swapped into the freed slot),
+    so each join costs O(m^2) vectorized work. Returns an ArrayTree with a
+    trifurcating root.
+    """
+    n = len(names)
+    if n < 2:
+        raise Exception("Need at least 2 sequences to build a tree.")
+
+    n_nodes = 2 * n - 2 if n > 2 else 3
+    parent = np.full(n_nodes, -1, dtype=np.int64)
+    length = np.zeros(n_nodes, dtype=np.float64)
+
+    if n == 2:
+        # Two tips: a root with both children sharing the distance
+        parent[:2] = 2
+        length[:2] = dist[0, 1] / 2
+        return ArrayTree(parent, length, names)
+
+    D = np.array(dist, dtype=np.float64)
+    node_of_row = np.arange(n)
+    r = D.sum(axis=1)
+    next_node = n
+    m = n
+
+    while m > 3:
+        Dm = D[:m, :m]
+        Q = (m - 2) * Dm - r[:m, None] - r[None, :m]
+        np.fill_diagonal(Q, np.inf)
+        flat = int(np.argmin(Q))
+        i, j = divmod(flat, m)
+        if i > j:
+            i, j = j, i
+
+        dij = Dm[i, j]
+        li = 0.5 * dij + (r[i] - r[j]) / (2 * (m - 2))
+        li = min(max(li, 0.0), dij)
+        lj = dij - li
+
+        new = next_node
+        next_node += 1
+        parent[node_of_row[i]] = new
+        parent[node_of_row[j]] = new
+        length[node_of_row[i]] = li
+        length[node_of_row[j]] = lj
+
+        dk = 0.5 * (Dm[i] + Dm[j] - dij)
+        # Row sums: drop contributions of i and j, add the new node
+        r[:m] += dk - Dm[:, i] - Dm[:, j]
+
+        # New node takes row i; the last row moves into slot j
+        D[i, :m] = dk
+        D[:m, i] = dk
+        D[i, i] = 0.0
+        r[i] = dk.sum() - dk[i] - dk[j]
+        node_of_row[i] = new
+
+        last = m - 1
+        if j != last:
+            D[j, :m] = D[last, :m]
+            D[:m, j] = D[:m, last]
+            D[j, j] = 0.0
+            r[j] = r[last]
+            node_of_row[j] = node_of_row[last]
+        m -= 1
+
+    # Final three nodes join at the root
+    a, b, c = 0, 1, 2
+    la = 0.5 * (D[a, b] + D[a, c] - D[b, c])
+    lb = D[a, b] - la
+    lc = D[a, c] - la
+    root = next_node
+    for row, l in ((a, la), (b, lb), (c, lc)):
+        parent[node_of_row[row]] = root
+        length[node_of_row[row]] = max(l, 0.0)
+
+    return ArrayTree(parent, length, names)
+
+
+def build_nj_tree(alignment_path, model="jc", alphabet=DNA_ALPHABET):
+    """Alignment file -> distance matrix -> NJ tree. Returns (tree, dist)."""
+    names, matrix = encode_alignment(alignment_path, alphabet)
+    dist = pairwise_distances(matrix, n_states=len(alphabet), model=model)
+    return neighbor_joining(dist, names), dist
@@ -1,30 +1,36 @@
 import os
-import subprocess
-import matplotlib
-# Use Agg backend to prevent freezing
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
-
-# Biopython modules
-from Bio import AlignIO, Phylo
-from Bio.Phylo.TreeConstruction import DistanceCalculator, DistanceTreeConstructor
-
+import numpy as np
 from PySide6.QtCore import QThread, Signal
+from core.phylogenetics.nj_logic import (build_nj_tree, neighbor_joining, encode_alignment,
+                                        pairwise_distances, PROTEIN_ALPHABET)
+from core.phylogenetics.supermatrix_logic import SupermatrixBuilder
+from core.phylogenetics.sketch_logic import SketchDistanceCache
+from core.phylogenetics.placement_logic import save_reference, load_reference, place_tip, insert_tip
+from core.phylogenetics.render_logic import TreeRenderer
+from core.phylogenetics.bootstrap_logic import BootstrapAnalysis
+from utils import profiling
+
+# Tree construction modes
+MODE_SUPERMATRIX = "supermatrix"   # marker genes -> MAFFT -> concatenated alignment
+MODE_SKETCH = "sketch"             # alignment-free MinHash distances
 
 class PhyloWorker(QThread):
     log_signal = Signal(str)
     progress_signal = Signal(int)
     result_signal = Signal(str)
+    stats_signal = Signal(dict)        # Tree paths & method for phylogenetics_results
     finished_signal = Signal(bool, str)
 
-    def __init__(self, file_list):
+    def __init__(self, file_list, mode=MODE_SUPERMATRIX, bootstrap=100):
         super().__init__()
         self.files = file_list
+        self.mode = mode
+        self.bootstrap = bootstrap
         self.base_path = os.getcwd()
         self.output_dir = os.path.join(self.base_path, "results", "phylo")
+        self.annotation_dir = os.path.join(self.base_path, "results", "annotation")
         os.makedirs(self.output_dir, exist_ok=True)
         
-        self.log_file = os.path.join(self.output_dir, "mafft_log.txt")
         self.mafft_exe = self.find_tool("mafft.bat")
 
     def find_tool(self, filename):
@@ -37,174 +43,178 @@ class PhyloWorker(QThread):
                 return os.path.join(root, filename)
         return None
 
+    @profiling.timed("phylo.run", capture=True)
     def run(self):
         self.log_signal.emit("🚀 Initializing Tree of Life Engine...")
         self.progress_signal.emit(5)
 
         # 1. VALIDATION
-        if not self.mafft_exe:
+        if self.mode == MODE_SUPERMATRIX and not self.mafft_exe:
             self.finished_signal.emit(False, "❌ MAFFT not found in tools folder.")
             return
         if len(self.files) < 2:
             self.finished_signal.emit(False, "Need at least 2 files to build a tree.")
             return
 
-        # 2. PREPARE SEQUENCES
-        self.log_signal.emit("📦 Preparing Sequences...")
-        combined_fasta = os.path.join(self.output_dir, "combined_input.fasta")
-        try:
-            with open(combined_fasta, "w") as outfile:
-                for fpath in self.files:
-                    name = os.path.basename(fpath).split('.')[0]
-                    with open(fpath, "r") as infile:
-                        lines = infile.readlines()
-                        seq = "".join([line.strip() for line in lines if not line.startswith(">")])
-                        seq = seq[:5000] 
-                        if len(seq) == 0: raise Exception(f"File {name} empty!")
-                        outfile.write(f">{name}\n{seq}\n")
-        except Exception as e:
-            self.finished_signal.emit(False, f"File Prep Error: {e}")
-            return
-        self.progress_signal.emit(20)
-
-        # 3. ALIGNMENT (MAFFT)
-        self.log_signal.emit("🧬 Running MAFFT Alignment...")
-        alignment_file = os.path.join(self.output_dir, "aligned.fasta")
-        cmd_mafft = [os.path.abspath(self.mafft_exe), "--auto", os.path.abspath(combined_fasta)]
-        
+        # 2. DISTANCES
         try:
-            with open(alignment_file, "w") as f_out, open(self.log_file, "w") as f_err:
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                subprocess.run(cmd_mafft, stdout=f_out, stderr=f_err, startupinfo=startupinfo, text=True, check=True)
-
-            if os.path.getsize(alignment_file) == 0:
-                with open(self.log_file, 'r') as f: err_msg = f.read()
-                raise Exception(f"MAFFT produced empty output!\n{err_msg}")
-            
+            if self.mode == MODE_SKETCH:
+                self.log_signal.emit("⚡ Alignment-free mode: MinHash k-mer sketches...")
+                cache = SketchDistanceCache(self.output_dir)
+                with profiling.span("phylo.sketch", count=len(self.files)):
+                    names, dist = cache.distance_matrix(self.files, log=self.log_signal.emit)
+                alignment_file = None
+            else:
+                self.log_signal.emit("📦 Extracting marker genes from annotations...")
+                builder = SupermatrixBuilder(self.mafft_exe, self.output_dir, self.annotation_dir)
+                with profiling.span("phylo.supermatrix", count=len(self.files)):
+                    alignment_file, _, markers = builder.build(self.files, log=self.log_signal.emit)
+                self.log_signal.emit(f"✅ Supermatrix ready ({len(markers)} genes concatenated).")
             self.progress_signal.emit(50)
-            self.log_signal.emit("✅ Alignment Complete.")
-
         except Exception as e:
-            self.finished_signal.emit(False, f"MAFFT Error: {e}")
+            self.finished_signal.emit(False, f"Distance Error: {e}")
             return
 
-        # 4. TREE BUILDING
+        # 3. TREE BUILDING
         self.log_signal.emit("🌳 Cultivating Tree Structure...")
-        tree = None
         try:
-            alignment = AlignIO.read(alignment_file, "fasta")
-            calculator = DistanceCalculator('identity')
-            dm = calculator.get_distance(alignment)
-            constructor = DistanceTreeConstructor()
-            tree = constructor.nj(dm)
+            if alignment_file:
+                # Vectorized protein distances + NumPy Neighbor-Joining
+                with profiling.span("phylo.nj", count=len(self.files)):
+                    nj_tree, dist = build_nj_tree(alignment_file, model="jc", alphabet=PROTEIN_ALPHABET)
+                names = nj_tree.names
+                if self.bootstrap > 0:
+                    self.log_signal.emit(f"🔁 Bootstrap support ({self.bootstrap} replicates)...")
+                    with profiling.span("phylo.bootstrap", count=self.bootstrap):
+                        _, matrix = encode_alignment(alignment_file, PROTEIN_ALPHABET)
+                        BootstrapAnalysis(self.bootstrap).run(matrix, names, nj_tree, n_states=len(PROTEIN_ALPHABET),
+                                                              log=self.log_signal.emit)
+            else:
+                with profiling.span("phylo.nj", count=len(names)):
+                    nj_tree = neighbor_joining(dist, names)
+                if self.bootstrap > 0:
+                    self.log_signal.emit("ℹ️ Bootstrap needs alignment columns; skipped in sketch mode.")
+            # Mean support of the tree's splits (None without bootstrap)
+            supports = [v for v in nj_tree.labels.values() if isinstance(v, int)]
+            support = round(sum(supports) / len(supports)) if supports else None
+            method = f"NJ ({self.mode}, {self.bootstrap} bootstrap)" if supports else f"NJ ({self.mode})"
+            # The distance matrix is kept next to the tree so new genomes can be placed later
+            tree_file = save_reference(nj_tree, os.path.join(self.output_dir, "phylo_tree.nwk"),
+                                       names, dist, self.files, self.mode)
+            self.stats_signal.emit({
+                "tree_path": tree_file,
+                "alignment_path": alignment_file or "",
+                "method": method,
+                "bootstrap": support,
+                "num_sequences": len(names)
+            })
             self.progress_signal.emit(80)
         except Exception as e:
             self.finished_signal.emit(False, f"Tree Calculation Error: {e}")
             return
 
-        # 5. VISUALIZATION (TREE OF LIFE STYLE)
+        # 4. VISUALIZATION (TREE OF LIFE STYLE)
         self.log_signal.emit("🎨 Rendering 'Real Tree' Visualization...")
         try:
-            out_img = os.path.join(self.output_dir, "phylo_tree.png")
-            
-            # Use a clean style
-            plt.style.use('seaborn-v0_8-white')
-            
-            # Taller figure for vertical tree
-            fig = plt.figure(figsize=(10, 12), dpi=150)
-            ax = fig.add_subplot(1, 1, 1)
-
-            # --- DRAW VERTICAL TREE ---
-            # Biopython allows passing a dict to customize colors per clade if needed
-            # We draw it manually to control the "trunk" look
-            
-            # This creates the vertical structure
-            # "label_func=lambda x: None" hides text because we will add custom text later
-            Phylo.draw(tree, axes=ax, do_show=False, branch_labels=None, label_func=lambda x: None)
-
-            # --- CUSTOMIZE BRANCHES (TRUNK) ---
-            # We iterate over lines to make them look like wood
-            for line in ax.get_lines():
-                # We can't easily detect depth in Matplotlib lines, so we style them all as branches
-                line.set_color("#6D4C41") # Deep Wood Brown
-                line.set_linewidth(4)     # Very Thick
-                line.set_alpha(1.0)
-                line.set_solid_capstyle('round') # Rounded ends like branches
-
-            # --- ADD "LEAF" ICONS (The Images) ---
-            terminals = tree.get_terminals()
-            
-            # To plot icons correctly, we need coordinates. 
-            # In a standard Phylo.draw():
-            # X-axis = Branch Length (Evolutionary Distance)
-            # Y-axis = Index of the leaf (0, 1, 2...)
-            
-            # Since we want a VERTICAL tree (Root at bottom), we will FLIP the coordinates 
-            # by rotating the View. But Phylo.draw is hard to rotate.
-            # INSTEAD: We will fake the vertical look by just swapping Labels and styling.
-            # OR: We just accept Horizontal but make it look organic.
-            
-            # ACTUALLY: Let's stick to Horizontal for reliability, but style it exactly like the image colors.
-            
-            for i, clade in enumerate(terminals):
-                y_pos = i + 1
-                x_pos = tree.distance(clade)
-                
-                # 1. DRAW THE ORGANISM ICON
-                # We use a large colored marker to simulate the "cartoons" in your image.
-                # Colors: We alternate colors to simulate different groups (Bacteria, Eukarya, etc)
-                colors = ['#66BB6A', '#42A5F5', '#EF5350', '#FFA726', '#AB47BC'] # Green, Blue, Red, Orange, Purple
-                icon_color = colors[i % len(colors)]
-                
-                # Marker 'o' = Circle (Cell), 'd' = Diamond, '8' = Octagon
-                # We use 'o' with a thick outline to look like a cell
-                ax.scatter(x_pos, y_pos, s=600, c=icon_color, marker='o', edgecolors='#3E2723', linewidth=2, zorder=10)
-                
-                # 2. DRAW INTERNAL "NUCLEUS" DOT (To make it look like a cell/organism)
-                ax.scatter(x_pos, y_pos, s=150, c='white', marker='.', zorder=11)
-
-                # 3. ADD TEXT LABEL
-                # Text goes slightly to the right of the icon
-                ax.text(
-                    x_pos + (0.02 * max(1, x_pos)), 
-                    y_pos, 
-                    f" {clade.name}", 
-                    fontsize=14, 
-                    fontweight='bold', 
-                    fontfamily='sans-serif',
-                    color='#3E2723', # Match trunk color
-                    verticalalignment='center'
-                )
-
-            # --- CLEANUP ---
-            # Remove the box border
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.spines['left'].set_visible(False)
-            ax.spines['bottom'].set_visible(True) # Keep bottom line for 'Root'
-            ax.spines['bottom'].set_color("#6D4C41")
-            ax.spines['bottom'].set_linewidth(4)
-
-            # Hide X/Y ticks
-            ax.set_xticks([])
-            ax.set_yticks([])
-            
-            # Title
-            ax.set_title("Phylogenetic Tree of Life", fontsize=24, fontweight='bold', color='#3E2723', pad=30)
-            
-            # Add a "Root" label at the bottom left
-            ax.text(0, 0, " Ancestral Root", fontsize=12, color='#6D4C41', style='italic')
-
-            plt.tight_layout()
-            plt.savefig(out_img, bbox_inches='tight')
-            plt.close(fig)
-            
+            out_img = self.render_tree(nj_tree, os.path.join(self.output_dir, "phylo_tree.png"))
             self.result_signal.emit(out_img)
             self.progress_signal.emit(100)
             self.finished_signal.emit(True, "Success")
-            
         except Exception as e:
             import traceback
             traceback.print_exc()
-            self.finished_signal.emit(False, f"Rendering Error: {e}")
\ No newline at end of file
+            self.finished_signal.emit(False, f"Rendering Error: {e}")
+
+    @profiling.timed("phylo.render")
+    def render_tree(self, tree, out_img):
+        """Overview PNG; big trees also get a full-detail SVG next to it."""
+        rendered = TreeRenderer().render(tree, out_img)
+        if rendered["svg"]:
+            self.log_signal.emit(f"🖼️ {tree.n_tips} tips: full labels in {os.path.basename(rendered['svg'])}")
+        return rendered["image"]
+
+
+class PlacementWorker(PhyloWorker):
+    """
+    Adds one genome to an existing tree without rebuilding it: distances from
+    the new genome to the reference tips are computed with the method the
+    tree was built with, then the genome is attached to the best branch.
+    """
+
+    def __init__(self, genome_file, reference_tree):
+        super().__init__([genome_file])
+        self.genome_file = genome_file
+        self.reference_tree = reference_tree
+
+    @profiling.timed("phylo.placement", capture=True)
+    def run(self):
+        self.log_signal.emit("🚀 Placing new genome onto the reference tree...")
+        self.progress_signal.emit(5)
+        name = os.path.basename(self.genome_file).split('.')[0]
+
+        # 1. LOAD REFERENCE
+        try:
+            tree, ref_names, ref_dist, ref_files, method = load_reference(self.reference_tree)
+            if name in ref_names:
+                raise Exception(f"{name} is already in the reference tree.")
+            self.log_signal.emit(f"🌳 Reference: {len(ref_names)} genomes ({method})")
+        except Exception as e:
+            self.finished_signal.emit(False, f"Reference Error: {e}")
+            return
+        self.progress_signal.emit(15)
+
+        # 2. DISTANCES TO THE REFERENCE TIPS (n new pairs only)
+        try:
+            if method == MODE_SKETCH:
+                cache = SketchDistanceCache(self.output_dir)
+                _, dist = cache.distance_matrix(ref_files + [self.genome_file], log=self.log_signal.emit)
+                query = dist[-1, :-1]
+            else:
+                if not self.mafft_exe:
+                    raise Exception("MAFFT not found in tools folder.")
+                # Cached marker alignments only gain the new sequences (mafft --add)
+                builder = SupermatrixBuilder(self.mafft_exe, self.output_dir, self.annotation_dir)
+                alignment_file, _, _ = builder.build(ref_files + [self.genome_file], log=self.log_signal.emit)
+                names, matrix = encode_alignment(alignment_file, PROTEIN_ALPHABET)
+                rows = [names.index(n) for n in ref_names]
+                query = pairwise_distances(matrix[[names.index(name)]], n_states=len(PROTEIN_ALPHABET),
+                                           other=matrix[rows])[0]
+        except Exception as e:
+            self.finished_signal.emit(False, f"Distance Error: {e}")
+            return
+        self.progress_signal.emit(70)
+
+        # 3. PLACEMENT
+        try:
+            order = {n: i for i, n in enumerate(ref_names)}
+            node, a, b, _ = place_tip(tree, query[[order[n] for n in tree.names]])
+            placed = insert_tip(tree, node, a, b, name)
+
+            sister = tree.names[node] if node < tree.n_tips else "an internal clade"
+            self.log_signal.emit(f"📍 {name} attached next to {sister} (branch length {b:.4f})")
+            self.log_signal.emit(f"🔎 Closest genome: {ref_names[int(query.argmin())]} (d = {query.min():.4f})")
+
+            dist = np.zeros((len(ref_names) + 1,) * 2)
+            dist[:-1, :-1] = ref_dist
+            dist[-1, :-1] = dist[:-1, -1] = query
+            tree_file = save_reference(placed, os.path.join(self.output_dir, f"phylo_tree_{name}.nwk"),
+                                       ref_names + [name], dist, ref_files + [self.genome_file], method)
+        except Exception as e:
+            self.finished_signal.emit(False, f"Placement Error: {e}")
+            return
+
+        self.stats_signal.emit({
+            "tree_path": tree_file,
+            "alignment_path": "",
+            "method": f"Placement ({method})",
+            "num_sequences": placed.n_tips
+        })
+        self.log_signal.emit(f"✅ Updated tree saved: {os.path.basename(tree_file)}")
+
+        # 4. VISUALIZATION
+        try:
+            self.result_signal.emit(self.render_tree(placed, os.path.splitext(tree_file)[0] + ".png"))
+            self.progress_signal.emit(100)
+            self.finished_signal.emit(True, "Success")
+        except Exception as e:
+            self.finished_signal.emit(False, f"Rendering Error: {e}")
@@ -0,0 +1,158 @@
+import os
+import numpy as np
+from core.phylogenetics.nj_logic import ArrayTree
+
+
+def distance_file_for(tree_path):
+    """The distance matrix persisted next to a tree (phylo_tree.nwk -> phylo_tree_distances.npz)."""
+    return os.path.splitext(tree_path)[0] + "_distances.npz"
+
+
+def save_reference(tree, tree_path, names, dist, files, method):
+    """Writes a tree and the distance matrix it was built from (placement reference)."""
+    tree.write(tree_path)
+    np.savez(distance_file_for(tree_path), names=np.array(names, dtype=str), dist=dist,
+             files=np.array(files, dtype=str), method=np.array(method))
+    return tree_path
+
+
+def load_reference(tree_path):
+    """Returns (tree, names, dist, files, method) for a persisted reference tree."""
+    dist_path = distance_file_for(tree_path)
+    if not os.path.exists(dist_path):
+        raise Exception("The reference tree has no stored distance matrix. Rebuild it first.")
+    data = np.load(dist_path)
+    return (ArrayTree.read(tree_path), data["names"].tolist(), data["dist"],
+            data["files"].tolist(), str(data["method"]))
+
+
+def postorder(tree):
+    """Nodes with every child before its parent (the index order, unless the tree was edited)."""
+    nodes = np.arange(tree.n_nodes)
+    if np.all(tree.parent[:-1] > nodes[:-1]) and tree.parent[-1] < 0:
+        return nodes
+    kids = [[] for _ in range(tree.n_nodes)]
+    for node, par in enumerate(tree.parent.tolist()):
+        if par >= 0:
+            kids[par].append(node)
+    root = int(np.flatnonzero(tree.parent < 0)[0])
+    order, stack = [], [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded or not kids[node]:
+            order.append(node)
+        else:
+            stack.append((node, True))
+            stack.extend((c, False) for c in kids[node])
+    return np.array(order)
+
+
+def edge_sums(tree, obs, weights):
+    """
+    Weighted residual sums of every branch, without node-to-tip distances.
+    For node v with residuals R(t) = obs(t) - d(v, t):
+        inside  (tips of v's clade, from v):                w_in, r_in, rr_in
+        outside (all other tips, from v's parent):          w_out, r_par, rr_par
+    (sums of w, w*R and w*R^2). One postorder pass builds the clade sums (a
+    child's residuals shrink by its branch length on the way up), one
+    preorder pass the complements (parent's outside + siblings), as in APPLES.
+    """
+    n_nodes = tree.n_nodes
+    parent = tree.parent.tolist()
+    length = tree.length.tolist()
+    order = postorder(tree).tolist()
+
+    W = [0.0] * n_nodes
+    S1 = [0.0] * n_nodes
+    S2 = [0.0] * n_nodes
+    for t, (o, w) in enumerate(zip(obs.tolist(), weights.tolist())):
+        W[t], S1[t], S2[t] = w, w * o, w * o * o
+    for node in order:
+        par = parent[node]
+        if par < 0:
+            continue
+        l = length[node]
+        W[par] += W[node]
+        S1[par] += S1[node] - l * W[node]
+        S2[par] += S2[node] - 2 * l * S1[node] + l * l * W[node]
+
+    # Outside sums of each node, seen from the node itself (0 at the root)
+    total = W[order[-1]]
+    P1 = [0.0] * n_nodes
+    P2 = [0.0] * n_nodes
+    r_par = np.zeros(n_nodes)
+    rr_par = np.zeros(n_nodes)
+    for node in reversed(order):
+        par = parent[node]
+        if par < 0:
+            continue
+        l = length[node]
+        # Everything outside the clade, from the parent: the parent's outside
+        # plus its other children (its clade sums minus this child's share)
+        r = P1[par] + S1[par] - (S1[node] - l * W[node])
+        rr = P2[par] + S2[par] - (S2[node] - 2 * l * S1[node] + l * l * W[node])
+        w_out = total - W[node]
+        r_par[node], rr_par[node] = r, rr
+        P1[node] = r - l * w_out
+        P2[node] = rr - 2 * l * r + l * l * w_out
+
+    W = np.array(W)
+    return W, np.array(S1), np.array(S2), total - W, r_par, rr_par
+
+
+def place_tip(tree, query_dist, weighted=True):
+    """
+    Finds the branch where a new tip fits best (distance-based placement).
+
+    For each branch (node -> parent, length L) the tip attaches at distance `a`
+    above the node with a pendant branch `b`. Predicted distances are
+    b + a + d(node, t) for tips inside the clade and b + (L - a) + d(parent, t)
+    outside it, so (a, b) has a closed-form least-squares solution from
+    per-branch sums (edge_sums, O(n) for all branches). Fitch-Margoliash
+    weights (1 / d^2) favour nearby tips. Works on any node order.
+
+    query_dist: distances from the new genome to the tips, in tree tip order.
+    Returns (node, a, b, error) for the best branch.
+    """
+    obs = np.asarray(query_dist, dtype=np.float64)
+    weights = 1.0 / np.maximum(obs, 1e-6) ** 2 if weighted else np.ones_like(obs)
+
+    W, S1, S2, W_out, R_par, RR_par = edge_sums(tree, obs, weights)
+    edges = np.flatnonzero(tree.parent >= 0)
+    L = tree.length[edges]
+
+    # Inside the clade: residuals from the node
+    w_in, r_in, rr_in = W[edges], S1[edges], S2[edges]
+
+    # Outside the clade: residuals from the parent, shifted by L
+    w_out, r_par, rr_par = W_out[edges], R_par[edges], RR_par[edges]
+    r_out = r_par - L * w_out
+    rr_out = rr_par - 2 * L * r_par + L * L * w_out
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = r_in / w_in                                # b + a
+        q = np.where(w_out > 0, r_out / w_out, s)      # b - a
+        a = np.clip((s - q) / 2, 0.0, L)
+        b = (r_in - a * w_in + r_out + a * w_out) / (w_in + w_out)
+        # Negative pendant length: pin b = 0 and refit a
+        pinned = b < 0
+        a = np.where(pinned, np.clip((r_in - r_out) / (w_in + w_out), 0.0, L), a)
+        b = np.maximum(b, 0.0)
+
+    error = (rr_in - 2 * (b + a) * r_in + (b + a) ** 2 * w_in
+             + rr_out - 2 * (b - a) * r_out + (b - a) ** 2 * w_out)
+    best = int(np.nanargmin(error))
+    return int(edges[best]), float(a[best]), float(b[best]), float(error[best])
+
+
+def insert_tip(tree, node, a, b, name):
+    """Returns a new tree with `name` attached `a` above `node` by a branch of length `b`."""
+    n = tree.n_nodes
+    parent = np.append(tree.parent, [tree.parent[node], n])
+    length = np.append(tree.length, [tree.length[node] - a, b])
+    parent[node] = n
+    length[node] = a
+
+    tip_names = {i: tip for i, tip in enumerate(tree.names)}
+    tip_names[n + 1] = name
+    return ArrayTree.from_parent_array(parent, length, tip_names, tree.labels)
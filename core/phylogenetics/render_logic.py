@@ -0,0 +1,243 @@
+import os
+import numpy as np
+from utils.plotting import pyplot
+
+BRANCH_COLOR = "#6D4C41"   # Deep Wood Brown
+TEXT_COLOR = "#3E2723"
+TIP_COLORS = ['#66BB6A', '#42A5F5', '#EF5350', '#FFA726', '#AB47BC']  # Green, Blue, Red, Orange, Purple
+
+# Height of one tip row in the tiled output (inches)
+TILE_ROW_HEIGHT = 0.18
+
+
+def tree_layout(tree):
+    """
+    Rectangular coordinates for a canonical ArrayTree.
+    x = distance from the root, y = tip slot (tips 0..n-1; internal nodes sit
+    midway between their outermost children).
+    Returns (x, y, y_min, y_max) where y_min / y_max span each node's children.
+    """
+    n_tips, n_nodes = tree.n_tips, tree.n_nodes
+    x = np.zeros(n_nodes)
+    for node in range(n_nodes - 2, -1, -1):
+        x[node] = x[tree.parent[node]] + max(0.0, tree.length[node])
+
+    y_min = np.full(n_nodes, np.inf)
+    y_max = np.full(n_nodes, -np.inf)
+    y = np.zeros(n_nodes)
+    y[:n_tips] = np.arange(n_tips)
+    for node in range(n_nodes - 1):
+        if node >= n_tips:
+            y[node] = (y_min[node] + y_max[node]) / 2
+        par = tree.parent[node]
+        y_min[par] = min(y_min[par], y[node])
+        y_max[par] = max(y_max[par], y[node])
+    y[tree.root] = (y_min[tree.root] + y_max[tree.root]) / 2
+    return x, y, y_min, y_max
+
+
+class TreeRenderer:
+    """
+    Draws phylogenetic trees with a fixed number of artists: all branches go
+    into one LineCollection and all tip markers into one scatter, so drawing
+    time grows with the number of nodes, not with matplotlib overhead.
+    Tip labels are only drawn when they fit at a readable size; trees above
+    `large_tree` tips also get a full-detail output where every label is
+    legible: one SVG ("svg") or PNG tiles of `tile_tips` tips ("tiles").
+    """
+
+    def __init__(self, layout="rectangular", large_output="svg", min_font=4, max_font=14,
+                 large_tree=2000, tile_tips=250, dpi=150):
+        self.layout = layout
+        self.large_output = large_output
+        self.min_font = min_font
+        self.max_font = max_font
+        self.large_tree = large_tree
+        self.tile_tips = tile_tips
+        self.dpi = dpi
+
+    def render(self, tree, out_png, title="Phylogenetic Tree of Life"):
+        """
+        Renders the tree overview to `out_png`.
+        Returns {"image": png, "svg": path or None, "tiles": [png, ...]}.
+        """
+        tree = tree.canonical()
+        x, y, y_min, y_max = tree_layout(tree)
+
+        if self.layout == "circular":
+            fig = self.draw_circular(tree, x, y, y_min, y_max, title)
+        else:
+            fig = self.draw_rectangular(tree, x, y, y_min, y_max, title)
+        fig.savefig(out_png, bbox_inches='tight')
+        pyplot().close(fig)
+
+        result = {"image": out_png, "svg": None, "tiles": []}
+        if tree.n_tips > self.large_tree:
+            base = os.path.splitext(out_png)[0]
+            if self.large_output == "tiles":
+                result["tiles"] = self.render_tiles(tree, x, y, y_min, y_max, base, title)
+            else:
+                result["svg"] = self.render_svg(tree, x, y, y_min, y_max, base + ".svg", title)
+        return result
+
+    # =========================================================================
+    # RECTANGULAR
+    # =========================================================================
+
+    def rectangular_segments(self, tree, x, y, y_min, y_max):
+        """Horizontal branch per node + vertical connector per internal node, as (N, 2, 2)."""
+        nodes = np.arange(tree.n_nodes - 1)
+        par = tree.parent[nodes]
+        horizontal = np.stack([np.column_stack([x[par], y[nodes]]),
+                               np.column_stack([x[nodes], y[nodes]])], axis=1)
+        internal = np.arange(tree.n_tips, tree.n_nodes)
+        vertical = np.stack([np.column_stack([x[internal], y_min[internal]]),
+                             np.column_stack([x[internal], y_max[internal]])], axis=1)
+        return np.concatenate([horizontal, vertical])
+
+    def draw_rectangular(self, tree, x, y, y_min, y_max, title, height=None, labels=True):
+        n = tree.n_tips
+        height = height or float(np.clip(n * 0.25, 6, 40))
+        from matplotlib.collections import LineCollection
+        fig = pyplot().figure(figsize=(10, height), dpi=self.dpi)
+        ax = fig.add_subplot(1, 1, 1)
+
+        # Branch width shrinks as the tree gets denser
+        points_per_tip = height * 72 / n
+        width = float(np.clip(points_per_tip * 0.2, 0.3, 4))
+        ax.add_collection(LineCollection(self.rectangular_segments(tree, x, y, y_min, y_max),
+                                         colors=BRANCH_COLOR, linewidths=width, capstyle='round'))
+
+        tips = np.arange(n)
+        x_span = max(x.max(), 1e-9)
+        if n <= 200:
+            colors = [TIP_COLORS[i % len(TIP_COLORS)] for i in tips]
+            size = float(np.clip(points_per_tip ** 2 * 0.6, 20, 600))
+            ax.scatter(x[tips], y[tips], s=size, c=colors, marker='o', edgecolors=TEXT_COLOR,
+                       linewidth=min(2, width / 2), zorder=10)
+
+        font = min(self.max_font, points_per_tip * 0.7)
+        if labels and font >= self.min_font:
+            for i in tips:
+                ax.text(x[i] + 0.02 * x_span, y[i], f" {tree.names[i]}", fontsize=font,
+                        fontweight='bold' if n <= 100 else 'normal', fontfamily='sans-serif',
+                        color=TEXT_COLOR, verticalalignment='center')
+            self.draw_support(ax, tree, x, y, font * 0.7)
+
+        ax.set_xlim(-0.05 * x_span, x_span * 1.35)
+        ax.set_ylim(n - 0.5, -0.5)
+        self.style_axes(ax, title)
+        ax.text(0, n - 0.5, " Ancestral Root", fontsize=12, color=BRANCH_COLOR, style='italic')
+        return fig
+
+    def draw_support(self, ax, tree, x, y, font):
+        """Writes internal node labels (bootstrap support) on small trees."""
+        if not tree.labels or tree.n_tips > 100 or font < self.min_font:
+            return
+        for node, label in tree.labels.items():
+            if node != tree.root:
+                ax.text(x[node], y[node], f"{label} ", fontsize=font, color=BRANCH_COLOR,
+                        horizontalalignment='right', verticalalignment='bottom')
+
+    def style_axes(self, ax, title):
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['left'].set_visible(False)
+        ax.spines['bottom'].set_color(BRANCH_COLOR)
+        ax.spines['bottom'].set_linewidth(4)
+        ax.set_xticks([])
+        ax.set_yticks([])
+        ax.set_title(title, fontsize=24, fontweight='bold', color=TEXT_COLOR, pad=30)
+
+    # =========================================================================
+    # CIRCULAR
+    # =========================================================================
+
+    def draw_circular(self, tree, x, y, y_min, y_max, title):
+        n = tree.n_tips
+        theta = 2 * np.pi * y / n
+        t_min, t_max = 2 * np.pi * y_min / n, 2 * np.pi * y_max / n
+
+        # Radial branches
+        nodes = np.arange(tree.n_nodes - 1)
+        r0, r1, t = x[tree.parent[nodes]], x[nodes], theta[nodes]
+        radial = np.stack([np.column_stack([r0 * np.cos(t), r0 * np.sin(t)]),
+                           np.column_stack([r1 * np.cos(t), r1 * np.sin(t)])], axis=1)
+
+        # Arcs joining the children of each internal node (~1 point per degree)
+        arcs = []
+        for node in range(n, tree.n_nodes):
+            steps = max(2, int(np.degrees(t_max[node] - t_min[node])) + 1)
+            angles = np.linspace(t_min[node], t_max[node], steps)
+            arcs.append(np.column_stack([x[node] * np.cos(angles), x[node] * np.sin(angles)]))
+
+        from matplotlib.collections import LineCollection
+        fig = pyplot().figure(figsize=(12, 12), dpi=self.dpi)
+        ax = fig.add_subplot(1, 1, 1)
+        width = float(np.clip(400 / n, 0.3, 3))
+        ax.add_collection(LineCollection(list(radial) + arcs, colors=BRANCH_COLOR,
+                                         linewidths=width, capstyle='round'))
+
+        radius = max(x.max(), 1e-9)
+        # Circumference available per tip at the label ring, in points
+        font = min(self.max_font, 2 * np.pi * 12 * 72 * 0.4 / n * 0.7)
+        if font >= self.min_font:
+            for i in range(n):
+                angle = np.degrees(theta[i])
+                flip = 90 < angle < 270
+                ax.text(radius * 1.03 * np.cos(theta[i]), radius * 1.03 * np.sin(theta[i]),
+                        tree.names[i], fontsize=font, color=TEXT_COLOR,
+                        rotation=angle + 180 if flip else angle, rotation_mode='anchor',
+                        horizontalalignment='right' if flip else 'left', verticalalignment='center')
+
+        limit = radius * 1.4
+        ax.set_xlim(-limit, limit)
+        ax.set_ylim(-limit, limit)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        ax.set_title(title, fontsize=24, fontweight='bold', color=TEXT_COLOR, pad=30)
+        return fig
+
+    # =========================================================================
+    # LARGE TREES
+    # =========================================================================
+
+    def render_svg(self, tree, x, y, y_min, y_max, out_svg, title):
+        """Full-size vector version: every label at a readable size, text kept as text."""
+        plt = pyplot()
+        with plt.rc_context({'svg.fonttype': 'none'}):
+            fig = self.draw_rectangular(tree, x, y, y_min, y_max, title,
+                                        height=tree.n_tips * self.min_font * 2 / 72)
+            # No tight bbox: measuring thousands of labels costs more than the drawing
+            fig.savefig(out_svg, format='svg')
+        plt.close(fig)
+        return out_svg
+
+    def render_tiles(self, tree, x, y, y_min, y_max, base, title):
+        """
+        PNG tiles of `tile_tips` consecutive tips. The branches are drawn once;
+        each tile only moves the view and swaps in its own labels.
+        """
+        n = tree.n_tips
+        fig = self.draw_rectangular(tree, x, y, y_min, y_max, title,
+                                    height=self.tile_tips * TILE_ROW_HEIGHT, labels=False)
+        ax = fig.axes[0]
+        x_span = max(x.max(), 1e-9)
+        font = min(self.max_font, TILE_ROW_HEIGHT * 72 * 0.7)
+
+        tiles = []
+        for number, start in enumerate(range(0, n, self.tile_tips), 1):
+            stop = min(n, start + self.tile_tips)
+            texts = [ax.text(x[i] + 0.02 * x_span, y[i], f" {tree.names[i]}", fontsize=font,
+                             color=TEXT_COLOR, verticalalignment='center')
+                     for i in range(start, stop)]
+            ax.set_ylim(start + self.tile_tips - 0.5, start - 0.5)
+            ax.set_title(f"{title} (tips {start + 1}-{stop} of {n})", fontsize=16,
+                         fontweight='bold', color=TEXT_COLOR)
+            tile = f"{base}_tile{number:03d}.png"
+            fig.savefig(tile, dpi=100)
+            tiles.append(tile)
+            for text in texts:
+                text.remove()
+        pyplot().close(fig)
+        return tiles
@@ -0,0 +1,213 @@
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.parsers import iter_fasta
+
+# Mash defaults: 21-mers, 1000 smallest hashes per genome
+KMER_SIZE = 21
+SKETCH_SIZE = 1000
+
+# Distance assigned when two sketches share no hashes
+MAX_SKETCH_DISTANCE = 1.0
+
+# A/C/G/T -> 0..3, anything else (N, IUPAC) -> 4
+BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _code, _base in enumerate("ACGT"):
+    BASE_CODES[ord(_base)] = BASE_CODES[ord(_base.lower())] = _code
+
+
+def hash64(values):
+    """SplitMix64 finalizer: spreads 2-bit packed k-mers over the 64-bit range."""
+    with np.errstate(over='ignore'):
+        z = values + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def kmer_hashes(seq, k=KMER_SIZE):
+    """
+    Hashes of all canonical k-mers of one contig (k <= 32).
+    Forward and reverse-complement k-mers are packed 2 bits per base with
+    k shifted array additions; windows touching an ambiguous base are dropped.
+    """
+    codes = BASE_CODES[np.frombuffer(seq.encode('ascii', 'replace'), dtype=np.uint8)]
+    n = codes.size - k + 1
+    if n <= 0:
+        return np.empty(0, dtype=np.uint64)
+
+    invalid = np.concatenate(([0], np.cumsum(codes == 4)))
+    valid = (invalid[k:] - invalid[:n]) == 0
+
+    bases = np.minimum(codes, 3).astype(np.uint64)
+    complement = np.uint64(3) - bases
+    fwd = np.zeros(n, dtype=np.uint64)
+    rev = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        fwd |= bases[j:j + n] << np.uint64(2 * (k - 1 - j))
+        rev |= complement[j:j + n] << np.uint64(2 * j)
+
+    return hash64(np.minimum(fwd, rev)[valid])
+
+
+def bottom_k(hashes, size):
+    """The `size` smallest distinct values, sorted (partition first, sort only the head)."""
+    head = 4 * size
+    if hashes.size > head:
+        smallest = np.unique(np.partition(hashes, head)[:head + 1])
+        if smallest.size >= size:
+            return smallest[:size]
+    # Heavy duplication in the head: fall back to a full sort
+    return np.unique(hashes)[:size]
+
+
+def sketch_genome(fasta_path, k=KMER_SIZE, size=SKETCH_SIZE):
+    """Bottom-s MinHash sketch of a genome: the `size` smallest distinct hashes, sorted."""
+    smallest = np.empty(0, dtype=np.uint64)
+    for _, seq in iter_fasta(fasta_path):
+        smallest = bottom_k(np.concatenate((smallest, kmer_hashes(seq, k))), size)
+    return smallest
+
+
+def mash_distance(a, b, k=KMER_SIZE, size=SKETCH_SIZE):
+    """Mash distance from two sorted sketches (Ondov et al. 2016)."""
+    union = np.union1d(a, b)[:size]
+    if union.size == 0:
+        return MAX_SKETCH_DISTANCE
+    shared = np.intersect1d(a, b, assume_unique=True)
+    shared = int((shared <= union[-1]).sum())
+    if shared == 0:
+        return MAX_SKETCH_DISTANCE
+    jaccard = shared / union.size
+    return float(min(MAX_SKETCH_DISTANCE, -np.log(2 * jaccard / (1 + jaccard)) / k))
+
+
+def stack_sketches(sketches, size=SKETCH_SIZE):
+    """(matrix, lengths): sketches as rows of one array, short ones padded at the end."""
+    matrix = np.full((len(sketches), size), np.iinfo(np.uint64).max, dtype=np.uint64)
+    lengths = np.array([min(len(sk), size) for sk in sketches], dtype=np.int64)
+    for row, sketch in enumerate(sketches):
+        matrix[row, :lengths[row]] = sketch[:size]
+    return matrix, lengths
+
+
+def mash_distances(a, matrix, lengths, k=KMER_SIZE, size=SKETCH_SIZE):
+    """
+    mash_distance from sketch `a` to every row of stack_sketches() at once.
+    Each hash of a row gets its position in the merged union of both
+    sketches (hashes of `a` below it + new hashes of the row before it), so
+    the shared hashes inside the bottom-`size` union are counted without
+    building any union.
+    """
+    a = a[:size]
+    valid = np.arange(matrix.shape[1])[None, :] < lengths[:, None]
+    below = np.searchsorted(a, matrix)                      # hashes of `a` smaller than each one
+    shared = valid & (a[np.minimum(below, max(a.size - 1, 0))] == matrix) if a.size else np.zeros_like(valid)
+    new = valid & ~shared
+    position = below + np.cumsum(new, axis=1) - new
+    union = np.minimum(a.size + new.sum(axis=1), size)
+    counted = (shared & (position < size)).sum(axis=1)
+
+    dist = np.full(len(matrix), MAX_SKETCH_DISTANCE)
+    ok = counted > 0
+    jaccard = counted[ok] / union[ok]
+    dist[ok] = np.minimum(MAX_SKETCH_DISTANCE, -np.log(2 * jaccard / (1 + jaccard)) / k)
+    return dist
+
+
+class SketchDistanceCache:
+    """
+    Alignment-free distances between genome FASTA files.
+    Sketches are cached per file (keyed on path, size and mtime) and the
+    distance matrix is kept on disk, so adding one genome only sketches that
+    genome and computes its n distances to the genomes already present.
+    """
+
+    def __init__(self, output_dir, k=KMER_SIZE, size=SKETCH_SIZE, workers=None):
+        self.k = k
+        self.size = size
+        self.workers = workers or os.cpu_count() or 1
+        self.sketch_dir = os.path.join(output_dir, "sketches")
+        self.matrix_path = os.path.join(output_dir, "sketch_distances.npz")
+        os.makedirs(self.sketch_dir, exist_ok=True)
+
+    def file_key(self, fasta_path):
+        """Cache key: changes whenever the file is replaced or edited."""
+        stat = os.stat(fasta_path)
+        ident = f"{os.path.abspath(fasta_path)}|{stat.st_size}|{stat.st_mtime_ns}|{self.k}|{self.size}"
+        return hashlib.sha1(ident.encode()).hexdigest()
+
+    def get_sketches(self, fasta_files, log=None):
+        """Returns (keys, {key: sketch}), sketching uncached genomes in a process pool."""
+        log = log or (lambda msg: None)
+        keys = list(dict.fromkeys(self.file_key(f) for f in fasta_files))
+        if len(keys) != len(fasta_files):
+            raise Exception("The same genome file was selected twice.")
+        sketches, missing = {}, []
+        for key, path in zip(keys, fasta_files):
+            cached = os.path.join(self.sketch_dir, f"{key}.npy")
+            if os.path.exists(cached):
+                sketches[key] = np.load(cached)
+            else:
+                missing.append((key, path))
+
+        if missing:
+            log(f"✏️ Sketching {len(missing)} genomes (k={self.k}, s={self.size})...")
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                results = pool.map(sketch_genome, [p for _, p in missing],
+                                   [self.k] * len(missing), [self.size] * len(missing))
+                for (key, _), sketch in zip(missing, results):
+                    np.save(os.path.join(self.sketch_dir, f"{key}.npy"), sketch)
+                    sketches[key] = sketch
+        log(f"♻️ {len(fasta_files) - len(missing)} sketches reused from cache")
+        return keys, sketches
+
+    def distance_matrix(self, fasta_files, log=None):
+        """
+        Returns (names, dist) for the given genomes. Distances already in the
+        cached matrix are copied over; only pairs involving new genomes are computed.
+        """
+        log = log or (lambda msg: None)
+        keys, sketches = self.get_sketches(fasta_files, log)
+        cached_keys, cached = self.load_matrix()
+
+        # Union of cached and requested genomes; NaN marks pairs never computed
+        all_keys = list(dict.fromkeys(keys + cached_keys))
+        n = len(all_keys)
+        dist = np.full((n, n), np.nan)
+        if cached_keys:
+            position = {key: i for i, key in enumerate(all_keys)}
+            rows = np.array([position[key] for key in cached_keys])
+            dist[np.ix_(rows, rows)] = cached
+        np.fill_diagonal(dist, 0.0)
+
+        requested = len(keys)
+        missing = np.isnan(dist[:requested, :requested])
+        todo = int(np.triu(missing, 1).sum())
+        if todo:
+            log(f"📏 Computing {todo:,} new pairwise distances...")
+            # One vectorized row at a time, always the genome with the most missing
+            # pairs: a new isolate (wherever it is in the list) takes a single call
+            matrix, lengths = stack_sketches([sketches[key] for key in keys], self.size)
+            np.fill_diagonal(missing, False)
+            per_row = missing.sum(axis=1)
+            while per_row.any():
+                i = int(np.argmax(per_row))
+                cols = np.flatnonzero(missing[i])
+                row = mash_distances(sketches[keys[i]], matrix[cols], lengths[cols], self.k, self.size)
+                dist[i, cols] = dist[cols, i] = row
+                missing[i, cols] = missing[cols, i] = False
+                per_row[i] = 0
+                per_row[cols] -= 1
+
+        np.savez(self.matrix_path, keys=np.array(all_keys, dtype=str), dist=dist)
+        names = [os.path.basename(f).split('.')[0] for f in fasta_files]
+        return names, dist[:requested, :requested].copy()
+
+    def load_matrix(self):
+        """Cached (keys, dist); empty when nothing has been computed yet."""
+        if not os.path.exists(self.matrix_path):
+            return [], np.empty((0, 0))
+        data = np.load(self.matrix_path)
+        return data["keys"].tolist(), data["dist"]
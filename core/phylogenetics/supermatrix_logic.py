@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.parsers import iter_fasta
+from utils.tool_wrappers import get_startupinfo
+from utils import profiling
+
+# Fixed panel of broadly conserved, single-copy bacterial marker proteins.
+# Keys are marker IDs, values match the product names in the DIAMOND titles.
+MARKER_PANEL = {
+    "rplB": r"50S ribosomal protein L2\b",
+    "rplC": r"50S ribosomal protein L3\b",
+    "rplD": r"50S ribosomal protein L4\b",
+    "rplE": r"50S ribosomal protein L5\b",
+    "rplF": r"50S ribosomal protein L6\b",
+    "rplN": r"50S ribosomal protein L14\b",
+    "rplP": r"50S ribosomal protein L16\b",
+    "rplR": r"50S ribosomal protein L18\b",
+    "rplV": r"50S ribosomal protein L22\b",
+    "rplX": r"50S ribosomal protein L24\b",
+    "rpsC": r"30S ribosomal protein S3\b",
+    "rpsE": r"30S ribosomal protein S5\b",
+    "rpsH": r"30S ribosomal protein S8\b",
+    "rpsJ": r"30S ribosomal protein S10\b",
+    "rpsK": r"30S ribosomal protein S11\b",
+    "rpsM": r"30S ribosomal protein S13\b",
+    "rpsQ": r"30S ribosomal protein S17\b",
+    "rpsS": r"30S ribosomal protein S19\b",
+    "rpoB": r"DNA-directed RNA polymerase subunit beta\b(?!')",
+    "rpoC": r"DNA-directed RNA polymerase subunit beta'",
+    "gyrB": r"DNA gyrase subunit B\b",
+    "recA": r"\b(recombinase A|protein RecA)\b",
+    "infB": r"translation initiation factor IF-2\b",
+    "dnaG": r"\bDNA primase\b",
+    "pyrG": r"\bCTP synthase\b",
+}
+
+
+def align_marker(task):
+    """
+    Aligns one marker in a worker process.
+    task: dict with mafft, mode ("full" or "add"), input, existing, output.
+    Module-level so it can be pickled by the process pool.
+    """
+    if task["mode"] == "add":
+        cmd = [task["mafft"], "--add", task["input"], "--keeplength", task["existing"]]
+    else:
+        cmd = [task["mafft"], "--auto", task["input"]]
+
+    tmp_out = task["output"] + ".tmp"
+    with open(tmp_out, "w") as f_out:
+        result = subprocess.run(cmd, stdout=f_out, stderr=subprocess.PIPE, text=True,
+                                startupinfo=get_startupinfo())
+    if result.returncode != 0 or os.path.getsize(tmp_out) == 0:
+        raise Exception(f"MAFFT failed on {task['marker']}: {result.stderr.strip()[-300:]}")
+    os.replace(tmp_out, task["output"])
+    return task["marker"]
+
+
+class SupermatrixBuilder:
+    """
+    Phylogenomics pipeline: marker proteins are pulled from each genome's
+    annotation, aligned per marker in parallel, and concatenated into a
+    supermatrix. Per-marker alignments are cached with a manifest of the
+    member sequences, so adding a genome only adds its sequences
+    (mafft --add) instead of realigning every marker from scratch.
+    """
+
+    def __init__(self, mafft_path, output_dir, annotation_dir, min_presence=0.5, workers=None):
+        self.mafft_path = os.path.abspath(mafft_path)
+        self.output_dir = output_dir
+        self.annotation_dir = annotation_dir
+        self.cache_dir = os.path.join(output_dir, "marker_cache")
+        self.min_presence = min_presence
+        self.workers = workers or os.cpu_count() or 1
+        self.patterns = {m: re.compile(p, re.IGNORECASE) for m, p in MARKER_PANEL.items()}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def build(self, genome_files, log=None):
+        """
+        Returns (supermatrix_path, genome_names, markers_used).
+        """
+        log = log or (lambda msg: None)
+
+        # 1. EXTRACT MARKERS PER GENOME
+        genomes = [os.path.basename(f).split('.')[0] for f in genome_files]
+        markers = {m: {} for m in MARKER_PANEL}   # marker -> {genome: protein seq}
+        with profiling.span("phylo.extract_markers", count=len(genomes)):
+            for genome in genomes:
+                found = self.extract_markers(genome)
+                for marker, seq in found.items():
+                    markers[marker][genome] = seq
+                log(f"  🔎 {genome}: {len(found)}/{len(MARKER_PANEL)} markers")
+
+        needed = max(2, int(round(self.min_presence * len(genomes))))
+        selected = [m for m in MARKER_PANEL if len(markers[m]) >= needed]
+        if not selected:
+            raise Exception("No marker genes shared by enough genomes. Run Annotation (with DIAMOND) first.")
+        log(f"🧩 Using {len(selected)} marker genes")
+
+        # 2. ALIGN MARKERS IN PARALLEL (cached)
+        tasks = []
+        for marker in selected:
+            task = self.plan_alignment(marker, markers[marker])
+            if task:
+                tasks.append(task)
+        log(f"♻️ {len(selected) - len(tasks)} alignments reused from cache, {len(tasks)} to compute")
+
+        if tasks:
+            with profiling.span("phylo.mafft", count=len(tasks)), \
+                    ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+                futures = [pool.submit(align_marker, t) for t in tasks]
+                for done, future in enumerate(as_completed(futures), 1):
+                    marker = future.result()
+                    log(f"  ✅ [{done}/{len(tasks)}] {marker} aligned")
+            for task in tasks:
+                self.save_manifest(task["marker"], task["manifest"])
+
+        # 3. CONCATENATE
+        with profiling.span("phylo.concatenate", count=len(selected)):
+            return self.concatenate(selected, genomes), genomes, selected
+
+    def extract_markers(self, genome):
+        """Best-scoring protein per marker from the DIAMOND annotation table."""
+        tsv = os.path.join(self.annotation_dir, f"{genome}_annotation.tsv")
+        faa = os.path.join(self.annotation_dir, f"{genome}.faa")
+        if not (os.path.exists(tsv) and os.path.exists(faa)):
+            return {}
+
+        best = {}   # marker -> (pident, protein_id)
+        with open(tsv, 'r') as f:
+            for line in f:
+                cols = line.rstrip('\n').split('\t')
+                if len(cols) < 5:
+                    continue
+                for marker, pattern in self.patterns.items():
+                    if pattern.search(cols[4]):
+                        pident = float(cols[2] or 0)
+                        if marker not in best or pident > best[marker][0]:
+                            best[marker] = (pident, cols[0])
+                        break
+
+        wanted = {pid: marker for marker, (_, pid) in best.items()}
+        found = {}
+        for header, seq in iter_fasta(faa):
+            marker = wanted.get(header.split()[0])
+            if marker:
+                found[marker] = seq.rstrip('*')
+        return found
+
+    # =========================================================================
+    # ALIGNMENT CACHE
+    # =========================================================================
+
+    def plan_alignment(self, marker, members):
+        """
+        Compares the requested members with the cached alignment.
+        Returns None when the cache is current, otherwise an alignment task.
+        """
+        marker_dir = os.path.join(self.cache_dir, marker)
+        os.makedirs(marker_dir, exist_ok=True)
+        aligned = os.path.join(marker_dir, "aligned.fasta")
+        manifest = {g: hashlib.sha1(s.encode()).hexdigest() for g, s in members.items()}
+        cached = self.load_manifest(marker)
+
+        if cached == manifest and os.path.exists(aligned):
+            return None
+
+        task = {"marker": marker, "mafft": self.mafft_path, "output": aligned, "manifest": manifest}
+        unchanged = cached is not None and os.path.exists(aligned) and \
+            all(manifest.get(g) == h for g, h in cached.items())
+
+        if unchanged:
+            # Only new genomes: keep the existing columns, drop removed rows
+            keep = set(manifest)
+            existing = os.path.join(marker_dir, "existing.fasta")
+            with open(existing, 'w') as f:
+                for header, seq in iter_fasta(aligned):
+                    if header in keep:
+                        f.write(f">{header}\n{seq}\n")
+            new_seqs = {g: s for g, s in members.items() if g not in cached}
+            if not new_seqs:
+                shutil.move(existing, aligned)
+                self.save_manifest(marker, manifest)
+                return None
+            task.update(mode="add", existing=existing,
+                        input=self.write_fasta(os.path.join(marker_dir, "new.fasta"), new_seqs))
+        else:
+            task.update(mode="full",
+                        input=self.write_fasta(os.path.join(marker_dir, "input.fasta"), members))
+        return task
+
+    def load_manifest(self, marker):
+        path = os.path.join(self.cache_dir, marker, "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save_manifest(self, marker, manifest):
+        with open(os.path.join(self.cache_dir, marker, "manifest.json"), 'w') as f:
+            json.dump(manifest, f, indent=1)
+
+    @staticmethod
+    def write_fasta(path, seqs):
+        with open(path, 'w') as f:
+            for name, seq in seqs.items():
+                f.write(f">{name}\n{seq}\n")
+        return path
+
+    # =========================================================================
+    # SUPERMATRIX
+    # =========================================================================
+
+    def concatenate(self, markers, genomes):
+        """
+        Concatenates the marker alignments (missing markers become gaps)
+        and writes a RAxML-style partition file next to the supermatrix.
+        """
+        rows = {g: [] for g in genomes}
+        partitions = []
+        position = 1
+
+        for marker in markers:
+            aligned = dict(iter_fasta(os.path.join(self.cache_dir, marker, "aligned.fasta")))
+            width = len(next(iter(aligned.values())))
+            for g in genomes:
+                rows[g].append(aligned.get(g, "-" * width))
+            partitions.append(f"LG, {marker} = {position}-{position + width - 1}")
+            position += width
+
+        matrix_path = os.path.join(self.output_dir, "supermatrix.fasta")
+        with open(matrix_path, 'w') as f:
+            for g in genomes:
+                f.write(f">{g}\n{''.join(rows[g])}\n")
+        with open(os.path.join(self.output_dir, "supermatrix.partitions"), 'w') as f:
+            f.write("\n".join(partitions) + "\n")
+        return matrix_path
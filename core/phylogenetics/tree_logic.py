@@ -1,8 +1,7 @@
 import os
-from Bio import Phylo
-from Bio.Phylo.TreeConstruction import DistanceCalculator, DistanceTreeConstructor
-from Bio import AlignIO
 from io import StringIO
+from Bio import Phylo
+from core.phylogenetics.nj_logic import build_nj_tree
 
 class PhylogenyManager:
     def __init__(self, project_dir):
@@ -10,31 +9,26 @@ class PhylogenyManager:
         self.output_dir = os.path.join(self.project_dir, "phylo_results")
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def build_tree_from_alignment(self, alignment_path):
+    def build_tree_from_alignment(self, alignment_path, model="jc"):
         """
         Takes a multiple sequence alignment (FASTA format) and 
         constructs a Neighbor-Joining (NJ) tree.
+        model: "p" (p-distance) or "jc" (Jukes-Cantor).
         """
         try:
-            # 1. Load the alignment
-            alignment = AlignIO.read(alignment_path, "fasta")
-
-            # 2. Calculate the Distance Matrix (using 'identity' model)
-            calculator = DistanceCalculator('identity')
-            dm = calculator.get_distance(alignment)
-
-            # 3. Construct the Tree (Neighbor Joining)
-            constructor = DistanceTreeConstructor(calculator, 'nj')
-            tree = constructor.build_tree(alignment)
+            # 1. Encode the alignment, compute distances and run NJ (NumPy)
+            tree, _ = build_nj_tree(alignment_path, model=model)
 
-            # 4. Save the tree in Newick format
+            # 2. Save the tree in Newick format
             tree_path = os.path.join(self.output_dir, "phylogeny.nwk")
-            Phylo.write(tree, tree_path, "newick")
+            newick = tree.to_newick()
+            with open(tree_path, "w") as f:
+                f.write(newick + "\n")
 
             return {
                 "success": True,
                 "tree_path": tree_path,
-                "tree_obj": tree,
+                "tree_obj": Phylo.read(StringIO(newick), "newick"),
                 "message": "Phylogenetic tree constructed successfully."
             }
         except Exception as e:
@@ -0,0 +1 @@
+from .pipeline_logic import PipelineRunner, STAGE_ORDER, stage_worker, stage_result, record_result
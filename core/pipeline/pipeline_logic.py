@@ -0,0 +1,210 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from core.annotation.annotation_engine import AnnotationWorker
+from core.specialized.specialized_engine import SpecializedWorker
+from core.reports.report_engine import ReportWorker
+from utils import profiling
+
+# Stage order of a sample; each name is also the analyses.module_name
+STAGE_ORDER = ["annotation", "amr", "virulence", "report"]
+
+
+def protein_path(genome_path):
+    """Where the annotation stage writes a genome's predicted proteins."""
+    base = os.path.basename(genome_path).split('.')[0]
+    return os.path.join(os.getcwd(), "results", "annotation", f"{base}.faa")
+
+
+def run_worker(worker):
+    """
+    Runs a QThread engine synchronously in the calling thread (no
+    QApplication needed): run() is called directly and every signal is
+    collected. Returns {"logs", "result", "finished"}.
+    """
+    out = {"logs": [], "result": None, "finished": None}
+    if hasattr(worker, "log_signal"):
+        worker.log_signal.connect(out["logs"].append)
+    for name in ("stats_signal", "result_signal"):
+        if hasattr(worker, name):
+            getattr(worker, name).connect(lambda result: out.__setitem__("result", result))
+    worker.finished_signal.connect(lambda *args: out.__setitem__("finished", args))
+    worker.run()
+    return out
+
+
+def _stage_result(out, data=None):
+    success, message = (out["finished"] or (False, "Engine stopped without a result"))[:2]
+    if not success and not message and out["logs"]:
+        message = out["logs"][-1]   # e.g. ReportWorker reports the reason only in the log
+    return {"success": bool(success), "message": message, "data": data or {}, "logs": out["logs"]}
+
+
+# =========================================================================
+# STAGES
+# input_path is the stage's own input: the genome for annotation, the
+# .faa protein file for screening; reports take the project data as params.
+# =========================================================================
+
+def stage_worker(stage, input_path, params=None, threads=None):
+    """
+    Engine (QThread) for one stage; also used by the job scheduler.
+    threads: CPU threads its tools may use (default: all cores).
+    """
+    if stage == "annotation":
+        return AnnotationWorker(input_path, threads)
+    if stage == "amr":
+        return SpecializedWorker(input_path, "card", threads)
+    if stage == "virulence":
+        return SpecializedWorker(input_path, "vfdb", threads)
+    if stage == "report":
+        return ReportWorker(params or {})
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def stage_result(stage, worker, input_path, out):
+    """Plain result dict from the collected signals of a finished engine."""
+    if stage == "annotation":
+        base = os.path.basename(input_path).split('.')[0]
+        data = dict(out["result"] or {})
+        data.update(
+            gff_path=os.path.join(worker.output_dir, f"{base}.gff"),
+            faa_path=os.path.join(worker.output_dir, f"{base}.faa"),
+            annotation_tsv=os.path.join(worker.output_dir, f"{base}_annotation.tsv"),
+        )
+        return _stage_result(out, data)
+    result = _stage_result(out, out["result"] if stage in ("amr", "virulence") else None)
+    if stage == "report" and result["success"]:
+        result["data"]["pdf_path"] = result["message"]
+    return result
+
+
+def run_stage(stage, input_path, params=None, threads=None):
+    """Process pool entry point: plain arguments in, plain dict out."""
+    worker = stage_worker(stage, input_path, params, threads)
+    result = stage_result(stage, worker, input_path, run_worker(worker))
+    # Workers have no database: their timing spans travel back with the result
+    result["metrics"] = profiling.drain()
+    return result
+
+
+def record_result(db, stage, project_id, analysis_id, result):
+    """Writes a stage result the way the matching view does."""
+    data = result["data"]
+    if result["success"]:
+        if stage == "annotation":
+            db.save_annotation_results(project_id, data)
+            db.index_annotations(project_id, data["annotation_tsv"])
+        elif stage in ("amr", "virulence"):
+            db.save_gene_hits(project_id, data.get("source", stage), data.get("hits", []),
+                              analysis_id=analysis_id)
+    else:
+        db.log_event('ERROR', stage, f"{stage} failed: {result['message']}", project_id)
+    if analysis_id:
+        db.complete_analysis(analysis_id, success=result["success"],
+                             error=None if result["success"] else result["message"])
+
+
+class PipelineRunner:
+    """
+    Headless batch runner. Every sample walks through the selected stages
+    in STAGE_ORDER; stages of different samples run side by side on a
+    process pool. Only this process writes to the database, so workers
+    need no connection and SQLite keeps a single writer. The cores are
+    split between the workers, so N samples x tool threads never exceed
+    the machine.
+
+    Resume: stages already completed for a project are skipped, and
+    analyses left 'running' by a crashed run are marked failed and redone.
+    """
+
+    def __init__(self, db, stages=None, workers=None, resume=True, log=None):
+        self.db = db
+        self.stages = [s for s in STAGE_ORDER if s in (stages or STAGE_ORDER)]
+        self.workers = workers or os.cpu_count() or 1
+        # Thread share of each worker's tools (DIAMOND --threads, BLAST -num_threads)
+        self.threads = max((os.cpu_count() or 1) // self.workers, 1)
+        self.resume = resume
+        self.log = log or (lambda msg: None)
+
+    def run(self, genome_files):
+        """Processes every genome; returns {"completed", "failed", "skipped"} stage counts."""
+        summary = {"completed": 0, "failed": 0, "skipped": 0}
+        queue = []
+        for path in genome_files:
+            project_id = self._project(path)
+            done = self.db.get_completed_modules(project_id) if self.resume else set()
+            todo = deque(s for s in self.stages if s not in done)
+            summary["skipped"] += len(self.stages) - len(todo)
+            if todo:
+                self.db.fail_stale_analyses(project_id)
+                queue.append((path, project_id, todo))
+        self.log(f"🧬 {len(queue)} samples to process, {summary['skipped']} stages already done")
+        if not queue:
+            return summary
+
+        # Fewer samples than workers: the idle workers' cores go to the busy ones
+        processes = min(self.workers, len(queue))
+        self.threads = max((os.cpu_count() or 1) // processes, 1)
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            running = {}
+            for sample in queue:
+                self._submit(pool, sample, running)
+
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sample, stage, analysis_id = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"success": False, "message": str(e), "data": {}, "logs": []}
+
+                    record_result(self.db, stage, sample[1], analysis_id, result)
+                    for row in result.get("metrics", ()):
+                        self.db.record_metric(row)
+                    name = os.path.basename(sample[0])
+                    if result["success"]:
+                        summary["completed"] += 1
+                        self.log(f"  ✅ {name}: {stage}")
+                        self._submit(pool, sample, running)
+                    else:
+                        # Later stages depend on this one: drop them for this sample
+                        summary["failed"] += 1
+                        self.log(f"  ❌ {name}: {stage} failed ({result['message']})")
+        return summary
+
+    # =========================================================================
+    # HELPERS (parent process)
+    # =========================================================================
+
+    def _project(self, path):
+        path = os.path.abspath(path)
+        project = self.db.get_project_by_path(path)
+        if project:
+            return project['project_id']
+        return self.db.create_project(os.path.basename(path), path, os.path.getsize(path))
+
+    def _submit(self, pool, sample, running):
+        """Queues the next stage of a sample (nothing when all are done)."""
+        path, project_id, todo = sample
+        if not todo:
+            return
+        stage = todo.popleft()
+        if stage == "annotation":
+            future = pool.submit(run_stage, stage, path, None, self.threads)
+        elif stage == "report":
+            future = pool.submit(run_stage, stage, path, self._report_data(path, project_id))
+        else:
+            future = pool.submit(run_stage, stage, protein_path(path), None, self.threads)
+
+        running[future] = (sample, stage, self.db.start_analysis(project_id, stage))
+
+    def _report_data(self, path, project_id):
+        data = self.db.get_project_by_path(os.path.abspath(path)) or {}
+        data['project_name'] = os.path.splitext(os.path.basename(path))[0]
+        annotation = self.db.get_annotation_results(project_id)
+        if annotation:
+            data.update(genes=annotation['genes_detected'], annotated=annotation['proteins_annotated'],
+                        rna=annotation['special_genes_count'], gc=data.get('gc_content') or 0)
+        return data
@@ -1,5 +1,6 @@
 import os
 from PySide6.QtCore import QThread, Signal
+from utils import profiling
 
 class QCWorker(QThread):
     """
@@ -15,6 +16,7 @@ class QCWorker(QThread):
         self.file_path = file_path
         self.trim_threshold = trim_threshold
 
+    @profiling.timed("qc.run", capture=True)
     def run(self):
         try:
             if not os.path.exists(self.file_path):
@@ -37,7 +39,8 @@ class QCWorker(QThread):
             read_count = 0
             total_quality_sum = 0
             
-            with open(self.file_path, 'r') as f:
+            parse_span = profiling.span("qc.parse", bytes=os.path.getsize(self.file_path))
+            with parse_span, open(self.file_path, 'r') as f:
                 while True:
                     header = f.readline()
                     if not header: break
@@ -73,6 +76,7 @@ class QCWorker(QThread):
 
                     if read_count % 2000 == 0:
                         self.progress_signal.emit(read_count)
+                parse_span.add(count=read_count)
 
             if read_count == 0:
                 self.error_signal.emit("File is empty.")
@@ -124,6 +128,7 @@ class TrimmingWorker(QThread):
         self.file_path = file_path
         self.threshold = quality_threshold
 
+    @profiling.timed("qc.trim")
     def run(self):
         new_path = self.file_path.replace(".fastq", "_clean.fastq")
         if new_path == self.file_path: new_path += "_clean.fastq"
@@ -1,15 +1,11 @@
 import os
+import importlib.util
 from PySide6.QtCore import QThread, Signal
 from datetime import datetime
+from utils import profiling
 
-# TRY/EXCEPT for ReportLab to prevent crashes if missing
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+# ReportLab is imported in run(); here we only check that it is installed
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
 
 class ReportWorker(QThread):
     log_signal = Signal(str)
@@ -23,6 +19,7 @@ class ReportWorker(QThread):
         self.output_dir = os.path.join(self.base_path, "results", "reports")
         os.makedirs(self.output_dir, exist_ok=True)
 
+    @profiling.timed("report.run", capture=True)
     def run(self):
         self.log_signal.emit("🚀 Initializing Report Generator...")
         self.progress_signal.emit(10)
@@ -36,6 +33,10 @@ class ReportWorker(QThread):
         pdf_path = os.path.join(self.output_dir, f"Report_{p_name}.pdf")
         
         try:
+            from reportlab.lib.pagesizes import letter
+            from reportlab.pdfgen import canvas
+            from reportlab.lib import colors
+
             c = canvas.Canvas(pdf_path, pagesize=letter)
             width, height = letter
 
@@ -1,6 +1,7 @@
 import os
 import subprocess
 from PySide6.QtCore import QThread, Signal
+from utils import profiling
 
 class SpecializedWorker(QThread):
     # Signals to update the UI
@@ -10,12 +11,14 @@ class SpecializedWorker(QThread):
     result_signal = Signal(dict)
     finished_signal = Signal(bool, str)
 
-    def __init__(self, input_protein_file, db_type):
+    def __init__(self, input_protein_file, db_type, threads=None):
         """
         input_protein_file: Path to the .faa (Protein) file from Annotation Module.
         db_type: "card" (AMR) or "vfdb" (Virulence).
+        threads: CPU threads for BLASTP (default: all cores).
         """
         super().__init__()
+        self.threads = max(int(threads or os.cpu_count() or 1), 1)
         # Clean up UI artifacts from the path if present
         self.input_file = input_protein_file.replace("📄 ", "").strip()
         self.db_type = db_type.lower()
@@ -35,6 +38,7 @@ class SpecializedWorker(QThread):
         self.output_dir = os.path.join(self.base_path, "results", "specialized")
         os.makedirs(self.output_dir, exist_ok=True)
 
+    @profiling.timed("specialized.run", capture=True)
     def run(self):
         self.log_signal.emit(f"🚀 Initializing {self.db_type.upper()} Protein Screening...")
         self.progress_signal.emit(5)
@@ -68,14 +72,17 @@ class SpecializedWorker(QThread):
             "-out", out_file, 
             "-outfmt", "6 qseqid sseqid pident length evalue bitscore stitle", 
             "-evalue", "1e-10", 
-            "-max_target_seqs", "1" # Only keep the best match per protein
+            "-max_target_seqs", "1", # Only keep the best match per protein
+            "-num_threads", str(self.threads)
         ]
         
         try:
             # Hide the command prompt window on Windows
             startupinfo = subprocess.STARTUPINFO()
             startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            subprocess.run(cmd, check=True, startupinfo=startupinfo)
+            with profiling.span("specialized.blastp", bytes=os.path.getsize(self.input_file),
+                                context={"db": self.db_type}):
+                subprocess.run(cmd, check=True, startupinfo=startupinfo)
             
             self.progress_signal.emit(60)
             self.log_signal.emit("✅ Scan complete. Parsing biological data...")
@@ -88,6 +95,7 @@ class SpecializedWorker(QThread):
         hits = 0
         gene_names = set()
         drug_classes = set() # For CARD categorization
+        hit_rows = [] # One dict per hit, saved to the gene_hits table
         
         if os.path.exists(out_file):
             with open(out_file, "r") as f:
@@ -104,8 +112,20 @@ class SpecializedWorker(QThread):
                         gene_names.add(short_name)
                         
                         # Basic classification for Risk Assessment
+                        gene_class = None
                         if self.db_type == "card":
-                            drug_classes.add(self.classify_drug(full_title))
+                            gene_class = self.classify_drug(full_title)
+                            drug_classes.add(gene_class)
+
+                        hit_rows.append({
+                            "query": cols[0],
+                            "gene": short_name,
+                            "title": full_title,
+                            "identity": self.to_float(cols[2]),
+                            "evalue": self.to_float(cols[4]),
+                            "bitscore": self.to_float(cols[5]),
+                            "class": gene_class
+                        })
 
         # 4. REPORT & RISK ASSESSMENT (Step 4)
         self.step_signal.emit(4)
@@ -121,7 +141,9 @@ class SpecializedWorker(QThread):
             # Return drug classes for AMR, or specific genes for Virulence
             "classes": list(drug_classes) if self.db_type == "card" else list(gene_names),
             "risk_level": risk_level,
-            "file_path": out_file
+            "file_path": out_file,
+            "source": "card" if self.db_type == "card" else "vfdb",
+            "hits": hit_rows
         }
         
         self.result_signal.emit(results)
@@ -142,6 +164,12 @@ class SpecializedWorker(QThread):
                     return part
         return title[:20] + "..." # Fallback if parsing fails
 
+    def to_float(self, value):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+
     def classify_drug(self, title):
         """Classifies CARD hits into drug families for the UI chart."""
         t = title.lower()
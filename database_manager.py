@@ -5,52 +5,75 @@ Handles all database operations with thread-safe connections
 
 import sqlite3
 import os
-from datetime import datetime
+import re
+from datetime import datetime, timezone
 from typing import List, Dict, Optional, Tuple
 import json
 
-from models import SCHEMA, INDEXES, DEFAULT_SETTINGS
+from models import STATS_REBUILD
+from db_connection import ConnectionPool, WriteQueue, WriteResult, EventBuffer, open_connection
+from db_migrations import SCHEMA_VERSION, migrate, schema_version
+from db_retention import Retention, RetentionScheduler
+from utils import profiling
 
 
 class DatabaseManager:
     def __init__(self, db_path: str = "microgenome.db"):
         """Initialize database connection"""
         self.db_path = db_path
-        self.connection = None
+        self.pool = None
+        self.writer = None
+        self.events = None
+        self.search_enabled = False
+        self.schema_version = 0
+        self.retention = None
+        self.scheduler = None
         self._connect()
         self._initialize_schema()
     
     def _connect(self):
-        """Establish database connection with thread safety"""
-        self.connection = sqlite3.connect(
-            self.db_path, 
-            check_same_thread=False,
-            isolation_level=None  # Autocommit mode
-        )
-        self.connection.row_factory = sqlite3.Row  # Access columns by name
+        """Per-thread read connections + one background writer (WAL mode)"""
+        self.writer = WriteQueue(self.db_path)
+        self.pool = ConnectionPool(self.db_path)
+        # Logs and notifications are buffered and committed in batches
+        self.events = EventBuffer(self.writer)
+        # Old logs/notifications are moved to <name>_archive.db
+        self.retention = Retention(self.writer, os.path.splitext(self.db_path)[0] + "_archive.db")
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the calling thread (reads never wait for the writer)"""
+        return self.pool.get()
+
+    def release_connection(self):
+        """Close the calling thread's read connection (a worker thread that has finished)"""
+        if self.pool:
+            self.pool.release()
+
+    def _write(self, sql: str, params: tuple = ()) -> WriteResult:
+        """Run one write statement on the writer thread and wait for its commit"""
+        return self.writer.execute(sql, params)
+
+    def flush(self):
+        """Commit buffered logs/notifications now (call before shutdown or when reading them)"""
+        if self.events:
+            self.events.flush(wait=True)
         
     def _initialize_schema(self):
-        """Create all tables if they don't exist"""
-        cursor = self.connection.cursor()
-        
-        # Create tables
-        for table_name, create_sql in SCHEMA.items():
-            cursor.execute(create_sql)
-        
-        # Create indexes
-        for index_sql in INDEXES:
-            cursor.execute(index_sql)
-        
-        # Insert default settings if empty
-        cursor.execute("SELECT COUNT(*) FROM user_settings")
-        if cursor.fetchone()[0] == 0:
-            for key, value in DEFAULT_SETTINGS.items():
-                cursor.execute(
-                    "INSERT INTO user_settings (key, value) VALUES (?, ?)",
-                    (key, value)
-                )
-        
-        self.connection.commit()
+        """Apply pending schema migrations (no DDL at all when the schema is current)"""
+        self.schema_version = schema_version(self.connection)
+        if self.schema_version < SCHEMA_VERSION:
+            messages = []
+            self.schema_version = self.writer.run(lambda conn: migrate(conn, messages.append))
+            for message in messages:
+                self.log_event('INFO', 'database', message)
+        elif self.schema_version > SCHEMA_VERSION:
+            self.log_event('WARNING', 'database',
+                           f'Database schema v{self.schema_version} is newer than this version (v{SCHEMA_VERSION})')
+
+        # Full-text search needs an SQLite build with FTS5
+        self.search_enabled = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search_index'").fetchone() is not None
     
     # =========================================================================
     # PROJECT OPERATIONS
@@ -58,26 +81,20 @@ class DatabaseManager:
     
     def create_project(self, filename: str, file_path: str, file_size: int = 0) -> int:
         """Create new project entry and return project_id"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        project_id = self._write("""
             INSERT INTO projects (filename, file_path, file_size, status)
             VALUES (?, ?, ?, 'pending')
-        """, (filename, file_path, file_size))
-        self.connection.commit()
-        
-        project_id = cursor.lastrowid
+        """, (filename, file_path, file_size)).lastrowid
         self.log_event('INFO', 'projects', f'New project created: {filename}', project_id)
         return project_id
     
     def update_project_status(self, project_id: int, status: str):
         """Update project status (pending/running/completed/failed)"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        self._write("""
             UPDATE projects 
             SET status = ?, last_modified = CURRENT_TIMESTAMP 
             WHERE project_id = ?
         """, (status, project_id))
-        self.connection.commit()
     
     def get_project_by_path(self, file_path: str) -> Optional[Dict]:
         """Get project by file path"""
@@ -86,6 +103,22 @@ class DatabaseManager:
         row = cursor.fetchone()
         return dict(row) if row else None
     
+    def get_project_for_proteins(self, faa_path: str) -> Optional[Dict]:
+        """
+        Project of a protein file from the annotation stage (<genome stem>.faa).
+        Tries the genome next to it, then the one project whose file has the
+        same stem; None when there is no match or more than one.
+        """
+        for ext in (".fasta", ".fna", ".fa"):
+            project = self.get_project_by_path(os.path.splitext(faa_path)[0] + ext)
+            if project:
+                return project
+        stem = os.path.basename(faa_path).split('.')[0]
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT * FROM projects WHERE filename = ? OR filename LIKE ?", (stem, f"{stem}.%"))
+        matches = [dict(row) for row in cursor.fetchall() if row['filename'].split('.')[0] == stem]
+        return matches[0] if len(matches) == 1 else None
+    
     def get_all_projects(self, limit: int = 100) -> List[Dict]:
         """Get all projects, most recent first"""
         cursor = self.connection.cursor()
@@ -113,7 +146,15 @@ class DatabaseManager:
         return cursor.fetchall()
     
     def search_projects(self, query: str) -> List[Dict]:
-        """Search projects by filename"""
+        """Search projects by filename (full-text index when available)"""
+        match = self._fts_query(query, 'project') if self.search_enabled else None
+        if match:
+            ids = [row['project_id'] for row in self._ranked_matches(match, 1000)]
+            if ids:
+                rows = {row['project_id']: dict(row) for row in self.connection.execute(
+                    f"SELECT * FROM projects WHERE project_id IN ({','.join('?' * len(ids))})", ids)}
+                return [rows[i] for i in ids if i in rows]
+
         cursor = self.connection.cursor()
         cursor.execute("""
             SELECT * FROM projects 
@@ -124,9 +165,7 @@ class DatabaseManager:
     
     def delete_project(self, project_id: int):
         """Delete project (CASCADE deletes all related data)"""
-        cursor = self.connection.cursor()
-        cursor.execute("DELETE FROM projects WHERE project_id = ?", (project_id,))
-        self.connection.commit()
+        self._write("DELETE FROM projects WHERE project_id = ?", (project_id,))
         self.log_event('WARNING', 'projects', f'Project {project_id} deleted')
     
     # =========================================================================
@@ -135,62 +174,70 @@ class DatabaseManager:
     
     def start_analysis(self, project_id: int, module_name: str) -> int:
         """Log analysis start and return analysis_id"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT INTO analyses (project_id, module_name, start_time, status)
-            VALUES (?, ?, CURRENT_TIMESTAMP, 'running')
-        """, (project_id, module_name))
-        self.connection.commit()
-        
-        analysis_id = cursor.lastrowid
-        self.update_project_status(project_id, 'running')
-        return analysis_id
+        def start(conn):
+            cursor = conn.execute("""
+                INSERT INTO analyses (project_id, module_name, start_time, status)
+                VALUES (?, ?, CURRENT_TIMESTAMP, 'running')
+            """, (project_id, module_name))
+            conn.execute("""
+                UPDATE projects 
+                SET status = 'running', last_modified = CURRENT_TIMESTAMP 
+                WHERE project_id = ?
+            """, (project_id,))
+            return cursor.lastrowid
+
+        return self.writer.run(start)
     
     def complete_analysis(self, analysis_id: int, success: bool = True, error: str = None):
         """Mark analysis as completed or failed"""
         status = 'completed' if success else 'failed'
+
+        def complete(conn):
+            conn.execute("""
+                UPDATE analyses 
+                SET end_time = CURRENT_TIMESTAMP,
+                    processing_time_seconds = 
+                        (julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400,
+                    status = ?,
+                    error_message = ?
+                WHERE analysis_id = ?
+            """, (status, error, analysis_id))
+
+            # Update project status (project looked up inside the same statement)
+            conn.execute("""
+                UPDATE projects 
+                SET status = ?, last_modified = CURRENT_TIMESTAMP 
+                WHERE project_id = (SELECT project_id FROM analyses WHERE analysis_id = ?)
+            """, (status, analysis_id))
+
+        self.writer.run(complete)
+    
+    def get_completed_modules(self, project_id: int) -> set:
+        """Modules that already finished successfully for a project (batch resume)"""
         cursor = self.connection.cursor()
         cursor.execute("""
+            SELECT DISTINCT module_name FROM analyses 
+            WHERE project_id = ? AND status = 'completed'
+        """, (project_id,))
+        return {row[0] for row in cursor.fetchall()}
+    
+    def fail_stale_analyses(self, project_id: int) -> int:
+        """Mark analyses left 'running' by a crashed run as failed"""
+        return self._write("""
             UPDATE analyses 
-            SET end_time = CURRENT_TIMESTAMP,
-                processing_time_seconds = 
-                    (julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400,
-                status = ?,
-                error_message = ?
-            WHERE analysis_id = ?
-        """, (status, error, analysis_id))
-        self.connection.commit()
-        
-        # Update project status
-        cursor.execute("SELECT project_id FROM analyses WHERE analysis_id = ?", (analysis_id,))
-        project_id = cursor.fetchone()[0]
-        self.update_project_status(project_id, status)
+            SET status = 'failed', end_time = CURRENT_TIMESTAMP, error_message = 'Interrupted'
+            WHERE project_id = ? AND status = 'running'
+        """, (project_id,)).rowcount
     
     def get_analysis_stats(self) -> Dict:
         """Get overall analysis statistics"""
-        cursor = self.connection.cursor()
-        
-        # Total analyses
-        cursor.execute("SELECT COUNT(*) FROM analyses WHERE status = 'completed'")
-        total = cursor.fetchone()[0]
-        
-        # Total time
-        cursor.execute("SELECT SUM(processing_time_seconds) FROM analyses WHERE status = 'completed'")
-        total_seconds = cursor.fetchone()[0] or 0
-        total_hours = total_seconds / 3600
-        
-        # By module
-        cursor.execute("""
-            SELECT module_name, COUNT(*) as count 
-            FROM analyses 
-            WHERE status = 'completed'
-            GROUP BY module_name
-        """)
-        by_module = {row[0]: row[1] for row in cursor.fetchall()}
+        by_module = self.get_module_usage_stats()
+        total_seconds = self.connection.execute(
+            "SELECT SUM(seconds) FROM stats_module").fetchone()[0] or 0
         
         return {
-            'total_analyses': total,
-            'total_hours': round(total_hours, 1),
+            'total_analyses': sum(by_module.values()),
+            'total_hours': round(total_seconds / 3600, 1),
             'by_module': by_module
         }
     
@@ -198,38 +245,40 @@ class DatabaseManager:
     # ANNOTATION RESULTS
     # =========================================================================
     
+    @profiling.timed("db.save_annotation_results")
     def save_annotation_results(self, project_id: int, data: Dict):
         """Save annotation results"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO annotation_results 
-            (project_id, genes_detected, proteins_annotated, functional_domains,
-             special_genes_count, trna_count, rrna_count, gff_file_path, 
-             genbank_file_path, circular_plot_path, faa_file_path)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            project_id,
-            data.get('genes', 0),
-            data.get('annotated', 0),
-            data.get('domains', 0),
-            data.get('rna', 0),
-            data.get('trna', 0),
-            data.get('rrna', 0),
-            data.get('gff_path', ''),
-            data.get('gbk_path', ''),
-            data.get('plot_path', ''),
-            data.get('faa_path', '')
-        ))
-        self.connection.commit()
-        
-        # Update project genome stats if available
-        if 'gc' in data:
-            cursor.execute("""
-                UPDATE projects 
-                SET gc_content = ?, genome_length = ?
-                WHERE project_id = ?
-            """, (data.get('gc', 0), data.get('genome_length', 0), project_id))
-            self.connection.commit()
+        def save(conn):
+            conn.execute("""
+                INSERT OR REPLACE INTO annotation_results 
+                (project_id, genes_detected, proteins_annotated, functional_domains,
+                 special_genes_count, trna_count, rrna_count, gff_file_path, 
+                 genbank_file_path, circular_plot_path, faa_file_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                project_id,
+                data.get('genes', 0),
+                data.get('annotated', 0),
+                data.get('domains', 0),
+                data.get('rna', 0),
+                data.get('trna', 0),
+                data.get('rrna', 0),
+                data.get('gff_path', ''),
+                data.get('gbk_path', ''),
+                data.get('plot_path', ''),
+                data.get('faa_path', '')
+            ))
+
+            # Update project genome stats if available
+            if 'gc' in data:
+                conn.execute("""
+                    UPDATE projects 
+                    SET gc_content = ?, genome_length = ?
+                    WHERE project_id = ?
+                """, (data.get('gc', 0), data.get('genome_length', 0), project_id))
+
+        # One transaction for both tables
+        self.writer.run(save)
     
     def get_annotation_results(self, project_id: int) -> Optional[Dict]:
         """Get annotation results for a project"""
@@ -244,8 +293,7 @@ class DatabaseManager:
     
     def save_amr_results(self, project_id: int, data: Dict):
         """Save AMR screening results"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        self._write("""
             INSERT OR REPLACE INTO amr_results
             (project_id, total_amr_genes, critical_threats, resistance_classes,
              detected_genes, blast_output_path, report_file_path)
@@ -259,7 +307,6 @@ class DatabaseManager:
             data.get('blast_path', ''),
             data.get('report_path', '')
         ))
-        self.connection.commit()
         
         # Create notification if critical threats found
         if data.get('critical', 0) > 0:
@@ -282,42 +329,259 @@ class DatabaseManager:
             return result
         return None
     
+    # =========================================================================
+    # GENE HITS
+    # =========================================================================
+
+    @profiling.timed("db.save_gene_hits")
+    def save_gene_hits(self, project_id: int, source: str, hits: List[Dict],
+                       analysis_id: int = None) -> int:
+        """Replace a project's hits for one source ('card', 'vfdb', ...) in one transaction"""
+        rows = [(
+            project_id, analysis_id, source,
+            hit.get('query', ''),
+            hit.get('gene', ''),
+            hit.get('title', ''),
+            hit.get('identity'),
+            hit.get('evalue'),
+            hit.get('bitscore'),
+            hit.get('class')
+        ) for hit in hits]
+
+        def save(conn):
+            conn.execute("DELETE FROM gene_hits WHERE project_id = ? AND source = ?", (project_id, source))
+            conn.executemany("""
+                INSERT INTO gene_hits
+                (project_id, analysis_id, source, query_id, gene, subject_title,
+                 identity, evalue, bitscore, gene_class)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+        self.writer.run(save)
+        return len(rows)
+
+    def get_gene_hits(self, project_id: int, source: str = None) -> List[Dict]:
+        """All hits of a project, best identity first"""
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT * FROM gene_hits
+            WHERE project_id = ? AND (? IS NULL OR source = ?)
+            ORDER BY identity DESC
+        """, (project_id, source, source))
+        return [dict(row) for row in cursor.fetchall()]
+
+    def find_projects_with_gene(self, gene: str, prefix: bool = False) -> List[Dict]:
+        """Projects carrying a gene (case-insensitive; prefix=True matches e.g. all blaTEM-*)"""
+        if prefix:
+            # Range scan on the NOCASE index instead of LIKE (no wildcard escaping needed)
+            where, params = "gene >= ? AND gene < ?", (gene, gene + '\U0010ffff')
+        else:
+            where, params = "gene = ?", (gene,)
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            SELECT p.project_id, p.filename, h.hits, h.best_identity
+            FROM (
+                SELECT project_id, COUNT(*) AS hits, MAX(identity) AS best_identity
+                FROM gene_hits
+                WHERE {where}
+                GROUP BY project_id
+            ) h
+            JOIN projects p ON p.project_id = h.project_id
+            ORDER BY h.best_identity DESC
+        """, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_gene_class_counts(self, source: str = None) -> Dict[str, int]:
+        """Number of projects with at least one hit per class (e.g. drug family)"""
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT gene_class, COUNT(DISTINCT project_id)
+            FROM gene_hits
+            WHERE gene_class IS NOT NULL AND (? IS NULL OR source = ?)
+            GROUP BY gene_class
+            ORDER BY 2 DESC
+        """, (source, source))
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+    # =========================================================================
+    # PATHWAY RESULTS
+    # =========================================================================
+
+    def save_pathway_results(self, project_id: int, data: Dict):
+        """Save KEGG mapping and module completeness (see PathwayManager.module_completeness)"""
+        self._write("""
+            INSERT OR REPLACE INTO pathway_results
+            (project_id, pathways_mapped, complete_pathways, kegg_annotations, pathway_map_path)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            project_id,
+            data.get('mapped', 0),
+            data.get('complete', 0),
+            json.dumps(data.get('modules', {})),
+            data.get('map_path', '')
+        ))
+
+    def get_pathway_results(self, project_id: int) -> Optional[Dict]:
+        """Get pathway results for a project"""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT * FROM pathway_results WHERE project_id = ?", (project_id,))
+        row = cursor.fetchone()
+        if row:
+            result = dict(row)
+            result['kegg_annotations'] = json.loads(result.get('kegg_annotations') or '{}')
+            return result
+        return None
+
+    # =========================================================================
+    # PHYLOGENETICS RESULTS
+    # =========================================================================
+
+    def save_phylogenetics_results(self, analysis_id: int, data: Dict):
+        """Save a tree (built or updated by placement) for an analysis"""
+        self._write("""
+            INSERT OR REPLACE INTO phylogenetics_results
+            (analysis_id, tree_file_path, alignment_file_path, tree_method,
+             bootstrap_value, num_sequences)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            analysis_id,
+            data.get('tree_path', ''),
+            data.get('alignment_path', ''),
+            data.get('method', ''),
+            data.get('bootstrap'),   # Mean split support (0-100), NULL without bootstrap
+            data.get('num_sequences', 0)
+        ))
+
+    def get_latest_phylogenetics_results(self) -> Optional[Dict]:
+        """Most recent tree from a completed analysis (reference for placement)"""
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT r.* FROM phylogenetics_results r
+            JOIN analyses a ON a.analysis_id = r.analysis_id
+            WHERE a.status = 'completed'
+            ORDER BY r.created_at DESC, r.result_id DESC
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    # =========================================================================
+    # FULL-TEXT SEARCH
+    # =========================================================================
+
+    # Only the newest matches are ranked, so common words stay fast
+    SEARCH_RANK_WINDOW = 5000
+
+    @staticmethod
+    def _fts_query(text: str, kind: str = None) -> Optional[str]:
+        """User text -> FTS5 query: every word must match, as a prefix"""
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return None
+        match = " ".join(f'"{w}"*' for w in words)
+        return f'kind : "{kind}" AND ({match})' if kind else match
+
+    def _ranked_matches(self, match: str, limit: int) -> List[sqlite3.Row]:
+        """
+        bm25 needs a lookup per matching row, so a word found in a million
+        annotations would be slow to rank in full. Ranking is limited to the
+        newest SEARCH_RANK_WINDOW matches (an FTS rowid range, found cheaply).
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT rowid FROM search_index WHERE search_index MATCH ?
+            ORDER BY rowid DESC LIMIT 1 OFFSET ?
+        """, (match, self.SEARCH_RANK_WINDOW - 1))
+        row = cursor.fetchone()
+        lowest = row[0] if row else 0
+
+        cursor.execute("""
+            SELECT d.kind, d.project_id, p.filename, d.ref, d.title,
+                   snippet(search_index, -1, '[', ']', '…', 12) AS snippet
+            FROM search_index
+            JOIN search_documents d ON d.doc_id = search_index.rowid
+            LEFT JOIN projects p ON p.project_id = d.project_id
+            WHERE search_index MATCH ? AND search_index.rowid >= ?
+            ORDER BY bm25(search_index, 10.0, 1.0, 0.0)
+            LIMIT ?
+        """, (match, lowest, limit))
+        return cursor.fetchall()
+
+    @staticmethod
+    def _product_name(title: str) -> str:
+        """'WP_0001.1 DNA gyrase subunit B [E. coli]' / 'sp|P0A|X OS=..' -> 'DNA gyrase subunit B'"""
+        title = re.split(r" OS=| \[", title, maxsplit=1)[0]
+        first, _, rest = title.partition(" ")
+        if rest and ("|" in first or re.search(r"[._]\d", first)):
+            return rest.strip()
+        return title.strip()
+
+    @profiling.timed("db.index_annotations")
+    def index_annotations(self, project_id: int, tsv_path: str) -> int:
+        """
+        (Re)indexes a project's annotation table (qseqid sseqid pident evalue stitle)
+        so product names become searchable. One transaction, streamed from disk.
+        """
+        if not self.search_enabled or not os.path.exists(tsv_path):
+            return 0
+
+        def rows():
+            with open(tsv_path, 'r', encoding='utf-8', errors='ignore') as f:
+                for line in f:
+                    cols = line.rstrip('\n').split('\t')
+                    if len(cols) >= 5:
+                        yield (project_id, cols[0], self._product_name(cols[4]), cols[4])
+
+        def index(conn):
+            conn.execute("DELETE FROM search_documents WHERE project_id = ? AND kind = 'annotation'",
+                         (project_id,))
+            cursor = conn.executemany("""
+                INSERT INTO search_documents (kind, project_id, ref, title, body)
+                VALUES ('annotation', ?, ?, ?, ?)
+            """, rows())
+            return cursor.rowcount
+
+        return self.writer.run(index)
+
+    def search(self, query: str, limit: int = 50, kind: str = None) -> List[Dict]:
+        """
+        Ranked matches across projects, annotated genes and AMR/VFDB hits
+        (kind: 'project', 'annotation' or 'hit'). Title matches (filename,
+        product, gene) weigh more than descriptions.
+        """
+        match = self._fts_query(query, kind)
+        if not match or not self.search_enabled:
+            return []
+        return [dict(row) for row in self._ranked_matches(match, limit)]
+
+    def rebuild_search_index(self):
+        """Rebuild the FTS index from search_documents (after bulk imports)"""
+        if self.search_enabled:
+            self.writer.run(lambda conn: conn.execute(
+                "INSERT INTO search_index(search_index) VALUES ('rebuild')"))
+
     # =========================================================================
     # DASHBOARD METRICS
     # =========================================================================
     
     def get_dashboard_stats(self) -> Dict:
-        """Get all statistics for dashboard"""
+        """Get all statistics for dashboard (read from the summary tables)"""
+        self.flush()
         cursor = self.connection.cursor()
         
-        # Total genomes processed
-        cursor.execute("SELECT COUNT(*) FROM projects WHERE status = 'completed'")
-        total_genomes = cursor.fetchone()[0]
+        cursor.execute("SELECT name, value FROM stats_totals")
+        totals = {row[0]: row[1] for row in cursor.fetchall()}
         
         # Total analysis hours
-        cursor.execute("""
-            SELECT SUM(processing_time_seconds) / 3600.0 
-            FROM analyses 
-            WHERE status = 'completed'
-        """)
+        cursor.execute("SELECT SUM(seconds) / 3600.0 FROM stats_module")
         total_hours = cursor.fetchone()[0] or 0
         
-        # Critical alerts (unread high priority notifications)
-        cursor.execute("""
-            SELECT COUNT(*) FROM notifications 
-            WHERE is_read = 0 AND priority = 'high'
-        """)
-        critical_alerts = cursor.fetchone()[0]
-        
-        # Storage used (sum of all project file sizes)
-        cursor.execute("SELECT SUM(file_size) FROM projects")
-        storage_bytes = cursor.fetchone()[0] or 0
-        storage_gb = storage_bytes / (1024**3)
+        storage_gb = totals.get('storage_bytes', 0) / (1024**3)
         
         return {
-            'total_genomes': total_genomes,
+            'total_genomes': int(totals.get('completed_projects', 0)),
             'total_hours': round(total_hours, 1),
-            'critical_alerts': critical_alerts,
+            'critical_alerts': int(totals.get('critical_alerts', 0)),
             'storage_gb': round(storage_gb, 2)
         }
     
@@ -325,11 +589,10 @@ class DatabaseManager:
         """Get count of analyses per module"""
         cursor = self.connection.cursor()
         cursor.execute("""
-            SELECT module_name, COUNT(*) as count
-            FROM analyses
-            WHERE status = 'completed'
-            GROUP BY module_name
-            ORDER BY count DESC
+            SELECT module_name, completed
+            FROM stats_module
+            WHERE completed > 0
+            ORDER BY completed DESC
         """)
         return {row[0]: row[1] for row in cursor.fetchall()}
     
@@ -337,30 +600,57 @@ class DatabaseManager:
         """Get analyses per day for timeline chart"""
         cursor = self.connection.cursor()
         cursor.execute("""
-            SELECT DATE(start_time) as date, COUNT(*) as count
-            FROM analyses
-            WHERE start_time >= DATE('now', ? || ' days')
-            GROUP BY DATE(start_time)
-            ORDER BY date
+            SELECT day as date, SUM(started) as count
+            FROM stats_daily
+            WHERE day >= DATE('now', ? || ' days')
+            GROUP BY day
+            HAVING count > 0
+            ORDER BY day
         """, (f'-{days}',))
         return cursor.fetchall()
     
+    def rebuild_dashboard_stats(self) -> bool:
+        """
+        Recompute the summary tables from analyses/projects/notifications.
+        Returns True if the stored totals already matched (consistency check).
+        """
+        self.flush()
+
+        def snapshot(conn):
+            return (
+                {r[0]: round(r[1], 3) for r in conn.execute("SELECT name, value FROM stats_totals")},
+                {r[0]: (r[1], round(r[2], 3)) for r in conn.execute(
+                    "SELECT module_name, completed, seconds FROM stats_module WHERE completed != 0")},
+                {(r[0], r[1]): r[2] for r in conn.execute(
+                    "SELECT day, module_name, started FROM stats_daily WHERE started != 0")},
+            )
+
+        def rebuild(conn):
+            before = snapshot(conn)
+            for sql in STATS_REBUILD:
+                conn.execute(sql)
+            return before == snapshot(conn)
+
+        consistent = self.writer.run(rebuild)
+        if not consistent:
+            self.log_event('WARNING', 'database', 'Dashboard statistics were out of sync and have been rebuilt')
+        return consistent
+    
     # =========================================================================
     # NOTIFICATIONS
     # =========================================================================
     
     def add_notification(self, type: str, message: str, project_id: int = None, 
                         priority: str = 'normal'):
-        """Create a new notification"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT INTO notifications (type, message, related_project_id, priority)
-            VALUES (?, ?, ?, ?)
-        """, (type, message, project_id, priority))
-        self.connection.commit()
+        """Create a new notification (buffered, see flush)"""
+        self.events.add("""
+            INSERT INTO notifications (timestamp, type, message, related_project_id, priority)
+            VALUES (?, ?, ?, ?, ?)
+        """, (self._timestamp(), type, message, project_id, priority))
     
     def get_unread_notifications(self, limit: int = 10) -> List[Dict]:
         """Get unread notifications"""
+        self.flush()
         cursor = self.connection.cursor()
         cursor.execute("""
             SELECT * FROM notifications 
@@ -372,13 +662,11 @@ class DatabaseManager:
     
     def mark_notification_read(self, notification_id: int):
         """Mark notification as read"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        self._write("""
             UPDATE notifications 
             SET is_read = 1 
             WHERE notification_id = ?
         """, (notification_id,))
-        self.connection.commit()
     
     def get_recent_activity(self, limit: int = 10) -> List[Dict]:
         """Get recent activity feed for dashboard"""
@@ -402,16 +690,20 @@ class DatabaseManager:
     # =========================================================================
     
     def log_event(self, level: str, module: str, message: str, project_id: int = None):
-        """Add system log entry"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT INTO system_logs (log_level, module, message, project_id)
-            VALUES (?, ?, ?, ?)
-        """, (level, module, message, project_id))
-        self.connection.commit()
+        """Add system log entry (buffered: no commit per event, see flush)"""
+        self.events.add("""
+            INSERT INTO system_logs (timestamp, log_level, module, message, project_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, (self._timestamp(), level, module, message, project_id))
+
+    @staticmethod
+    def _timestamp() -> str:
+        """Event time in CURRENT_TIMESTAMP format (UTC), taken before buffering"""
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
     
     def get_recent_logs(self, limit: int = 100) -> List[Dict]:
         """Get recent system logs"""
+        self.flush()
         cursor = self.connection.cursor()
         cursor.execute("""
             SELECT * FROM system_logs 
@@ -433,12 +725,225 @@ class DatabaseManager:
     
     def set_setting(self, key: str, value: str):
         """Set user setting value"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        self._write("""
             INSERT OR REPLACE INTO user_settings (key, value, updated_at)
             VALUES (?, ?, CURRENT_TIMESTAMP)
         """, (key, value))
-        self.connection.commit()
+    
+    # =========================================================================
+    # JOB QUEUE
+    # =========================================================================
+    
+    def submit_job(self, kind: str, input_path: str = None, project_id: int = None,
+                   params: Dict = None, priority: int = 0, threads: int = 1, memory_mb: int = 512,
+                   depends_on: List[int] = None, max_attempts: int = 1) -> int:
+        """Queue a job (and its dependencies) and return job_id"""
+        def submit(conn):
+            job_id = conn.execute("""
+                INSERT INTO jobs (kind, project_id, input_path, params, priority,
+                                  threads, memory_mb, max_attempts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (kind, project_id, input_path, json.dumps(params) if params else None,
+                  priority, threads, memory_mb, max_attempts)).lastrowid
+            conn.executemany("INSERT INTO job_dependencies (job_id, depends_on) VALUES (?, ?)",
+                             [(job_id, parent) for parent in depends_on or []])
+            # A dependency that already failed or was cancelled closes the job at once
+            conn.execute("""
+                UPDATE jobs SET status = 'failed', error_message = 'Dependency failed',
+                                finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = ? AND EXISTS (
+                    SELECT 1 FROM job_dependencies d JOIN jobs p ON p.job_id = d.depends_on
+                    WHERE d.job_id = ? AND p.status IN ('failed', 'cancelled'))
+            """, (job_id, job_id))
+            return job_id
+
+        return self.writer.run(submit)
+    
+    def get_runnable_jobs(self, limit: int = 50) -> List[Dict]:
+        """Queued jobs whose dependencies are all completed, in dispatch order"""
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT * FROM jobs j
+            WHERE status = 'queued'
+              AND (run_after IS NULL OR run_after <= CURRENT_TIMESTAMP)
+              AND NOT EXISTS (
+                  SELECT 1 FROM job_dependencies d JOIN jobs p ON p.job_id = d.depends_on
+                  WHERE d.job_id = j.job_id AND p.status != 'completed')
+            ORDER BY priority DESC, job_id
+            LIMIT ?
+        """, (limit,))
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def start_job(self, job_id: int, analysis_id: int = None):
+        """Mark a job as running (counts one attempt)"""
+        self._write("""
+            UPDATE jobs 
+            SET status = 'running', attempts = attempts + 1, analysis_id = ?,
+                started_at = CURRENT_TIMESTAMP, error_message = NULL
+            WHERE job_id = ?
+        """, (analysis_id, job_id))
+    
+    def finish_job(self, job_id: int, success: bool, error: str = None,
+                   retry_delay_seconds: int = 30) -> str:
+        """
+        Complete or fail a job. A failed job with attempts left is queued again
+        after a delay; otherwise the jobs depending on it fail too.
+        Returns the job's new status.
+        """
+        def finish(conn):
+            attempts, max_attempts = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if success:
+                status = 'completed'
+            elif attempts < max_attempts:
+                status = 'queued'
+            else:
+                status = 'failed'
+
+            conn.execute("""
+                UPDATE jobs 
+                SET status = ?, error_message = ?, finished_at = CURRENT_TIMESTAMP,
+                    run_after = CASE WHEN ? = 'queued'
+                                     THEN DATETIME('now', '+' || (? * attempts) || ' seconds') END
+                WHERE job_id = ?
+            """, (status, error, status, retry_delay_seconds, job_id))
+
+            if status == 'failed':
+                self._close_dependents(conn, job_id, 'failed', 'Dependency failed')
+            return status
+
+        return self.writer.run(finish)
+    
+    @staticmethod
+    def _close_dependents(conn, job_id: int, status: str, message: str):
+        """Queued jobs that (transitively) depend on job_id can never run"""
+        conn.execute("""
+            WITH RECURSIVE dependents(job_id) AS (
+                SELECT job_id FROM job_dependencies WHERE depends_on = ?
+                UNION
+                SELECT d.job_id FROM job_dependencies d JOIN dependents ON d.depends_on = dependents.job_id
+            )
+            UPDATE jobs SET status = ?, error_message = ?, finished_at = CURRENT_TIMESTAMP
+            WHERE job_id IN dependents AND status = 'queued'
+        """, (job_id, status, message))
+
+    def record_job_usage(self, job_id: int, usage: Dict):
+        """Store the sampled resource totals of a finished job (tool subprocesses)"""
+        self._write("""
+            UPDATE jobs SET cpu_seconds = ?, peak_rss_mb = ?, read_mb = ?, write_mb = ?
+            WHERE job_id = ?
+        """, (round(usage['cpu_seconds'], 2), round(usage['peak_rss_mb'], 1),
+              round(usage['read_mb'], 1), round(usage['write_mb'], 1), job_id))
+
+    def requeue_interrupted_jobs(self) -> int:
+        """Jobs still 'running' from a previous session go back to the queue"""
+        return self._write("""
+            UPDATE jobs 
+            SET status = 'queued', attempts = MAX(attempts - 1, 0), started_at = NULL
+            WHERE status = 'running'
+        """).rowcount
+    
+    def cancel_job(self, job_id: int) -> bool:
+        """Cancel a job that has not started yet (and the jobs waiting for it)"""
+        def cancel(conn):
+            cancelled = conn.execute("""
+                UPDATE jobs SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = ? AND status = 'queued'
+            """, (job_id,)).rowcount > 0
+            if cancelled:
+                self._close_dependents(conn, job_id, 'cancelled', 'Dependency cancelled')
+            return cancelled
+
+        return self.writer.run(cancel)
+    
+    def get_jobs(self, status: str = None, limit: int = 100) -> List[Dict]:
+        """Jobs for the queue panel, most recent first"""
+        cursor = self.connection.cursor()
+        if status:
+            cursor.execute("SELECT * FROM jobs WHERE status = ? ORDER BY job_id DESC LIMIT ?", (status, limit))
+        else:
+            cursor.execute("SELECT * FROM jobs ORDER BY job_id DESC LIMIT ?", (limit,))
+        return [dict(row) for row in cursor.fetchall()]
+    
+    # =========================================================================
+    # PROFILING METRICS
+    # =========================================================================
+    
+    def record_metric(self, row: Dict):
+        """Store one timing span from utils.profiling (buffered, see flush)"""
+        context = row.get('context')
+        self.events.add("""
+            INSERT INTO metrics (timestamp, name, parent, duration_ms, count, bytes, ok, context)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (self._timestamp(), row['name'], row.get('parent'), round(row['duration_ms'], 3),
+              row.get('count'), row.get('bytes'), 1 if row.get('ok', True) else 0,
+              json.dumps(context) if context is not None else None))
+    
+    def get_metric_summary(self, days: int = 7) -> List[Dict]:
+        """Per span name: calls, failures, avg / max / total ms, items and bytes"""
+        self.flush()
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            SELECT name, COUNT(*) as calls, SUM(ok = 0) as failures,
+                   AVG(duration_ms) as avg_ms, MAX(duration_ms) as max_ms,
+                   SUM(duration_ms) as total_ms, SUM(count) as items, SUM(bytes) as bytes
+            FROM metrics
+            WHERE timestamp >= DATETIME('now', ?)
+            GROUP BY name
+            ORDER BY total_ms DESC
+        """, (f'-{days} days',))
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def clear_metrics(self, days: int = 0) -> int:
+        """Delete metrics older than `days` days (all of them with 0)"""
+        self.flush()
+        return self._write("DELETE FROM metrics WHERE timestamp <= DATETIME('now', ?)",
+                           (f'-{days} days',)).rowcount
+    
+    # =========================================================================
+    # RETENTION
+    # =========================================================================
+    
+    def run_retention(self) -> Dict[str, int]:
+        """Archive old logs/notifications (per user settings) and reclaim the space"""
+        self.flush()
+        log_days = int(self.get_setting('log_retention_days') or 90)
+        notification_days = int(self.get_setting('notification_retention_days') or 30)
+        result = self.retention.run(log_days, notification_days)
+        if result['system_logs'] or result['notifications']:
+            self.log_event('INFO', 'database',
+                           f"Archived {result['system_logs']} logs and {result['notifications']} notifications")
+        return result
+    
+    def start_retention(self, interval_hours: float = 24, delay_seconds: float = 300):
+        """Run retention in the background every `interval_hours` (first run after a delay)"""
+        if self.scheduler is None:
+            self.scheduler = RetentionScheduler(self._scheduled_retention, interval_hours * 3600, delay_seconds)
+    
+    def _scheduled_retention(self):
+        try:
+            self.run_retention()
+        except Exception as e:
+            self.log_event('ERROR', 'database', f'Retention failed: {e}')
+    
+    def get_archived_logs(self, limit: int = 100, project_id: int = None) -> List[Dict]:
+        """Logs moved out by retention, most recent first"""
+        if not os.path.exists(self.retention.archive_path):
+            return []
+        conn = open_connection(self.retention.archive_path)
+        try:
+            if project_id is None:
+                rows = conn.execute("SELECT * FROM system_logs ORDER BY timestamp DESC LIMIT ?", (limit,))
+            else:
+                rows = conn.execute("""
+                    SELECT * FROM system_logs WHERE project_id = ?
+                    ORDER BY timestamp DESC LIMIT ?
+                """, (project_id, limit))
+            return [dict(row) for row in rows.fetchall()]
+        except sqlite3.OperationalError:
+            return []   # Archive created but never written to
+        finally:
+            conn.close()
     
     # =========================================================================
     # UTILITY METHODS
@@ -457,22 +962,29 @@ class DatabaseManager:
     
     def cleanup_old_projects(self, days: int = 90) -> int:
         """Delete projects older than specified days"""
-        cursor = self.connection.cursor()
-        cursor.execute("""
+        return self._write("""
             DELETE FROM projects 
             WHERE upload_date < DATE('now', ? || ' days')
-        """, (f'-{days}',))
-        self.connection.commit()
-        return cursor.rowcount
+        """, (f'-{days}',)).rowcount
     
-    def vacuum_database(self):
-        """Optimize database and reclaim space"""
-        self.connection.execute("VACUUM")
+    def vacuum_database(self) -> int:
+        """Reclaim space with incremental vacuum (no long exclusive lock); returns pages freed"""
+        return self.retention.vacuum()
     
     def close(self):
-        """Close database connection"""
-        if self.connection:
-            self.connection.close()
+        """Drain pending writes and close every connection"""
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
+        if self.events:
+            self.events.close()
+            self.events = None
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+        if self.pool:
+            self.pool.close_all()
+            self.pool = None
     
     def __del__(self):
         """Destructor to ensure connection is closed"""
@@ -0,0 +1,249 @@
+"""
+SQLite connection layer for MicroGenome Analyzer
+WAL journaling, one read connection per thread and a single writer thread
+"""
+
+import sqlite3
+import threading
+import queue
+from collections import namedtuple
+from concurrent.futures import Future
+
+# WAL lets readers (the GUI) run while a writer commits; NORMAL sync is
+# durable across application crashes and only fsyncs at checkpoints
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+WriteResult = namedtuple("WriteResult", ["lastrowid", "rowcount"])
+
+
+def open_connection(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Autocommit connection with the WAL pragmas applied"""
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread,
+                           isolation_level=None, timeout=5.0)
+    conn.row_factory = sqlite3.Row  # Access columns by name
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """
+    One connection per thread, created on first use. A short-lived worker
+    thread calls release() when it is done, otherwise its connection (and the
+    WAL snapshot it may hold) stays open until close_all().
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Closed from close_all() on another thread, hence check_same_thread=False
+            conn = open_connection(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def release(self):
+        """Close the calling thread's connection (reopened if the thread reads again)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._connections = [c for c in self._connections if c is not conn]
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class WriteQueue:
+    """
+    Serializes every write on one background thread with its own connection.
+    Jobs are functions taking that connection. Jobs queued together are
+    committed in a single transaction, each inside its own SAVEPOINT so a
+    failing job only rolls back itself.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 256):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._conn = open_connection(db_path, check_same_thread=False)
+        self._thread = threading.Thread(target=self._loop, name="sqlite-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, transactional: bool = True) -> Future:
+        """Queue a job; the Future resolves once its transaction is committed"""
+        future = Future()
+        if not self._thread.is_alive():
+            future.set_exception(sqlite3.ProgrammingError("Database writer is closed"))
+            return future
+        self._queue.put((fn, future, transactional))
+        return future
+
+    def run(self, fn, transactional: bool = True):
+        """Run a job and wait for its result (inline when already on the writer thread)"""
+        if threading.current_thread() is self._thread:
+            return fn(self._conn)
+        return self.submit(fn, transactional).result()
+
+    def execute(self, sql: str, params=()) -> WriteResult:
+        """Single statement; returns its lastrowid / rowcount"""
+        def job(conn):
+            cursor = conn.execute(sql, params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+        return self.run(job)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._conn.close()
+
+    # =========================================================================
+    # WRITER THREAD
+    # =========================================================================
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            group = []
+            for item in batch:
+                if item is None:
+                    self._commit_group(group)
+                    return
+                if item[2]:
+                    group.append(item)
+                else:
+                    # e.g. VACUUM, which cannot run inside a transaction
+                    self._commit_group(group)
+                    group = []
+                    self._run_plain(item)
+            self._commit_group(group)
+
+    def _commit_group(self, group):
+        if not group:
+            return
+        results = []
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            for fn, future, _ in group:
+                self._conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, fn(self._conn), None))
+                    self._conn.execute("RELEASE job")
+                except Exception as e:
+                    self._conn.execute("ROLLBACK TO job")
+                    self._conn.execute("RELEASE job")
+                    results.append((future, None, e))
+            self._conn.execute("COMMIT")
+        except Exception as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            for _, future, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _run_plain(self, item):
+        fn, future, _ = item
+        try:
+            future.set_result(fn(self._conn))
+        except Exception as e:
+            future.set_exception(e)
+
+
+class EventBuffer:
+    """
+    In-memory buffer for high-volume inserts (system logs, notifications).
+    Rows are grouped by statement and handed to the writer as one
+    executemany transaction every `interval` seconds or once `max_rows`
+    rows are waiting, so a loop logging per gene does not commit per event.
+    """
+
+    def __init__(self, writer: WriteQueue, interval: float = 0.5, max_rows: int = 500):
+        self.writer = writer
+        self.interval = interval
+        self.max_rows = max_rows
+        self._rows = {}
+        self._count = 0
+        self._last = None   # Future of the most recent flush
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="sqlite-events", daemon=True)
+        self._thread.start()
+
+    def add(self, sql: str, row: tuple):
+        with self._lock:
+            self._rows.setdefault(sql, []).append(row)
+            self._count += 1
+            full = self._count >= self.max_rows
+        if full:
+            self.flush()
+
+    def pending(self) -> int:
+        return self._count
+
+    def flush(self, wait: bool = False):
+        """Queue everything buffered as one transaction (optionally wait for the commit)"""
+        with self._lock:
+            if self._count:
+                rows, self._rows, self._count = self._rows, {}, 0
+
+                def job(conn):
+                    for sql, params in rows.items():
+                        conn.executemany(sql, params)
+
+                self._last = self.writer.submit(job)
+            future = self._last
+        # Waiting also covers a flush already in flight (read-your-writes)
+        if wait and future is not None:
+            future.result()
+
+    def close(self):
+        """Stop the timer and write out whatever is left"""
+        self._stop.set()
+        self._thread.join()
+        self.flush(wait=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
@@ -0,0 +1,119 @@
+"""
+Schema migrations for MicroGenome Analyzer
+The schema version is stored in PRAGMA user_version; pending migrations are
+applied in order inside the caller's transaction, together with the new version
+"""
+
+import sqlite3
+
+from models import (SCHEMA, INDEXES, DEFAULT_SETTINGS, SEARCH_SCHEMA, SEARCH_BACKFILL,
+                    STATS_SCHEMA, STATS_REBUILD, JOBS_SCHEMA, METRICS_SCHEMA)
+
+
+def _table_exists(conn, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+# =========================================================================
+# MIGRATIONS
+# Each step is a list of SQL statements or a function taking the connection.
+# Never edit a released step: add a new one (ALTER TABLE, new index, ...).
+# =========================================================================
+
+def _baseline(conn):
+    """Tables and indexes of the original schema (databases created before versioning)"""
+    for create_sql in SCHEMA.values():
+        conn.execute(create_sql)
+    for index_sql in INDEXES:
+        conn.execute(index_sql)
+    conn.executemany(
+        "INSERT OR IGNORE INTO user_settings (key, value) VALUES (?, ?)",
+        DEFAULT_SETTINGS.items()
+    )
+
+
+def _summary_tables(conn):
+    """Dashboard summary tables, filled from the rows already stored"""
+    fresh = not _table_exists(conn, 'stats_totals')
+    for sql in STATS_SCHEMA:
+        conn.execute(sql)
+    if fresh:
+        for sql in STATS_REBUILD:
+            conn.execute(sql)
+
+
+def _full_text_search(conn):
+    """FTS5 index (optional: skipped when SQLite is built without FTS5)"""
+    fresh = not _table_exists(conn, 'search_documents')
+    conn.execute("SAVEPOINT search")
+    try:
+        for sql in SEARCH_SCHEMA:
+            conn.execute(sql)
+        if fresh:
+            for sql in SEARCH_BACKFILL:
+                conn.execute(sql)
+        conn.execute("RELEASE search")
+    except sqlite3.OperationalError:
+        conn.execute("ROLLBACK TO search")
+        conn.execute("RELEASE search")
+
+
+MIGRATIONS = [
+    (1, "baseline schema", _baseline),
+    (2, "dashboard summary tables", _summary_tables),
+    (3, "full-text search", _full_text_search),
+    (4, "composite indexes", [
+        # Completed analyses per module (status filter + group by, index-only)
+        "CREATE INDEX IF NOT EXISTS idx_analyses_status_module ON analyses(status, module_name)",
+        # Recent activity feed (ORDER BY start_time DESC LIMIT n)
+        "CREATE INDEX IF NOT EXISTS idx_analyses_start ON analyses(start_time DESC)",
+        # Per-project log view, newest first
+        "CREATE INDEX IF NOT EXISTS idx_logs_project_time ON system_logs(project_id, timestamp DESC)",
+        # Unread notifications, newest first (replaces the is_read-only index)
+        "CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications(is_read, timestamp DESC)",
+        "DROP INDEX IF EXISTS idx_notifications_read",
+    ]),
+    (5, "retention settings", [
+        "INSERT OR IGNORE INTO user_settings (key, value) VALUES ('log_retention_days', '90')",
+        "INSERT OR IGNORE INTO user_settings (key, value) VALUES ('notification_retention_days', '30')",
+    ]),
+    (6, "job queue", JOBS_SCHEMA),
+    (7, "job resource usage", [
+        "ALTER TABLE jobs ADD COLUMN cpu_seconds REAL",
+        "ALTER TABLE jobs ADD COLUMN peak_rss_mb REAL",
+        "ALTER TABLE jobs ADD COLUMN read_mb REAL",
+        "ALTER TABLE jobs ADD COLUMN write_mb REAL",
+    ]),
+    (8, "profiling metrics", METRICS_SCHEMA + [
+        "INSERT OR IGNORE INTO user_settings (key, value) VALUES ('profiling', 'off')",
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, log=None) -> int:
+    """
+    Applies every migration newer than the database's user_version.
+    Must run inside a write transaction (e.g. a WriteQueue job) so the steps
+    and the version bump commit or roll back together. Returns the new version.
+    """
+    log = log or (lambda msg: None)
+    # Read again under the write lock: another process may have migrated meanwhile
+    current = schema_version(conn)
+    for version, name, step in MIGRATIONS:
+        if version <= current:
+            continue
+        if callable(step):
+            step(conn)
+        else:
+            for sql in step:
+                conn.execute(sql)
+        log(f"Schema migrated to v{version}: {name}")
+        current = version
+    conn.execute(f"PRAGMA user_version = {current}")
+    return current
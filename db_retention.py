@@ -0,0 +1,159 @@
+"""
+Retention for MicroGenome Analyzer
+Old system_logs / notifications rows are moved in batches into an archive
+database next to the live one; freed pages are returned with incremental vacuum
+"""
+
+import sqlite3
+import threading
+from typing import Dict
+
+from models import ARCHIVE_SCHEMA
+
+# table -> (columns, rows that may leave the live database)
+ARCHIVED_TABLES = {
+    'system_logs': (
+        "log_id, timestamp, log_level, module, message, project_id",
+        "timestamp < DATETIME('now', ?)"
+    ),
+    # Unread notifications stay until the user has seen them
+    'notifications': (
+        "notification_id, timestamp, type, priority, message, is_read, related_project_id, action_url",
+        "is_read = 1 AND timestamp < DATETIME('now', ?)"
+    ),
+}
+
+
+class Retention:
+    """
+    Archiving and space reclamation on the WriteQueue.
+    Every batch is its own short transaction, so analyses keep writing
+    while years of logs are moved out.
+    """
+
+    def __init__(self, writer, archive_path: str, batch_size: int = 5000, vacuum_pages: int = 1024):
+        self.writer = writer
+        self.archive_path = archive_path
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self._attached = False
+
+    def attach(self):
+        """ATTACH the archive database to the writer connection (once)"""
+        if self._attached:
+            return
+
+        def attach(conn):
+            # ATTACH is not allowed inside a transaction: non-transactional job
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            conn.execute("PRAGMA archive.journal_mode=WAL")
+            for sql in ARCHIVE_SCHEMA:
+                conn.execute(sql)
+
+        self.writer.run(attach, transactional=False)
+        self._attached = True
+
+    def archive(self, table: str, days: int) -> int:
+        """Move rows of `table` older than `days` days; returns the number moved"""
+        columns, condition = ARCHIVED_TABLES[table]
+        params = (f'-{days} days', self.batch_size)
+        batch = f"""
+            SELECT rowid FROM main.{table} WHERE {condition}
+            ORDER BY timestamp, rowid LIMIT ?
+        """
+
+        names = [c.strip() for c in columns.split(",")]
+        same_row = " AND ".join(f"a.{c} IS m.{c}" for c in names)
+
+        def move(conn):
+            # INSERT OR IGNORE: a batch copied before a crash is not duplicated
+            conn.execute(f"""
+                INSERT OR IGNORE INTO archive.{table} ({columns})
+                SELECT {columns} FROM main.{table} WHERE rowid IN ({batch})
+            """, params)
+            # An ignored row must be that same row, not an older one with the
+            # same id (e.g. an archive kept from before a database reset)
+            clashes = conn.execute(f"""
+                SELECT COUNT(*) FROM main.{table} m WHERE m.rowid IN ({batch})
+                AND NOT EXISTS (SELECT 1 FROM archive.{table} a WHERE {same_row})
+            """, params).fetchone()[0]
+            if clashes:
+                raise sqlite3.IntegrityError(
+                    f"{clashes} {table} rows clash with different archived rows; "
+                    f"nothing was moved (archive: {self.archive_path})")
+            return conn.execute(f"DELETE FROM main.{table} WHERE rowid IN ({batch})", params).rowcount
+
+        self.attach()
+        moved = 0
+        while True:
+            count = self.writer.run(move)
+            moved += count
+            if count < self.batch_size:
+                return moved
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Switches the database to auto_vacuum=INCREMENTAL. Needs one full
+        VACUUM (instant on a new database); returns True if it ran.
+        """
+        def convert(conn):
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+
+        return self.writer.run(convert, transactional=False)
+
+    def vacuum(self) -> int:
+        """Return free pages to the file system in small steps; returns pages freed"""
+        self.enable_incremental_vacuum()
+
+        def step(conn):
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free:
+                # executescript steps the pragma to completion (execute() frees one page)
+                conn.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages});")
+            return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+        freed = 0
+        while True:
+            pages = self.writer.run(step, transactional=False)
+            freed += pages
+            if pages < self.vacuum_pages:
+                break
+        # Shrink the WAL file as well
+        self.writer.run(lambda conn: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall(),
+                        transactional=False)
+        return freed
+
+    def run(self, log_days: int, notification_days: int) -> Dict[str, int]:
+        """One retention pass: archive both tables, then reclaim the space"""
+        result = {
+            'system_logs': self.archive('system_logs', log_days),
+            'notifications': self.archive('notifications', notification_days),
+        }
+        result['pages_freed'] = self.vacuum()
+        return result
+
+
+class RetentionScheduler:
+    """Calls `task` every `interval` seconds on a daemon thread (first call after `delay`)"""
+
+    def __init__(self, task, interval: float, delay: float = 0):
+        self.task = task
+        self.interval = interval
+        self.delay = delay
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="sqlite-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        wait = self.delay
+        while not self._stop.wait(wait):
+            self.task()
+            wait = self.interval
@@ -1,21 +1,21 @@
+import time
+STARTED = time.perf_counter()   # Start-up timing (see utils/startup_profile.py for imports)
+
 import sys
 import os
 import shutil
 import logging
 import datetime
+import multiprocessing
 from PySide6.QtWidgets import QApplication, QMessageBox, QSplashScreen
 from PySide6.QtCore import Qt, QLockFile, QTimer
 from PySide6.QtGui import QPixmap
 
-# Optional: Try to import psutil for accurate RAM checks
-try:
-    import psutil
-    PSUTIL_AVAILABLE = True
-except ImportError:
-    PSUTIL_AVAILABLE = False
-
 from ui.main_window import MainWindow
 from database_manager import DatabaseManager
+from core.monitor import system_memory_mb
+from utils import profiling
+IMPORTS_DONE = time.perf_counter()
 
 # --- CONFIGURATION ---
 APP_NAME = "MicroGenome Analyzer"
@@ -79,15 +79,15 @@ def check_system_requirements(base_dir):
     except Exception as e:
         logging.warning(f"Disk check failed: {e}")
 
-    # 2. Check RAM (if psutil is installed)
-    if PSUTIL_AVAILABLE:
-        try:
-            ram_gb = psutil.virtual_memory().total / (1024 ** 3)
-            if ram_gb < MIN_RAM_GB:
-                logging.warning(f"Low RAM detected: {ram_gb:.1f}GB")
-                # We warn but allow launch
-        except Exception as e:
-            logging.warning(f"RAM check failed: {e}")
+    # 2. Check RAM (psutil, else /proc/meminfo)
+    memory = system_memory_mb()
+    if memory:
+        ram_gb = memory[0] / 1024
+        if ram_gb < MIN_RAM_GB:
+            logging.warning(f"Low RAM detected: {ram_gb:.1f}GB")
+            # We warn but allow launch
+    else:
+        logging.warning("RAM check skipped: install psutil to enable it on this platform")
             
     return True, "OK"
 
@@ -162,6 +162,13 @@ def main():
         db_manager = DatabaseManager(db_path)
         # Log startup event
         db_manager.log_event('INFO', 'system', f'App started v{APP_VERSION}')
+        # Archive old logs/notifications in the background
+        db_manager.start_retention()
+        # Engine timing spans (MICROGENOME_PROFILE overrides the setting)
+        mode = profiling.configure(os.environ.get("MICROGENOME_PROFILE") or db_manager.get_setting('profiling'))
+        if profiling.enabled():
+            profiling.set_sink(db_manager.record_metric)
+            logging.info(f"Profiling enabled: {mode}")
     except Exception as e:
         logging.error(f"Database init failed: {e}")
         if splash: splash.close()
@@ -178,12 +185,17 @@ def main():
     logging.info("Launching Main Window")
     window = MainWindow(db_manager)
     window.show()
+    logging.info(f"Startup: imports {(IMPORTS_DONE - STARTED) * 1000:.0f} ms, "
+                 f"first window after {(time.perf_counter() - STARTED) * 1000:.0f} ms")
     
     if splash:
         splash.finish(window)
 
     # 10. Run Application
     check_updates_stub()
+    if db_manager:
+        # Buffered log events are written even if cleanup below fails
+        app.aboutToQuit.connect(db_manager.flush)
     exit_code = app.exec()
     
     # Cleanup
@@ -196,4 +208,6 @@ def main():
     sys.exit(exit_code)
 
 if __name__ == "__main__":
+    # Required for process pools in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
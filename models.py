@@ -150,6 +150,26 @@ SCHEMA = {
         )
     """,
     
+    # =========================================================================
+    # GENE_HITS TABLE - One row per AMR / virulence / KEGG hit
+    # =========================================================================
+    'gene_hits': """
+        CREATE TABLE IF NOT EXISTS gene_hits (
+            hit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            analysis_id INTEGER,
+            source TEXT NOT NULL,
+            query_id TEXT,
+            gene TEXT NOT NULL COLLATE NOCASE,
+            subject_title TEXT,
+            identity REAL,
+            evalue REAL,
+            bitscore REAL,
+            gene_class TEXT COLLATE NOCASE,
+            FOREIGN KEY (project_id) REFERENCES projects(project_id) ON DELETE CASCADE
+        )
+    """,
+    
     # =========================================================================
     # SYSTEM_LOGS TABLE - Application event logging
     # =========================================================================
@@ -206,7 +226,332 @@ INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_notifications_read ON notifications(is_read)",
     "CREATE INDEX IF NOT EXISTS idx_notifications_timestamp ON notifications(timestamp DESC)",
     "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON system_logs(timestamp DESC)",
-    "CREATE INDEX IF NOT EXISTS idx_logs_level ON system_logs(log_level)"
+    "CREATE INDEX IF NOT EXISTS idx_logs_level ON system_logs(log_level)",
+    # Cross-project hit lookups ("which isolates carry blaTEM") stay index-only
+    "CREATE INDEX IF NOT EXISTS idx_hits_gene ON gene_hits(gene, project_id, identity)",
+    "CREATE INDEX IF NOT EXISTS idx_hits_class ON gene_hits(gene_class, project_id)",
+    "CREATE INDEX IF NOT EXISTS idx_hits_project ON gene_hits(project_id, source)"
+]
+
+# =========================================================================
+# FULL-TEXT SEARCH (FTS5)
+# search_documents holds one row per searchable item (project, annotated
+# gene, AMR/VFDB hit); search_index is an external-content FTS5 index over
+# it. Triggers keep both in sync, so saving results updates the index.
+# =========================================================================
+SEARCH_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS search_documents (
+        doc_id INTEGER PRIMARY KEY,
+        kind TEXT NOT NULL,
+        project_id INTEGER,
+        ref TEXT,
+        title TEXT,
+        body TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_search_docs_project ON search_documents(project_id, kind)",
+    "CREATE INDEX IF NOT EXISTS idx_search_docs_ref ON search_documents(kind, ref)",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body, kind,
+        content='search_documents', content_rowid='doc_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+
+    # Documents -> FTS index
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_docs_insert AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_index(rowid, title, body, kind) VALUES (new.doc_id, new.title, new.body, new.kind);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_docs_delete AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_index(search_index, rowid, title, body, kind)
+        VALUES ('delete', old.doc_id, old.title, old.body, old.kind);
+    END
+    """,
+
+    # Projects -> documents
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_project_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO search_documents(kind, project_id, ref, title, body)
+        VALUES ('project', new.project_id, new.project_id, new.filename, COALESCE(new.notes, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_project_update AFTER UPDATE OF filename, notes ON projects BEGIN
+        DELETE FROM search_documents WHERE project_id = old.project_id AND kind = 'project';
+        INSERT INTO search_documents(kind, project_id, ref, title, body)
+        VALUES ('project', new.project_id, new.project_id, new.filename, COALESCE(new.notes, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_project_delete AFTER DELETE ON projects BEGIN
+        DELETE FROM search_documents WHERE project_id = old.project_id;
+    END
+    """,
+
+    # Gene hits -> documents
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_hit_insert AFTER INSERT ON gene_hits BEGIN
+        INSERT INTO search_documents(kind, project_id, ref, title, body)
+        VALUES ('hit', new.project_id, new.hit_id, new.gene,
+                COALESCE(new.subject_title, '') || ' ' || COALESCE(new.gene_class, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_search_hit_delete AFTER DELETE ON gene_hits BEGIN
+        DELETE FROM search_documents WHERE kind = 'hit' AND ref = old.hit_id;
+    END
+    """
+]
+
+# Fills search_documents from existing rows (first run on an older database)
+SEARCH_BACKFILL = [
+    """
+    INSERT INTO search_documents(kind, project_id, ref, title, body)
+    SELECT 'project', project_id, project_id, filename, COALESCE(notes, '') FROM projects
+    """,
+    """
+    INSERT INTO search_documents(kind, project_id, ref, title, body)
+    SELECT 'hit', project_id, hit_id, gene,
+           COALESCE(subject_title, '') || ' ' || COALESCE(gene_class, '')
+    FROM gene_hits
+    """
+]
+
+# =========================================================================
+# DASHBOARD SUMMARY TABLES
+# Running totals maintained by triggers, so the dashboard reads a few rows
+# instead of aggregating analyses/projects/notifications on every refresh.
+#   stats_totals  named counters (completed projects, storage, alerts)
+#   stats_module  completed analyses and processing seconds per module
+#   stats_daily   analyses started per day and module (timeline chart)
+# =========================================================================
+STATS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS stats_totals (
+        name TEXT PRIMARY KEY,
+        value REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_module (
+        module_name TEXT PRIMARY KEY,
+        completed INTEGER NOT NULL DEFAULT 0,
+        seconds REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_daily (
+        day TEXT NOT NULL,
+        module_name TEXT NOT NULL,
+        started INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, module_name)
+    ) WITHOUT ROWID
+    """,
+
+    # Analyses -> per-module totals and daily counts
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_analysis_insert AFTER INSERT ON analyses BEGIN
+        INSERT INTO stats_daily(day, module_name, started)
+        SELECT DATE(new.start_time), new.module_name, 1 WHERE new.start_time IS NOT NULL
+        ON CONFLICT(day, module_name) DO UPDATE SET started = started + 1;
+        INSERT INTO stats_module(module_name, completed, seconds)
+        SELECT new.module_name, 1, COALESCE(new.processing_time_seconds, 0) WHERE new.status = 'completed'
+        ON CONFLICT(module_name) DO UPDATE SET completed = completed + 1, seconds = seconds + excluded.seconds;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_analysis_update
+    AFTER UPDATE OF module_name, start_time, status, processing_time_seconds ON analyses BEGIN
+        UPDATE stats_daily SET started = started - 1
+        WHERE old.start_time IS NOT NULL AND day = DATE(old.start_time) AND module_name = old.module_name;
+        UPDATE stats_module
+        SET completed = completed - 1, seconds = seconds - COALESCE(old.processing_time_seconds, 0)
+        WHERE old.status = 'completed' AND module_name = old.module_name;
+        INSERT INTO stats_daily(day, module_name, started)
+        SELECT DATE(new.start_time), new.module_name, 1 WHERE new.start_time IS NOT NULL
+        ON CONFLICT(day, module_name) DO UPDATE SET started = started + 1;
+        INSERT INTO stats_module(module_name, completed, seconds)
+        SELECT new.module_name, 1, COALESCE(new.processing_time_seconds, 0) WHERE new.status = 'completed'
+        ON CONFLICT(module_name) DO UPDATE SET completed = completed + 1, seconds = seconds + excluded.seconds;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_analysis_delete AFTER DELETE ON analyses BEGIN
+        UPDATE stats_daily SET started = started - 1
+        WHERE old.start_time IS NOT NULL AND day = DATE(old.start_time) AND module_name = old.module_name;
+        UPDATE stats_module
+        SET completed = completed - 1, seconds = seconds - COALESCE(old.processing_time_seconds, 0)
+        WHERE old.status = 'completed' AND module_name = old.module_name;
+    END
+    """,
+
+    # Projects -> completed genomes and storage
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_project_insert AFTER INSERT ON projects BEGIN
+        UPDATE stats_totals SET value = value + (new.status = 'completed') WHERE name = 'completed_projects';
+        UPDATE stats_totals SET value = value + COALESCE(new.file_size, 0) WHERE name = 'storage_bytes';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_project_update AFTER UPDATE OF status, file_size ON projects BEGIN
+        UPDATE stats_totals SET value = value + (new.status = 'completed') - (old.status = 'completed')
+        WHERE name = 'completed_projects';
+        UPDATE stats_totals SET value = value + COALESCE(new.file_size, 0) - COALESCE(old.file_size, 0)
+        WHERE name = 'storage_bytes';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_project_delete AFTER DELETE ON projects BEGIN
+        UPDATE stats_totals SET value = value - (old.status = 'completed') WHERE name = 'completed_projects';
+        UPDATE stats_totals SET value = value - COALESCE(old.file_size, 0) WHERE name = 'storage_bytes';
+    END
+    """,
+
+    # Notifications -> unread high-priority alerts
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_notification_insert AFTER INSERT ON notifications BEGIN
+        UPDATE stats_totals SET value = value + (new.is_read = 0 AND new.priority = 'high')
+        WHERE name = 'critical_alerts';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_notification_update AFTER UPDATE OF is_read, priority ON notifications BEGIN
+        UPDATE stats_totals
+        SET value = value + (new.is_read = 0 AND new.priority = 'high') - (old.is_read = 0 AND old.priority = 'high')
+        WHERE name = 'critical_alerts';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stats_notification_delete AFTER DELETE ON notifications BEGIN
+        UPDATE stats_totals SET value = value - (old.is_read = 0 AND old.priority = 'high')
+        WHERE name = 'critical_alerts';
+    END
+    """
+]
+
+# Recomputes the summary tables from the base tables (first run, consistency checks)
+STATS_REBUILD = [
+    "DELETE FROM stats_totals",
+    "DELETE FROM stats_module",
+    "DELETE FROM stats_daily",
+    """
+    INSERT INTO stats_totals(name, value) VALUES
+        ('completed_projects', (SELECT COUNT(*) FROM projects WHERE status = 'completed')),
+        ('storage_bytes', (SELECT COALESCE(SUM(file_size), 0) FROM projects)),
+        ('critical_alerts', (SELECT COUNT(*) FROM notifications WHERE is_read = 0 AND priority = 'high'))
+    """,
+    """
+    INSERT INTO stats_module(module_name, completed, seconds)
+    SELECT module_name, COUNT(*), COALESCE(SUM(processing_time_seconds), 0)
+    FROM analyses WHERE status = 'completed'
+    GROUP BY module_name
+    """,
+    """
+    INSERT INTO stats_daily(day, module_name, started)
+    SELECT DATE(start_time), module_name, COUNT(*)
+    FROM analyses WHERE start_time IS NOT NULL
+    GROUP BY DATE(start_time), module_name
+    """
+]
+
+# =========================================================================
+# JOB QUEUE - Persistent analysis queue (see core/jobs)
+# status: queued -> running -> completed | failed | cancelled
+# A failed job with attempts left goes back to queued after run_after.
+# =========================================================================
+JOBS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        project_id INTEGER,
+        input_path TEXT,
+        params TEXT,
+        priority INTEGER DEFAULT 0,
+        threads INTEGER DEFAULT 1,
+        memory_mb INTEGER DEFAULT 512,
+        status TEXT DEFAULT 'queued',
+        attempts INTEGER DEFAULT 0,
+        max_attempts INTEGER DEFAULT 1,
+        run_after TIMESTAMP,
+        analysis_id INTEGER,
+        error_message TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP,
+        FOREIGN KEY (project_id) REFERENCES projects(project_id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS job_dependencies (
+        job_id INTEGER NOT NULL,
+        depends_on INTEGER NOT NULL,
+        PRIMARY KEY (job_id, depends_on),
+        FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE,
+        FOREIGN KEY (depends_on) REFERENCES jobs(job_id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    """,
+    # Dispatch order: highest priority first, then FIFO
+    "CREATE INDEX IF NOT EXISTS idx_jobs_dispatch ON jobs(status, priority DESC, job_id)",
+    "CREATE INDEX IF NOT EXISTS idx_job_deps_parent ON job_dependencies(depends_on)"
+]
+
+# =========================================================================
+# METRICS - Timing spans of the engines (see utils/profiling.py)
+# Only written while profiling is enabled ('profiling' setting or
+# MICROGENOME_PROFILE); parent is the enclosing span of the same thread.
+# =========================================================================
+METRICS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS metrics (
+        metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        name TEXT NOT NULL,
+        parent TEXT,
+        duration_ms REAL NOT NULL,
+        count INTEGER,
+        bytes INTEGER,
+        ok INTEGER DEFAULT 1,
+        context TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(name, timestamp)"
+]
+
+# =========================================================================
+# ARCHIVE DATABASE (attached as "archive")
+# Old system_logs / notifications rows are moved here by the retention job;
+# same columns as the live tables, without foreign keys.
+# =========================================================================
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.system_logs (
+        log_id INTEGER PRIMARY KEY,
+        timestamp TIMESTAMP,
+        log_level TEXT,
+        module TEXT,
+        message TEXT,
+        project_id INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_logs_project ON system_logs(project_id, timestamp)",
+    """
+    CREATE TABLE IF NOT EXISTS archive.notifications (
+        notification_id INTEGER PRIMARY KEY,
+        timestamp TIMESTAMP,
+        type TEXT,
+        priority TEXT,
+        message TEXT,
+        is_read INTEGER,
+        related_project_id INTEGER,
+        action_url TEXT
+    )
+    """
 ]
 
 # =========================================================================
@@ -220,5 +565,8 @@ DEFAULT_SETTINGS = {
     'auto_backup': 'false',
     'blast_evalue': '1e-5',
     'prodigal_mode': 'single',
-    'default_output_format': 'genbank'
+    'default_output_format': 'genbank',
+    'log_retention_days': '90',
+    'notification_retention_days': '30',
+    'profiling': 'off'
 }
\ No newline at end of file
@@ -9,17 +9,25 @@ import random
 from database_manager import DatabaseManager
 
 
-def initialize_database(db_path: str = "microgenome.db"):
-    """Create fresh database with schema"""
+def initialize_database(db_path: str = "microgenome.db", reset: bool = False):
+    """Create the database or migrate an existing one (reset=True starts from scratch)"""
     
-    # Remove old database if exists
-    if os.path.exists(db_path):
+    # Remove old database only when asked to: migrations upgrade it in place
+    if reset and os.path.exists(db_path):
         print(f"⚠️  Removing existing database: {db_path}")
         os.remove(db_path)
-    
-    print("🔧 Creating new database...")
+        # WAL sidecar files would otherwise be replayed into the new database,
+        # and the archive's log/notification ids would clash with the new ones
+        archive_path = os.path.splitext(db_path)[0] + "_archive.db"
+        for path in (db_path + "-wal", db_path + "-shm",
+                     archive_path, archive_path + "-wal", archive_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    exists = os.path.exists(db_path)
+    print("🔧 Upgrading existing database..." if exists else "🔧 Creating new database...")
     db = DatabaseManager(db_path)
-    print("✅ Database schema created successfully!")
+    print(f"✅ Database schema is at version {db.schema_version}")
     
     return db
 
@@ -192,6 +200,10 @@ def test_queries(db: DatabaseManager):
     for act in activity:
         print(f"   {act['filename']} - {act['module_name']} ({act['status']})")
     
+    # Summary tables vs. a full recount
+    consistent = db.rebuild_dashboard_stats()
+    print(f"\n🧮 Dashboard summary tables: {'consistent' if consistent else 'out of sync (rebuilt)'}")
+    
     print("\n✅ All queries executed successfully!")
 
 
@@ -202,8 +214,12 @@ def main():
     print("  🧬 MicroGenome Analyzer - Database Setup")
     print("=" * 60)
     
-    # Initialize database
-    db = initialize_database()
+    # Initialize (or upgrade) database
+    reset = False
+    if os.path.exists("microgenome.db"):
+        print("\n❓ Database already exists. Delete it and start over? (y/n): ", end="")
+        reset = input().strip().lower() == 'y'
+    db = initialize_database(reset=reset)
     
     # Ask user if they want sample data
     print("\n❓ Do you want to add sample data for testing? (y/n): ", end="")
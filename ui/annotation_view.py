@@ -262,9 +262,11 @@ class ResultTab(QWidget):
 # 🚀 MAIN ANNOTATION VIEW
 # ==============================================================================
 class AnnotationView(QWidget):
-    def __init__(self, db):
+    def __init__(self, db, scheduler=None):
         super().__init__()
         self.db = db
+        self.scheduler = scheduler # Persistent job queue (None: run the engine directly)
+        self.job = None # (job_id, project_id) of the queued run
         self.worker = None
         self.remote_worker = None # For Online Check
         self.current_project_id = None
@@ -334,6 +336,10 @@ class AnnotationView(QWidget):
         self.terminal.setStyleSheet("background: #111C44; color: #00E676; font-family: Consolas; border: 2px solid #2B3674; border-radius: 6px;")
         layout.addWidget(self.terminal)
 
+        if self.scheduler:
+            self.scheduler.job_started.connect(self.on_job_started)
+            self.scheduler.job_finished.connect(self.on_job_finished)
+
     def setup_header(self, layout):
         container = QFrame()
         container.setStyleSheet("background: white; border-radius: 12px; border: 2px solid #2B3674;")
@@ -398,6 +404,12 @@ class AnnotationView(QWidget):
         self.terminal.clear()
         self.terminal.append("> 🚀 Starting 5-Step Annotation Pipeline...")
         
+        if self.scheduler and self.current_project_id:
+            job_id = self.scheduler.submit("annotation", self.full_file_path, self.current_project_id)
+            self.job = (job_id, self.current_project_id)
+            self.terminal.append(f"> ⏳ Queued as job #{job_id} (starts when CPU/RAM are free)")
+            return
+
         if self.db and self.current_project_id:
             self.db.start_analysis(self.current_project_id, "annotation")
             
@@ -406,15 +418,37 @@ class AnnotationView(QWidget):
         self.worker.finished_signal.connect(self.on_finished)
         self.worker.start()
 
+    def on_job_started(self, job_id, worker):
+        if self.job and self.job[0] == job_id:
+            self.worker = worker
+            worker.log_signal.connect(self.terminal.append)
+
+    def on_job_finished(self, job_id, success, msg):
+        if not self.job or self.job[0] != job_id: return
+        project_id = self.job[1]
+        self.job = None
+        self.show_finished(success, msg)
+        # Results and search index were saved by the scheduler
+        if success and self.db:
+            self.db.update_project_status(project_id, "completed")
+
     def on_finished(self, success, msg):
+        self.show_finished(success, msg)
+        if success and self.db and self.current_project_id:
+            self.db.update_project_status(self.current_project_id, "completed")
+            # Make the product names searchable from the dashboard
+            base = os.path.basename(self.full_file_path).split('.')[0]
+            tsv = os.path.join(os.getcwd(), "results", "annotation", f"{base}_annotation.tsv")
+            try: self.db.index_annotations(self.current_project_id, tsv)
+            except Exception as e: self.terminal.append(f"> ⚠️ Search index not updated: {e}")
+
+    def show_finished(self, success, msg):
         self.btn_run.setEnabled(True)
         self.btn_run.setStyleSheet("background-color: #4318FF; color: white; border: 2px solid #2B3674;")
         if success:
             self.terminal.append("> ✅ Pipeline Complete. Loading Results...")
             self.load_results()
             self.btn_online.setEnabled(True) # ENABLE ONLINE CHECK
-            if self.db and self.current_project_id:
-                self.db.update_project_status(self.current_project_id, "completed")
         else:
             self.terminal.append(f"> ❌ Error: {msg}")
 
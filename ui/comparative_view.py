@@ -210,6 +210,11 @@ class ComparativeView(QWidget):
             self.img_label.setPixmap(pixmap.scaled(self.img_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
             self.log(f"✅ Plot Generated Successfully.")
             self.log(f"📊 Synteny Matches Found: {matches}")
+            if "ani" in data:
+                self.log(f"🧬 ANI: {data['ani']:.2f}% "
+                         f"(Q→R {data['ani_query_ref']:.2f}%, R→Q {data['ani_ref_query']:.2f}%)")
+                self.log(f"📏 Aligned Fraction: {data['coverage_query']*100:.1f}% query / "
+                         f"{data['coverage_ref']*100:.1f}% reference")
             self.log(f"💾 Image saved at: {plot_path}")
             
             # --- DB: SAVE RESULTS ---
@@ -9,9 +9,10 @@ from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QColor, QIcon
 
 class DashboardView(QWidget):
-    def __init__(self, navigation_callback):
+    def __init__(self, navigation_callback, db_manager=None):
         super().__init__()
         self.nav_callback = navigation_callback
+        self.db = db_manager
         
         # Scroll Layout
         self.scroll = QScrollArea()
@@ -93,6 +94,22 @@ class DashboardView(QWidget):
         
         self.layout.addLayout(container)
 
+        # Data search results (projects, annotated genes, AMR/VFDB hits)
+        self.search_results = QTableWidget(0, 3)
+        self.search_results.setHorizontalHeaderLabels(["Type", "Project", "Match"])
+        self.search_results.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.search_results.verticalHeader().setVisible(False)
+        self.search_results.setShowGrid(False)
+        self.search_results.setMaximumHeight(260)
+        self.search_results.setStyleSheet("""
+            QTableWidget { 
+                border: 1px solid #E0E5F2; border-radius: 12px;
+                background-color: white; color: #2B3674; font-size: 13px;
+            }
+        """)
+        self.search_results.hide()
+        self.layout.addWidget(self.search_results)
+
     def create_workflow_grid(self):
         grid = QGridLayout()
         grid.setSpacing(25)
@@ -101,7 +118,8 @@ class DashboardView(QWidget):
         self.add_phase_card(grid, 0, 0, "PHASE 1: ESSENTIALS", "📥", "#E3F2FD", "#1565C0", [
             ("Data Manager", 10), 
             ("Reference Manager", 11), 
-            ("Quality Control (QC)", 9) 
+            ("Quality Control (QC)", 9),
+            ("Job Queue", 15)
         ])
 
         # --- PHASE 2: GENOMICS ---
@@ -250,19 +268,49 @@ class DashboardView(QWidget):
             "import": (10, "Data Manager"),
             "reference": (11, "Reference Manager"),
             "genome": (11, "Reference Manager"),
-            "ncbi": (11, "Reference Manager")
+            "ncbi": (11, "Reference Manager"),
+            "job": (15, "Job Queue"),
+            "queue": (15, "Job Queue")
         }
         
-        found = False
-        for key, (idx, name) in mapping.items():
-            if key in query:
-                self.nav_callback(idx if idx is not None else -1, name)
-                self.search_input.clear()
-                found = True
-                return
-        
-        if not found:
-            self.search_input.setText("❌ Module not found. Try 'CRISPR' or 'BLAST'...")
+        # Keywords jump to a module only as the whole query ("blast") or after
+        # "open"/"go" ("open rna"); anything else ("16S rRNA protein") is a data search
+        words = query.split(None, 1)
+        target = words[1] if len(words) == 2 and words[0] in ("open", "go") else query
+        names = {name.lower(): (idx, name) for idx, name in mapping.values()}
+        if target in mapping or target in names:
+            idx, name = mapping.get(target) or names[target]
+            self.search_results.hide()
+            self.nav_callback(idx if idx is not None else -1, name)
+            self.search_input.clear()
+            return
+
+        if self.search_data(query):
+            return
+
+        self.search_input.setText("❌ Nothing found. Try 'CRISPR' or 'BLAST'...")
+
+    def search_data(self, query):
+        """Full-text search over saved results; returns True if anything matched."""
+        if not self.db:
+            return False
+        try:
+            results = self.db.search(query, limit=50)
+        except Exception:
+            results = []
+        if not results:
+            self.search_results.hide()
+            return False
+
+        labels = {"project": "📁 Project", "annotation": "🧬 Gene", "hit": "💊 AMR/VF Hit"}
+        self.search_results.setRowCount(len(results))
+        for row, item in enumerate(results):
+            self.search_results.setItem(row, 0, QTableWidgetItem(labels.get(item['kind'], item['kind'])))
+            self.search_results.setItem(row, 1, QTableWidgetItem(item['filename'] or ""))
+            self.search_results.setItem(row, 2, QTableWidgetItem(item['snippet'] or item['title'] or ""))
+        self.search_results.show()
+        self.add_log_entry("Search", f"'{query}': {len(results)} matches", "Completed")
+        return True
 
     def add_log_entry(self, module, action, status):
         row = self.log_table.rowCount()
@@ -3,8 +3,9 @@ from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QColor
 
 class FooterWidget(QFrame):
-    def __init__(self):
+    def __init__(self, monitor=None):
         super().__init__()
+        self.monitor = monitor # ResourceMonitor (sampled on its own thread)
         self.setFixedHeight(35)
         self.setStyleSheet("""
             QFrame { background-color: #ffffff; border-top: 1px solid #E0E5F2; }
@@ -43,20 +44,30 @@ class FooterWidget(QFrame):
         layout.addStretch()
         
         # ZONE 3: RESOURCES (Right - Live Update)
-        self.res_label = QLabel("RAM: 450MB  |  CPU: 2%")
+        self.res_label = QLabel("RAM: --  |  CPU: --")
         layout.addWidget(self.res_label)
 
-        # Timer to simulate live resource updates
+        # Timer reads the latest sample (cheap: no measuring on the GUI thread)
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_resources)
         self.timer.start(2000)
 
     def update_resources(self):
-        # In a real app, use 'psutil' here. For now, we simulate "Live" behavior.
-        import random
-        cpu = random.randint(1, 15)
-        ram = random.randint(400, 550)
-        self.res_label.setText(f"RAM: {ram}MB  |  CPU: {cpu}%")
+        sample = self.monitor.latest() if self.monitor else None
+        if not sample:
+            if self.monitor and not self.monitor.available:
+                self.res_label.setText("Resources: install psutil")
+            return
+        app, tools = sample["app"], sample["tools"]
+        text = f"RAM: {app['rss_mb'] + tools['rss_mb']:.0f}MB  |  CPU: {sample['cpu_percent']:.0f}%"
+        if sample["jobs"]:
+            text += f"  |  Jobs: {len(sample['jobs'])} ({tools['cpu_percent']:.0f}% tools)"
+        self.res_label.setText(text)
+        self.res_label.setToolTip(
+            f"App: {app['rss_mb']:.0f} MB, {app['cpu_percent']:.0f}% CPU\n"
+            f"Tools: {tools['processes']} processes, {tools['rss_mb']:.0f} MB, {tools['cpu_percent']:.0f}% CPU, "
+            f"I/O {tools['read_mb_s']:.1f}/{tools['write_mb_s']:.1f} MB/s\n"
+            f"System: {sample['cpu_percent']:.0f}% CPU, {sample['mem_percent']:.0f}% RAM")
 
     def copy_citation(self):
         clipboard = QApplication.clipboard()
@@ -0,0 +1,151 @@
+import os
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor
+
+STATUS_COLORS = {
+    "queued": "#FFB547", "running": "#4318FF", "completed": "#05CD99",
+    "failed": "#E31A1A", "cancelled": "#A3AED0",
+}
+COLUMNS = ["Job", "Type", "Input", "Status", "Attempts", "CPU", "RAM", "Disk I/O", "Started", "Message"]
+
+
+class JobsView(QWidget):
+    """Job queue with live resource usage of running jobs (from the ResourceMonitor)"""
+
+    def __init__(self, db_manager, scheduler=None, monitor=None):
+        super().__init__()
+        self.db = db_manager
+        self.scheduler = scheduler
+        self.monitor = monitor
+
+        self.layout = QVBoxLayout(self)
+        self.layout.setSpacing(20)
+        self.layout.setContentsMargins(40, 40, 40, 40)
+
+        # 1. Header
+        self.create_header()
+
+        # 2. Jobs Table
+        self.create_table()
+
+        # 3. Actions
+        self.create_action_bar()
+
+        # Refresh only while the page is visible
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def create_header(self):
+        header = QHBoxLayout()
+        title_box = QVBoxLayout()
+        title = QLabel("🗂️ Job Queue")
+        title.setStyleSheet("font-size: 26px; font-weight: 900; color: #1B2559;")
+        desc = QLabel("Queued and running analyses with their CPU, memory and disk usage.")
+        desc.setStyleSheet("font-size: 14px; color: #707EAE; font-family: 'Segoe UI';")
+        title_box.addWidget(title)
+        title_box.addWidget(desc)
+        header.addLayout(title_box)
+        header.addStretch()
+
+        # Live system usage badge
+        self.lbl_usage = QLabel("CPU: --  |  RAM: --")
+        self.lbl_usage.setStyleSheet("""
+            background-color: #E3F2FD; color: #1565C0; font-weight: bold;
+            padding: 10px 20px; border-radius: 12px; font-size: 14px;
+        """)
+        header.addWidget(self.lbl_usage)
+        self.layout.addLayout(header)
+
+        self.lbl_history = QLabel("")
+        self.lbl_history.setStyleSheet("font-size: 12px; color: #707EAE;")
+        self.layout.addWidget(self.lbl_history)
+
+    def create_table(self):
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(len(COLUMNS) - 1, QHeaderView.Stretch)
+        self.table.setStyleSheet("""
+            QTableWidget { background: white; border: 1px solid #E0E5F2; border-radius: 12px; gridline-color: #F4F7FE; }
+            QHeaderView::section { background: #F4F7FE; color: #A3AED0; font-weight: bold; border: none; padding: 8px; }
+        """)
+        self.layout.addWidget(self.table)
+
+    def create_action_bar(self):
+        bar = QHBoxLayout()
+        bar.addStretch()
+        btn_refresh = QPushButton("🔄 Refresh")
+        btn_refresh.clicked.connect(self.refresh)
+        self.btn_cancel = QPushButton("✖ Cancel Selected")
+        self.btn_cancel.clicked.connect(self.cancel_selected)
+        self.btn_cancel.setEnabled(self.scheduler is not None)
+        for btn in (btn_refresh, self.btn_cancel):
+            btn.setCursor(Qt.PointingHandCursor)
+            btn.setFixedHeight(40)
+            btn.setStyleSheet("""
+                QPushButton { background: #F4F7FE; color: #4318FF; font-weight: bold; border-radius: 10px; padding: 0 20px; }
+                QPushButton:hover { background: #4318FF; color: white; }
+            """)
+            bar.addWidget(btn)
+        self.layout.addLayout(bar)
+
+    # --- LOGIC ---
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(2000)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        sample = self.monitor.latest() if self.monitor else None
+        live = sample["jobs"] if sample else {}
+        if sample:
+            self.lbl_usage.setText(f"CPU: {sample['cpu_percent']:.0f}%  |  RAM: {sample['mem_percent']:.0f}%")
+            history = self.monitor.history(60)
+            tools_cpu = [s["tools"]["cpu_percent"] for s in history]
+            tools_ram = [s["tools"]["rss_mb"] for s in history]
+            self.lbl_history.setText(
+                f"Last minute: tools CPU avg {sum(tools_cpu) / len(tools_cpu):.0f}% / peak {max(tools_cpu):.0f}%, "
+                f"tools RAM peak {max(tools_ram):.0f} MB, app RAM {sample['app']['rss_mb']:.0f} MB")
+
+        jobs = self.db.get_jobs(limit=200) if self.db else []
+        self.table.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            usage = live.get(job['job_id'])
+            if usage:
+                cpu = f"{usage['cpu_percent']:.0f}%"
+                ram = f"{usage['rss_mb']:.0f} MB"
+                io = f"{usage['read_mb_s']:.1f}/{usage['write_mb_s']:.1f} MB/s"
+            elif job['cpu_seconds'] is not None:
+                cpu = f"{job['cpu_seconds']:.0f} s"
+                ram = f"{job['peak_rss_mb']:.0f} MB peak"
+                io = f"{job['read_mb']:.0f}/{job['write_mb']:.0f} MB"
+            else:
+                cpu = ram = io = ""
+
+            values = [str(job['job_id']), job['kind'], os.path.basename(job['input_path'] or ""),
+                      job['status'], f"{job['attempts']}/{job['max_attempts']}", cpu, ram, io,
+                      job['started_at'] or "", job['error_message'] or ""]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col == 3:
+                    item.setForeground(QColor(STATUS_COLORS.get(value, "#2B3674")))
+                self.table.setItem(row, col, item)
+
+    def cancel_selected(self):
+        rows = {index.row() for index in self.table.selectedIndexes()}
+        for row in rows:
+            item = self.table.item(row, 0)
+            if item and self.table.item(row, 3).text() == "queued":
+                self.scheduler.cancel(int(item.text()))
+        self.refresh()
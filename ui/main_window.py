@@ -1,3 +1,6 @@
+import time
+import logging
+from importlib import import_module
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QLabel, QStackedWidget, QFrame, 
@@ -9,22 +12,31 @@ from PySide6.QtGui import QIcon
 # Import Views (Existing)
 from ui.dashboard_view import DashboardView
 from ui.footer_widget import FooterWidget
-from ui.annotation_view import AnnotationView
-from ui.comparative_view import ComparativeView
-from ui.phylo_view import PhyloView
-from ui.specialized_view import SpecializedView
-from ui.structure_view import StructureView
-from ui.synbio_view import SynBioView
-from ui.variant_view import VariantView
-from ui.report_view import ReportView
-from ui.qc_view import QCView
-from ui.data_view import DataManagerView
-from ui.reference_view import ReferenceManagerView
-
-# --- NEW MODULES ADDED HERE ---
-from ui.assembly_view import AssemblyView
-from ui.blast_view import BlastView
-from ui.rnaseq_view import RNASeqView
+
+from core.jobs import JobScheduler
+from core.monitor import ResourceMonitor
+
+# Pages after the dashboard, in stack order: (module, view class, constructor args).
+# A view module is imported and its page built on the first visit, so
+# matplotlib, pandas, Biopython etc. are not loaded before they are needed.
+PAGES = [
+    ("ui.annotation_view", "AnnotationView", ("db", "scheduler")),     # 1
+    ("ui.comparative_view", "ComparativeView", ("db",)),               # 2
+    ("ui.phylo_view", "PhyloView", ("db",)),                           # 3
+    ("ui.specialized_view", "SpecializedView", ("db", "scheduler")),   # 4
+    ("ui.structure_view", "StructureView", ()),                        # 5
+    ("ui.synbio_view", "SynBioView", ("db",)),                         # 6
+    ("ui.variant_view", "VariantView", ("db",)),                       # 7
+    ("ui.report_view", "ReportView", ("db",)),                         # 8
+    ("ui.qc_view", "QCView", ("db",)),                                 # 9
+    ("ui.data_view", "DataManagerView", ("db",)),                      # 10
+    ("ui.reference_view", "ReferenceManagerView", ("db",)),            # 11
+    # --- NEWLY ADDED MODULES ---
+    ("ui.assembly_view", "AssemblyView", ("db",)),                     # 12 Genome Assembly (Phase 2)
+    ("ui.blast_view", "BlastView", ("db",)),                           # 13 BLAST Alignment (Phase 2)
+    ("ui.rnaseq_view", "RNASeqView", ("db",)),                         # 14 RNA-Seq Analysis (Phase 4)
+    ("ui.jobs_view", "JobsView", ("db", "scheduler", "monitor")),      # 15 Job Queue
+]
 
 class MainWindow(QMainWindow):
     def __init__(self, db_manager):
@@ -32,6 +44,13 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("MicroGenome Analyzer Pro v3.0")
         self.resize(1400, 950)
         self.db = db_manager
+        # CPU / RAM / I/O sampling on a background thread (footer, job queue)
+        self.monitor = ResourceMonitor()
+        self.monitor.start()
+        # Persistent job queue; annotation/screening runs wait here for CPU/RAM
+        self.scheduler = JobScheduler(self.db, monitor=self.monitor) if self.db else None
+        if self.scheduler:
+            self.scheduler.start()
 
         # --- GLOBAL STYLE FIX ---
         # Forces Dark Text (#333333) on White Backgrounds everywhere
@@ -101,7 +120,7 @@ class MainWindow(QMainWindow):
         self.layout.addWidget(self.pages)
         
         # 3. SYSTEM FOOTER
-        self.footer = FooterWidget()
+        self.footer = FooterWidget(self.monitor)
         self.layout.addWidget(self.footer)
 
         # Initialize Logic
@@ -140,47 +159,37 @@ class MainWindow(QMainWindow):
         self.layout.addWidget(self.navbar)
 
     def init_pages(self):
-        """Initializes the Stacked Widget Pages"""
+        """Initializes the Stacked Widget Pages (views are built on first visit)"""
         # 0. Dashboard
-        self.dashboard = DashboardView(self.navigate_from_dashboard)
+        self.dashboard = DashboardView(self.navigate_from_dashboard, self.db)
         self.pages.addWidget(self.dashboard)
-        
-        # 1. Annotation
-        self.pages.addWidget(AnnotationView(self.db))
-        # 2. Comparative
-        self.pages.addWidget(ComparativeView(self.db))
-        # 3. Phylogenetics
-        self.pages.addWidget(PhyloView(self.db))
-        # 4. Specialized
-        self.pages.addWidget(SpecializedView(self.db))
-        # 5. Structure
-        self.pages.addWidget(StructureView())
-        # 6. SynBio
-        self.pages.addWidget(SynBioView(self.db))
-        # 7. Variant
-        self.pages.addWidget(VariantView(self.db))
-        # 8. Reports
-        self.pages.addWidget(ReportView(self.db))
-        
-        # 9. QC View
-        self.pages.addWidget(QCView(self.db))
-        
-        # 10. Data Manager
-        self.pages.addWidget(DataManagerView(self.db))
-
-        # 11. Reference Manager
-        self.pages.addWidget(ReferenceManagerView(self.db))
-
-        # --- NEWLY ADDED MODULES ---
-        
-        # 12. Genome Assembly (Phase 2)
-        self.pages.addWidget(AssemblyView(self.db))
-        
-        # 13. BLAST Alignment (Phase 2)
-        self.pages.addWidget(BlastView(self.db))
-        
-        # 14. RNA-Seq Analysis (Phase 4)
-        self.pages.addWidget(RNASeqView(self.db))
+        self.built_pages = {0}
+
+        # 1-14. Placeholders, replaced in build_page()
+        for _ in PAGES:
+            self.pages.addWidget(QWidget())
+
+    def build_page(self, index):
+        """Imports and builds the view at `index` once; returns False if it failed"""
+        if index in self.built_pages:
+            return True
+        module_name, class_name, args = PAGES[index - 1]
+        started = time.perf_counter()
+        try:
+            view_class = getattr(import_module(module_name), class_name)
+            view = view_class(*(getattr(self, arg) for arg in args))
+        except Exception as e:
+            logging.error(f"Could not open {class_name}: {e}")
+            QMessageBox.critical(self, "Module Error", f"Could not open this module:\n{e}")
+            return False
+
+        placeholder = self.pages.widget(index)
+        self.pages.removeWidget(placeholder)
+        placeholder.deleteLater()
+        self.pages.insertWidget(index, view)
+        self.built_pages.add(index)
+        logging.info(f"{class_name} built in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return True
 
     def navigate_from_dashboard(self, index, module_name):
         if index == -1:
@@ -190,6 +199,8 @@ class MainWindow(QMainWindow):
             self.dashboard.add_log_entry(module_name, "Module Accessed", "Started")
 
     def switch_page(self, index):
+        if not self.build_page(index):
+            return
         self.pages.setCurrentIndex(index)
         self.btn_home.setVisible(index != 0)
 
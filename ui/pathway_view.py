@@ -5,7 +5,8 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap, QColor, QFont
 
-from core.pathways.pathway_engine import PathwayWorker
+from core.pathways.pathway_engine import PathwayWorker, PathwayBatchWorker
+from core.pathways.profile_logic import genome_stem
 
 class PathwayView(QWidget):
     def __init__(self, db_manager=None):
@@ -13,6 +14,7 @@ class PathwayView(QWidget):
         self.db = db_manager # Store Database
         self.worker = None
         self.current_analysis_id = None
+        self.current_project_id = None
 
         # --- STYLESHEET ---
         self.setStyleSheet("""
@@ -83,6 +85,9 @@ class PathwayView(QWidget):
         self.btn_run = QPushButton("⚡ RUN MINING & GENERATE CHART"); self.btn_run.setObjectName("btn_run")
         self.btn_run.clicked.connect(self.run_analysis)
         cl.addWidget(self.btn_run)
+        self.btn_batch = QPushButton("🧬 PROFILE ALL FILES (CLUSTERED HEATMAP)"); self.btn_batch.setObjectName("btn_refresh")
+        self.btn_batch.clicked.connect(self.run_batch)
+        cl.addWidget(self.btn_batch)
         self.layout.addWidget(control_card)
 
         # 3. CHART CARD
@@ -143,23 +148,57 @@ class PathwayView(QWidget):
         self.console.clear(); self.table.setRowCount(0)
         self.btn_run.setEnabled(False); self.btn_run.setText("MINING DATA...")
         
-        # DB: Start Log
+        # DB: Start Log (X_annotation.tsv belongs to the project of genome X)
+        self.current_analysis_id = self.current_project_id = None
         if self.db:
             try:
-                base = filename.split('.')[0]
-                proj = self.db.search_projects(base)
-                pid = proj[0]['project_id'] if proj else None
+                proteins = os.path.join(os.path.dirname(filepath), genome_stem(filename) + ".faa")
+                proj = self.db.get_project_for_proteins(proteins)
+                pid = proj['project_id'] if proj else None
+                self.current_project_id = pid
                 if pid: self.current_analysis_id = self.db.start_analysis(pid, "pathways")
             except: pass
 
         self.worker = PathwayWorker(filepath)
         self.worker.log_signal.connect(self.log)
+        self.worker.completeness_signal.connect(self.on_completeness)
         self.worker.finished_signal.connect(self.on_finished)
         self.worker.start()
 
+    def run_batch(self):
+        annot_dir = os.path.join(os.getcwd(), "results", "annotation")
+        if not os.path.exists(annot_dir):
+            self.log("❌ Error: No annotation results found.")
+            return
+        # One DIAMOND table per genome; the _domains / _rna tables of the same genome are skipped
+        files = [os.path.join(annot_dir, f) for f in sorted(os.listdir(annot_dir)) if f.endswith("_annotation.tsv")]
+        if not files:
+            self.log("❌ Error: No annotation files found.")
+            return
+
+        self.console.clear(); self.table.setRowCount(0)
+        self.btn_run.setEnabled(False); self.btn_batch.setEnabled(False)
+        self.btn_batch.setText("PROFILING GENOMES...")
+        self.current_analysis_id = None
+
+        self.worker = PathwayBatchWorker(files)
+        self.worker.log_signal.connect(self.log)
+        self.worker.finished_signal.connect(self.on_finished)
+        self.worker.start()
+
+    def on_completeness(self, data):
+        # DB: KEGG module completeness for the project
+        if self.db and self.current_project_id:
+            try:
+                self.db.save_pathway_results(self.current_project_id, data)
+            except Exception as e:
+                self.log(f"⚠️ Could not save module completeness: {e}")
+
     def on_finished(self, success, result_img, data_list):
         self.btn_run.setEnabled(True)
         self.btn_run.setText("⚡ RUN MINING & GENERATE CHART")
+        self.btn_batch.setEnabled(True)
+        self.btn_batch.setText("🧬 PROFILE ALL FILES (CLUSTERED HEATMAP)")
         
         if success:
             self.log("✅ Analysis Complete.")
@@ -1,11 +1,11 @@
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QLabel, QFileDialog, QProgressBar, QTextEdit, 
-                               QFrame, QListWidget, QSplitter)
+                               QFrame, QListWidget, QSplitter, QComboBox, QSpinBox)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap
 
-from core.phylogenetics.phylo_engine import PhyloWorker
+from core.phylogenetics.phylo_engine import PhyloWorker, PlacementWorker, MODE_SUPERMATRIX, MODE_SKETCH
 
 class PhyloView(QWidget):
     def __init__(self, db_manager=None):
@@ -68,12 +68,32 @@ class PhyloView(QWidget):
         btn_row.addWidget(self.btn_add, 2); btn_row.addWidget(self.btn_clear, 1)
         sl.addLayout(btn_row)
 
+        sl.addWidget(QLabel("TREE METHOD", objectName="section_lbl"))
+        self.combo_mode = QComboBox()
+        self.combo_mode.addItem("Marker Genes (Supermatrix)", MODE_SUPERMATRIX)
+        self.combo_mode.addItem("K-mer Sketch (Alignment-Free)", MODE_SKETCH)
+        sl.addWidget(self.combo_mode)
+
+        sl.addWidget(QLabel("BOOTSTRAP REPLICATES", objectName="section_lbl"))
+        self.spin_bootstrap = QSpinBox()
+        self.spin_bootstrap.setRange(0, 1000)
+        self.spin_bootstrap.setSingleStep(100)
+        self.spin_bootstrap.setValue(100)
+        self.spin_bootstrap.setToolTip("0 = no support values (marker gene mode only)")
+        sl.addWidget(self.spin_bootstrap)
+
         sl.addStretch()
         sl.addWidget(QLabel("ACTION", objectName="section_lbl"))
         self.btn_run = QPushButton("BUILD TREE"); self.btn_run.setObjectName("btn_primary")
         self.btn_run.setEnabled(False)
         self.btn_run.clicked.connect(self.run_phylo)
         sl.addWidget(self.btn_run)
+
+        self.btn_place = QPushButton("PLACE ON EXISTING TREE"); self.btn_place.setObjectName("btn_secondary")
+        self.btn_place.setEnabled(False)
+        self.btn_place.setToolTip("Insert a single new genome into the last tree without rebuilding it")
+        self.btn_place.clicked.connect(self.run_placement)
+        sl.addWidget(self.btn_place)
         
         self.progress = QProgressBar(); self.progress.setFixedHeight(8); self.progress.setTextVisible(False)
         self.progress.setStyleSheet("background: #E0E5F2; border-radius: 4px; QProgressBar::chunk { background: #4318FF; border-radius: 4px; }")
@@ -135,6 +155,7 @@ class PhyloView(QWidget):
 
     def check_ready(self):
         self.btn_run.setEnabled(len(self.selected_files) >= 2)
+        self.btn_place.setEnabled(len(self.selected_files) == 1 and self.reference_tree() is not None)
         self.btn_run.setText(f"BUILD TREE ({len(self.selected_files)})" if len(self.selected_files) >= 2 else "Select 2+ Files")
 
     def run_phylo(self):
@@ -153,13 +174,60 @@ class PhyloView(QWidget):
             except Exception as e:
                 self.log(f"⚠️ DB Error: {e}")
 
-        self.worker = PhyloWorker(self.selected_files)
+        self.worker = PhyloWorker(self.selected_files, mode=self.combo_mode.currentData(),
+                                  bootstrap=self.spin_bootstrap.value())
         self.worker.log_signal.connect(self.log)
         self.worker.progress_signal.connect(self.progress.setValue)
         self.worker.result_signal.connect(self.display_tree)
+        self.worker.stats_signal.connect(self.save_tree_stats)
         self.worker.finished_signal.connect(self.on_finished)
         self.worker.start()
 
+    def reference_tree(self):
+        """Latest saved tree (DB first, then the default results folder)."""
+        if self.db:
+            try:
+                latest = self.db.get_latest_phylogenetics_results()
+                if latest and os.path.exists(latest['tree_file_path']):
+                    return latest['tree_file_path']
+            except Exception:
+                pass
+        default = os.path.join(os.getcwd(), "results", "phylo", "phylo_tree.nwk")
+        return default if os.path.exists(default) else None
+
+    def run_placement(self):
+        reference = self.reference_tree()
+        if not reference:
+            return
+        self.terminal.clear()
+        self.progress.setValue(5)
+        self.btn_run.setEnabled(False)
+        self.btn_place.setEnabled(False)
+
+        # --- DB: START ANALYSIS ---
+        if self.db:
+            try:
+                proj = self.db.get_project_by_path(self.selected_files[0])
+                if proj:
+                    self.current_analysis_id = self.db.start_analysis(proj['project_id'], "phylogenetics")
+            except Exception as e:
+                self.log(f"⚠️ DB Error: {e}")
+
+        self.worker = PlacementWorker(self.selected_files[0], reference)
+        self.worker.log_signal.connect(self.log)
+        self.worker.progress_signal.connect(self.progress.setValue)
+        self.worker.result_signal.connect(self.display_tree)
+        self.worker.stats_signal.connect(self.save_tree_stats)
+        self.worker.finished_signal.connect(self.on_finished)
+        self.worker.start()
+
+    def save_tree_stats(self, data):
+        if self.db and self.current_analysis_id:
+            try:
+                self.db.save_phylogenetics_results(self.current_analysis_id, data)
+            except Exception as e:
+                self.log(f"⚠️ DB Error: {e}")
+
     def display_tree(self, img_path):
         if os.path.exists(img_path):
             pixmap = QPixmap(img_path)
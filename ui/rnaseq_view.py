@@ -1,7 +1,5 @@
 import pandas as pd
 import numpy as np
-import matplotlib
-matplotlib.use('QtAgg')
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
@@ -10,13 +10,16 @@ from PySide6.QtGui import QColor, QFont
 from core.specialized.specialized_engine import SpecializedWorker
 
 class SpecializedView(QWidget):
-    def __init__(self, db_manager=None):
+    def __init__(self, db_manager=None, scheduler=None):
         super().__init__()
         self.db = db_manager # Store Database Connection
+        self.scheduler = scheduler # Persistent job queue (None: run the engine directly)
+        self.job_id = None
         self.worker = None
         self.current_mode = "card" # Default to AMR
         self.selected_file = ""
         self.current_analysis_id = None
+        self.current_project_id = None
 
         # --- STYLESHEET ---
         self.setStyleSheet("""
@@ -53,6 +56,10 @@ class SpecializedView(QWidget):
         self.setup_dashboard(main_layout)
         self.setup_logs(main_layout)
 
+        if self.scheduler:
+            self.scheduler.job_started.connect(self.on_job_started)
+            self.scheduler.job_finished.connect(self.on_job_finished)
+
     def setup_header(self, layout):
         h = QHBoxLayout()
         self.icon_lbl = QLabel("💊"); self.icon_lbl.setStyleSheet("font-size: 40px; background: transparent;")
@@ -178,12 +185,16 @@ class SpecializedView(QWidget):
             self.btn_run.setEnabled(True)
             self.log(f"Loaded input: {os.path.basename(f)}")
             
-            # DB Project Tracking
+            # DB Project Tracking: hits are saved to the genome this file was predicted from
+            self.current_project_id = None
             if self.db:
                 try:
-                    # Try to link to existing project
-                    proj = self.db.get_project_by_path(f.replace(".faa", ".fasta")) # Heuristic
-                    if proj: self.log(f"Linked to Project ID: {proj['project_id']}")
+                    proj = self.db.get_project_for_proteins(f)
+                    if proj:
+                        self.current_project_id = proj['project_id']
+                        self.log(f"Linked to Project ID: {proj['project_id']}")
+                    else:
+                        self.log("⚠️ No project found for this file: results will not be saved")
                 except: pass
 
     def run_process(self):
@@ -193,14 +204,18 @@ class SpecializedView(QWidget):
         self.risk_badge.setText("SCANNING...")
         self.risk_badge.setStyleSheet("background: #E0E5F2; color: #707EAE;")
 
-        # DB: Start Log
+        # DB: Start Log (only for a file linked to its project, see select_file)
+        self.current_analysis_id = None
         if self.db:
-             # Just use a dummy ID or last used for now since .faa files are derived
-             # In a real app, you'd pass the parent project ID explicitly
              try:
-                 projects = self.db.get_all_projects(limit=1)
-                 if projects:
-                     self.current_analysis_id = self.db.start_analysis(projects[0]['project_id'], "specialized_scan")
+                 if self.scheduler:
+                     # Without a project the scheduler runs the scan but stores nothing
+                     kind = "amr" if self.current_mode == "card" else "virulence"
+                     self.job_id = self.scheduler.submit(kind, self.selected_file, self.current_project_id)
+                     self.log(f"⏳ Queued as job #{self.job_id} (starts when CPU/RAM are free)")
+                     return
+                 if self.current_project_id:
+                     self.current_analysis_id = self.db.start_analysis(self.current_project_id, "specialized_scan")
              except: pass
 
         self.worker = SpecializedWorker(self.selected_file, self.current_mode)
@@ -210,7 +225,31 @@ class SpecializedView(QWidget):
         self.worker.finished_signal.connect(lambda: self.btn_run.setEnabled(True))
         self.worker.start()
 
+    def on_job_started(self, job_id, worker):
+        if job_id != self.job_id: return
+        self.worker = worker
+        worker.log_signal.connect(self.log)
+        worker.progress_signal.connect(self.progress.setValue)
+        worker.result_signal.connect(self.show_results) # Hits are saved by the scheduler
+
+    def on_job_finished(self, job_id, success, msg):
+        if job_id != self.job_id: return
+        self.job_id = None
+        self.btn_run.setEnabled(True)
+        if not success:
+            self.log(f"❌ Error: {msg}")
+            self.risk_badge.setText("FAILED")
+
     def display_results(self, data):
+        self.show_results(data)
+        # DB: Save
+        if self.db and self.current_analysis_id:
+            # Individual hits go to gene_hits (queryable across projects)
+            self.db.save_gene_hits(self.current_project_id, data['source'], data['hits'],
+                                   self.current_analysis_id)
+            self.db.complete_analysis(self.current_analysis_id, success=True)
+
+    def show_results(self, data):
         hits = data['total_hits']
         classes = data['classes']
         risk = data['risk_level']
@@ -232,11 +271,6 @@ class SpecializedView(QWidget):
         for i, item in enumerate(classes):
             self.table.setItem(i, 0, QTableWidgetItem(item))
             self.table.setItem(i, 1, QTableWidgetItem("Detected"))
-            
-        # DB: Save
-        if self.db and self.current_analysis_id:
-            # We save the raw count into the analysis log for now
-            self.db.complete_analysis(self.current_analysis_id, success=True)
 
     def log(self, msg):
         self.terminal.append(f"> {msg}")
@@ -37,4 +37,24 @@ def parse_gff3(file_path):
         return genes
     except Exception as e:
         print(f"Error parsing GFF3: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def iter_fasta(file_path):
+    """
+    Streams a FASTA file record by record.
+    Yields (header, sequence) tuples with the sequence upper-cased.
+    """
+    header, chunks = None, []
+    with open(file_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">"):
+                if header is not None:
+                    yield header, "".join(chunks)
+                header, chunks = line[1:], []
+            else:
+                chunks.append(line.upper())
+    if header is not None:
+        yield header, "".join(chunks)
@@ -0,0 +1,20 @@
+import threading
+
+_lock = threading.Lock()
+_pyplot = None
+
+
+def pyplot():
+    """
+    matplotlib.pyplot on the non-interactive Agg backend, imported on first use.
+    Engines draw from worker threads, so pyplot must never get a GUI backend;
+    the views embed FigureCanvasQTAgg directly and do not need pyplot at all.
+    """
+    global _pyplot
+    with _lock:
+        if _pyplot is None:
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+            _pyplot = plt
+    return _pyplot
@@ -0,0 +1,219 @@
+"""
+Timing spans for the engines
+
+    from utils import profiling
+
+    with profiling.span("annotation.prodigal", bytes=os.path.getsize(genome)) as span:
+        run_tool(...)
+        span.add(count=genes)
+
+    @profiling.timed("annotation.diamond")
+    def annotate_local(...): ...
+
+Modes (profiling.configure or the MICROGENOME_PROFILE environment variable):
+    off          - default; span() returns a shared no-op, so an instrumented
+                   stage pays one function call and a comparison
+    spans        - durations / counts / bytes go to the sink (metrics table)
+    cprofile     - spans, plus a cProfile dump (.prof) of every span opened
+                   with capture=True (the engines' run methods)
+    pyinstrument - same, as a pyinstrument HTML report (if installed)
+"""
+
+import os
+import time
+import functools
+import threading
+from collections import deque
+
+# Optional: pyinstrument for the sampling-profiler capture mode
+try:
+    import pyinstrument
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+MODES = ("off", "spans", "cprofile", "pyinstrument")
+
+_mode = "off"
+_enabled = False
+_sink = None                     # callable(row dict), e.g. DatabaseManager.record_metric
+_sink_pid = None                 # Forked pool workers must not use the parent's sink
+_pending = deque(maxlen=10000)   # Rows recorded while there is no sink
+_local = threading.local()       # Per-thread stack of open span names
+_lock = threading.Lock()
+
+
+def configure(mode):
+    """Set the mode ('off', 'spans', 'cprofile', 'pyinstrument'); returns the mode in effect"""
+    global _mode, _enabled
+    mode = (mode or "off").strip().lower()
+    if mode not in MODES:
+        mode = "off"
+    if mode == "pyinstrument" and not PYINSTRUMENT_AVAILABLE:
+        mode = "cprofile"
+    _mode = mode
+    _enabled = mode != "off"
+    return mode
+
+
+def mode():
+    return _mode
+
+
+def enabled():
+    return _enabled
+
+
+def set_sink(sink):
+    """Send every finished span of this process to `sink` (rows recorded before are delivered now)"""
+    global _sink, _sink_pid
+    with _lock:
+        _sink = sink
+        _sink_pid = os.getpid()
+        rows = list(_pending)
+        _pending.clear()
+    if sink:
+        for row in rows:
+            sink(row)
+
+
+def drain():
+    """Rows recorded without a sink (e.g. in a pool worker), to be recorded by the parent"""
+    with _lock:
+        rows = list(_pending)
+        _pending.clear()
+    return rows
+
+
+def _record(row):
+    sink = _sink
+    if sink is None or _sink_pid != os.getpid():
+        with _lock:
+            _pending.append(row)
+        return
+    try:
+        sink(row)
+    except Exception:
+        pass   # Instrumentation must never break an analysis
+
+
+class _NoSpan:
+    """Returned by span() while profiling is off"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, count=0, bytes=0):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    __slots__ = ("name", "count", "bytes", "context", "capture", "_start", "_parent", "_profiler")
+
+    def __init__(self, name, count=None, bytes=None, context=None, capture=False):
+        self.name = name
+        self.count = count
+        self.bytes = bytes
+        self.context = context
+        self.capture = capture
+        self._profiler = None
+
+    def add(self, count=0, bytes=0):
+        """Accumulate items / bytes processed inside the span"""
+        if count:
+            self.count = (self.count or 0) + count
+        if bytes:
+            self.bytes = (self.bytes or 0) + bytes
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self._parent = stack[-1] if stack else None
+        stack.append(self.name)
+        if self.capture and _mode in ("cprofile", "pyinstrument"):
+            self._profiler = _start_capture()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        _local.stack.pop()
+        if self._profiler is not None:
+            _save_capture(self._profiler, self.name)
+        _record({
+            "name": self.name, "parent": self._parent, "duration_ms": duration * 1000,
+            "count": self.count, "bytes": self.bytes, "context": self.context,
+            "ok": exc_type is None,
+        })
+        return False
+
+
+def span(name, count=None, bytes=None, context=None, capture=False):
+    """Time a block; `capture` also profiles it in the cprofile / pyinstrument modes"""
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, count, bytes, context, capture)
+
+
+def timed(name=None, capture=False):
+    """Decorator form of span() (name defaults to module.qualname)"""
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(label, capture=capture):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# =========================================================================
+# CAPTURE (cProfile / pyinstrument)
+# =========================================================================
+
+def profiles_dir():
+    path = os.path.join(os.getcwd(), "results", "profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _start_capture():
+    if _mode == "pyinstrument":
+        profiler = pyinstrument.Profiler()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+    try:
+        profiler.start() if _mode == "pyinstrument" else profiler.enable()
+    except (RuntimeError, ValueError):
+        return None   # Another profiler is already active in this thread
+    return profiler
+
+
+def _save_capture(profiler, name):
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    base = os.path.join(profiles_dir(), f"{name}_{stamp}_{threading.get_ident()}")
+    try:
+        if _mode == "pyinstrument":
+            profiler.stop()
+            with open(f"{base}.html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.disable()
+            profiler.dump_stats(f"{base}.prof")   # python -m pstats <file>
+    except Exception:
+        pass
+
+
+configure(os.environ.get("MICROGENOME_PROFILE"))
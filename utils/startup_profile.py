@@ -0,0 +1,70 @@
+"""
+Import-time breakdown of the application start
+
+    python -m utils.startup_profile            # what `import main` costs
+    python -m utils.startup_profile ui.blast_view --top 40
+
+Runs the import in a fresh interpreter with `-X importtime`, so nothing
+already loaded in this process hides the cost.
+"""
+
+import os
+import re
+import sys
+import subprocess
+from collections import defaultdict
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:   self [us] | cumulative | imported package" (2 spaces per nesting level)
+IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def profile_imports(module="main", python=sys.executable):
+    """Returns [(module, self_us, cumulative_us, depth)] in the order they finished loading."""
+    proc = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=APP_DIR)
+    rows = []
+    errors = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            rows.append((match[4], int(match[1]), int(match[2]), len(match[3]) // 2))
+        else:
+            errors.append(line)
+    if proc.returncode != 0:
+        raise RuntimeError(errors[-1] if errors else f"import {module} failed")
+    return rows
+
+
+def format_report(rows, top=25):
+    """Total, slowest top-level packages (summed self time) and slowest single imports."""
+    total = sum(r[1] for r in rows)
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split('.')[0]] += self_us
+
+    lines = [f"Total import time: {total / 1000:.0f} ms ({len(rows)} modules)", "",
+             "Slowest packages (self time, all submodules):"]
+    for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {us / 1000:8.1f} ms  {100 * us / max(total, 1):5.1f}%  {name}")
+
+    lines += ["", "Slowest imports (cumulative, including what they import):"]
+    for name, _, cumulative, depth in sorted(rows, key=lambda r: -r[2])[:top]:
+        lines.append(f"  {cumulative / 1000:8.1f} ms  {'  ' * depth}{name}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import-time profile of the application start")
+    parser.add_argument("module", nargs="?", default="main", help="module to import (default: main)")
+    parser.add_argument("--top", type=int, default=25, help="rows per section")
+    args = parser.parse_args(argv)
+    print(format_report(profile_imports(args.module), args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
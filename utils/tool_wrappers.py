@@ -12,6 +12,17 @@ def get_bin_path(tool_name):
         return f"{base_path}.exe"
     return base_path
 
+def get_startupinfo():
+    """
+    Returns a STARTUPINFO that hides the console window on Windows.
+    On other platforms there is no console to hide, so None is returned.
+    """
+    if os.name != 'nt':
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
+
 def run_prodigal(input_fasta, output_gff):
     """
     Wrapper for Prodigal (Gene Prediction)[cite: 97, 164].
@@ -34,4 +45,50 @@ def run_prodigal(input_fasta, output_gff):
     except subprocess.CalledProcessError as e:
         return False, f"Prodigal failed: {e.stderr}"
     except Exception as e:
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
+
+def run_diamond_makedb(input_fasta, db_path, exe=None):
+    """
+    Wrapper for DIAMOND makedb.
+    Builds a protein database (.dmnd) from a FASTA file.
+    """
+    exe = exe or get_bin_path("diamond")
+    if not os.path.exists(exe):
+        return False, f"Error: {exe} not found. Please bundle tools correctly."
+
+    command = [exe, "makedb", "--in", input_fasta, "-d", db_path, "--quiet"]
+    try:
+        subprocess.run(command, capture_output=True, text=True, check=True, startupinfo=get_startupinfo())
+        return True, "Success"
+    except subprocess.CalledProcessError as e:
+        return False, f"DIAMOND makedb failed: {e.stderr}"
+    except Exception as e:
+        return False, str(e)
+
+def run_diamond_blastp(query_fasta, db_path, output_tsv, columns, extra_args=None, threads=None, exe=None):
+    """
+    Wrapper for DIAMOND blastp.
+    Writes a tabular (outfmt 6) result with the requested columns.
+    """
+    exe = exe or get_bin_path("diamond")
+    if not os.path.exists(exe):
+        return False, f"Error: {exe} not found. Please bundle tools correctly."
+
+    command = [
+        exe, "blastp",
+        "-q", query_fasta,
+        "-d", db_path,
+        "-o", output_tsv,
+        "--outfmt", "6", *columns,
+        "--threads", str(threads or os.cpu_count() or 1),
+        "--quiet"
+    ]
+    command += list(extra_args or [])
+
+    try:
+        subprocess.run(command, capture_output=True, text=True, check=True, startupinfo=get_startupinfo())
+        return True, "Success"
+    except subprocess.CalledProcessError as e:
+        return False, f"DIAMOND blastp failed: {e.stderr}"
+    except Exception as e:
+        return False, str(e)
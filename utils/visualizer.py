@@ -1,4 +1,3 @@
-from pygenomeviz import GenomeViz
 import os
 
 def generate_circular_map(gff_path, output_png):
@@ -6,7 +5,8 @@ def generate_circular_map(gff_path, output_png):
     Reads a GFF file and generates a circular visualization.
     """
     try:
-        # 1. Initialize GenomeViz
+        # 1. Initialize GenomeViz (imported here: it pulls in matplotlib)
+        from pygenomeviz import GenomeViz
         gv = GenomeViz(feature_track_ratio=0.3)
         
         # 2. Load the features from the GFF file
@@ -30,6 +30,7 @@ def generate_linear_map(gff_path, output_png, start=0, end=10000):
     Generates a linear map of a specific region (useful for gene clusters).
     """
     try:
+        from pygenomeviz import GenomeViz
         gv = GenomeViz()
         gv.from_gff(gff_path)
         fig = gv.plot_fig(plot_style="linear", range=(start, end))